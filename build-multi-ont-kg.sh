@@ -55,11 +55,32 @@ mem_gb=`${CODE_DIR}/get-system-memory-gb.sh`
 export OWLTOOLS_MEMORY=${mem_gb}G
 export DEBUG=1  ## for owltools
 
-${s3_cp_cmd} s3://${s3_bucket}/foodon.pickle ${BUILD_DIR}/
+## number of ontologies to download and load concurrently (the owltools
+## conversions share the OWLTOOLS_MEMORY budget)
+num_workers=${ONT_NUM_WORKERS:-1}
+
+## loaded ontologies are cached by content hash, so that a rebuild with
+## unchanged ontology files skips owltools and JSON parsing
+ont_cache_dir=${BUILD_DIR}/ont-cache
+
+## FoodOn is very slow to convert with owltools, so when the cache is empty
+## (e.g., on a new build system), seed it from the pickled FoodOn ontology
+if ! compgen -G "${ont_cache_dir}/*.ontcache" > /dev/null
+then
+    ${s3_cp_cmd} s3://${s3_bucket}/foodon.pickle ${BUILD_DIR}/
+fi
+
+## recurring warnings are summarized in the log every 60 seconds; every
+## warning is kept in full in a gzipped side file
+log_detail_file=${BUILD_DIR}/build-multi-ont-kg-detail${test_suffix}.log.gz
 
 ## run the multi_ont_to_json_kg.py script
 cd ${BUILD_DIR} && ${python_command} ${CODE_DIR}/multi_ont_to_kg_jsonl.py \
            ${test_arg} \
+           --numWorkers ${num_workers} \
+           --ontCacheDir ${ont_cache_dir} \
+           --logSummaryInterval 60 \
+           --logDetailFile ${log_detail_file} \
            ${curies_to_categories_file} \
            ${curies_to_urls_file} \
            ${ont_load_inventory_file} \
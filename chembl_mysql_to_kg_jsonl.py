@@ -15,7 +15,9 @@ __status__ = 'Prototype'
 
 
 import argparse
+import itertools
 import kg2_util
+import operator
 import pymysql
 import datetime
 
@@ -90,6 +92,28 @@ def make_edge(subject_id: str,
     return edge
 
 
+def stream_molecules_with_synonyms(molecule_rows, synonym_rows):
+    # Merge-joins two result sets that are both ordered by molregno (the last
+    # column of a molecule row, and the first column of a synonym row), and
+    # yields each molecule row together with its list of synonym rows
+    synonym_groups = itertools.groupby(synonym_rows, key=operator.itemgetter(0))
+    synonym_group = next(synonym_groups, None)
+    synonym_results = []
+    synonym_results_molregno = None
+    for molecule_row in molecule_rows:
+        molregno = molecule_row[-1]
+        if molregno != synonym_results_molregno:
+            while synonym_group is not None and synonym_group[0] < molregno:
+                synonym_group = next(synonym_groups, None)
+            if synonym_group is not None and synonym_group[0] == molregno:
+                synonym_results = [synonym_row[1:] for synonym_row in synonym_group[1]]
+                synonym_group = next(synonym_groups, None)
+            else:
+                synonym_results = []
+            synonym_results_molregno = molregno
+        yield molecule_row, synonym_results
+
+
 def make_node(id: str,
               iri: str,
               name: str,
@@ -121,6 +145,9 @@ if __name__ == '__main__':
     output_edges_file_name = args.outputEdgesFile
     test_mode = args.test
     connection = pymysql.connect(read_default_file=mysql_config_file, db=mysql_db_name)
+    # the molecules and their synonyms are streamed concurrently, and an
+    # unbuffered cursor needs a connection of its own
+    synonyms_connection = pymysql.connect(read_default_file=mysql_config_file, db=mysql_db_name)
 
     nodes_info, edges_info = kg2_util.create_kg2_jsonlines(test_mode)
     nodes_output = nodes_info[0]
@@ -150,23 +177,37 @@ if __name__ == '__main__':
        molecule_dictionary.molregno
        from (molecule_dictionary
        left join compound_structures on molecule_dictionary.molregno = compound_structures.molregno)
-       left join compound_properties on molecule_dictionary.molregno = compound_properties.molregno'''
+       left join compound_properties on molecule_dictionary.molregno = compound_properties.molregno
+       order by molecule_dictionary.molregno'''
     if test_mode:
         sql += str_sql_row_limit_test_mode
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        molecule_sql_results = cursor.fetchall()
+
+    # query to get all synonyms and publications associated with the ChEMBL
+    # molecules, in the same (molregno) order as the molecules themselves
+
+    sql_synonyms = ('select distinct compound_records.molregno, compound_name, src_short_name, src_compound_id, pubmed_id '
+                    'from (compound_records natural join source) '
+                    'left join docs on compound_records.doc_id = docs.doc_id ')
+    if test_mode:
+        sql_synonyms += ('where compound_records.molregno <= '
+                         '(select max(molregno) from (select molregno from molecule_dictionary '
+                         'order by molregno' + str_sql_row_limit_test_mode + ') as test_molecules) ')
+    sql_synonyms += 'order by compound_records.molregno'
+    synonym_rows = kg2_util.stream_sql_results(synonyms_connection, sql_synonyms)
+
     row_ctr = 0
-    for (chembl_id,
-         pref_name,
-         molecule_type,
-         max_phase_int,
-         availability_type,
-         standard_inchi,
-         standard_inchi_key,
-         canonical_smiles,
-         full_mwt,
-         molregno) in molecule_sql_results:
+    for ((chembl_id,
+          pref_name,
+          molecule_type,
+          max_phase_int,
+          availability_type,
+          standard_inchi,
+          standard_inchi_key,
+          canonical_smiles,
+          full_mwt,
+          molregno),
+         synonym_results) in stream_molecules_with_synonyms(kg2_util.stream_sql_results(connection, sql),
+                                                            synonym_rows):
         row_ctr += 1
         if row_ctr % 100000 == 0:
             print("have processed " + str(row_ctr) + " compounds")
@@ -182,32 +223,21 @@ if __name__ == '__main__':
         curie_id = 'CHEMBL.COMPOUND:' + chembl_id
         category_label = kg2_util.BIOLINK_CATEGORY_SMALL_MOLECULE
 
-        # query to get all synonyms and publications associated with the ChEMBL molecule
-
-        sql_synonyms = ('select distinct compound_name, src_short_name, src_compound_id, pubmed_id '
-                        'from (compound_records natural join source) '
-                        'left join docs on compound_records.doc_id = docs.doc_id '
-                        'where molregno =')
-
-        sql_synonyms += str(molregno)
         publications = []
         publications_set = set()
-        with connection.cursor() as cursor:
-            cursor.execute(sql_synonyms)
-            synonym_results = cursor.fetchall()
-            synonym_set = set()
-            for (compound_name,
-                 src_short_name,
-                 src_compound_id,
-                 pubmed_id) in synonym_results:
-                if pref_name is None and compound_name is not None:
-                    pref_name = compound_name
-                if compound_name is not None:
-                    synonym_set.add(compound_name)
-                if pubmed_id is not None:
-                    publications_set.add(kg2_util.CURIE_PREFIX_PMID + ':' + str(pubmed_id))
-                if src_compound_id is not None and src_short_name is not None and src_short_name != "LITERATURE":
-                    synonym_set.add(src_short_name + ':' + src_compound_id)
+        synonym_set = set()
+        for (compound_name,
+             src_short_name,
+             src_compound_id,
+             pubmed_id) in synonym_results:
+            if pref_name is None and compound_name is not None:
+                pref_name = compound_name
+            if compound_name is not None:
+                synonym_set.add(compound_name)
+            if pubmed_id is not None:
+                publications_set.add(kg2_util.CURIE_PREFIX_PMID + ':' + str(pubmed_id))
+            if src_compound_id is not None and src_short_name is not None and src_short_name != "LITERATURE":
+                synonym_set.add(src_short_name + ':' + src_compound_id)
         compound_synonyms = list(synonym_set)
         publications += list(publications_set)
         synonyms += compound_synonyms
@@ -232,6 +262,9 @@ if __name__ == '__main__':
                               update_date,
                               canonical_smiles)
         nodes_output.write(node_dict)
+    # closing the generator reads any remaining synonym rows from the server
+    synonym_rows.close()
+    synonyms_connection.close()
 
 # create node objects for ChEMBL targets
 
@@ -243,13 +276,10 @@ if __name__ == '__main__':
              target_dictionary natural join target_type'''
     if test_mode:
         sql += str_sql_row_limit_test_mode
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        results = cursor.fetchall()
     for (chembl_id,
          tax_id,
          pref_name,
-         target_type) in results:
+         target_type) in kg2_util.stream_sql_results(connection, sql):
         curie_id = 'CHEMBL.TARGET:' + chembl_id
         category_label = 'drug_target'
         description = pref_name
@@ -273,10 +303,7 @@ if __name__ == '__main__':
     sql = 'select distinct mechanism_of_action from drug_mechanism'
     if test_mode:
         sql += str_sql_row_limit_test_mode
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        results = cursor.fetchall()
-    for (mechanism_of_action,) in results:
+    for (mechanism_of_action,) in kg2_util.stream_sql_results(connection, sql):
         if mechanism_of_action is not None:
             node_label = mechanism_of_action.lower().replace(' ', '_')
             node_curie_id = CHEMBL_CURIE_BASE_MECHANISM + ':' + node_label
@@ -294,10 +321,7 @@ if __name__ == '__main__':
 # get action_type nodes and their subclass_of relationships
 
     sql = 'select action_type, description, parent_type from action_type'
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        results = cursor.fetchall()
-    for (action_type, description, parent_type) in results:
+    for (action_type, description, parent_type) in kg2_util.stream_sql_results(connection, sql):
         name = action_type.lower()
         predicate_label = name.replace(' ', '_')
         curie_id = kg2_util.CURIE_PREFIX_CHEMBL_MECHANISM + ':' + predicate_label
@@ -331,12 +355,9 @@ if __name__ == '__main__':
              target_dictionary as t2 on t2.tid = target_relations.related_tid'''
     if test_mode:
         sql += str_sql_row_limit_test_mode
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        results = cursor.fetchall()
     for (t1_chembl_id,
          relationship,
-         t2_chembl_id) in results:
+         t2_chembl_id) in kg2_util.stream_sql_results(connection, sql):
         subject_curie_id = kg2_util.CURIE_PREFIX_CHEMBL_TARGET + ':' + t1_chembl_id
         object_curie_id = kg2_util.CURIE_PREFIX_CHEMBL_TARGET + ':' + t2_chembl_id
         predicate_label = relationship.lower().replace(' ', '_')
@@ -361,15 +382,12 @@ if __name__ == '__main__':
              where component_sequences.accession is not NULL'''
     if test_mode:
         sql += str_sql_row_limit_test_mode
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        results = cursor.fetchall()
     for (chembl_id,
          homologue,
          component_type,
          accession,
          db_source,
-         db_version) in results:
+         db_version) in kg2_util.stream_sql_results(connection, sql):
         subject_curie_id = kg2_util.CURIE_PREFIX_CHEMBL_TARGET + ':' + chembl_id
         if component_type == 'PROTEIN':
             object_curie_id = kg2_util.CURIE_PREFIX_UNIPROT + ':' + accession
@@ -398,15 +416,12 @@ if __name__ == '__main__':
              left join mechanism_refs on drug_mechanism.mec_id = mechanism_refs.mec_id)'''
     if test_mode:
         sql += str_sql_row_limit_test_mode
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        results = cursor.fetchall()
     for (molec_chembl_id,
          mechanism_of_action,
          direct_interaction,
          ref_url,
          action_type,
-         target_chembl_id) in results:
+         target_chembl_id) in kg2_util.stream_sql_results(connection, sql):
         subject_curie_id = CHEMBL_CURIE_BASE_COMPOUND + ':' + molec_chembl_id
         object_curie_id = CHEMBL_CURIE_BASE_TARGET + ':' + target_chembl_id
         predicate_label = action_type.lower().replace(' ', '_')
@@ -439,10 +454,7 @@ if __name__ == '__main__':
     sql = '''select md.chembl_id, di.mesh_id from molecule_dictionary as md inner join drug_indication as di on md.molregno = di.molregno'''
     if test_mode:
         sql += str_sql_row_limit_test_mode
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        results = cursor.fetchall()
-    for (chembl_id, mesh_id) in results:
+    for (chembl_id, mesh_id) in kg2_util.stream_sql_results(connection, sql):
         subject_curie_id = CHEMBL_CURIE_BASE_COMPOUND + ':' + chembl_id
         object_curie_id = kg2_util.CURIE_PREFIX_MESH + ':' + mesh_id
         predicate_label = kg2_util.EDGE_LABEL_BIOLINK_APPLIED_TO_TREAT
@@ -471,10 +483,7 @@ if __name__ == '__main__':
              on c3.molregno = m3.molregno'''
     if test_mode:
         sql += str_sql_row_limit_test_mode
-    with connection.cursor() as cursor:
-        cursor.execute(sql)
-        results = cursor.fetchall()
-    for (drug_id, compound_id, metabolite_id) in results:
+    for (drug_id, compound_id, metabolite_id) in kg2_util.stream_sql_results(connection, sql):
         subject_curie_id = CHEMBL_CURIE_BASE_COMPOUND + ':' + compound_id
         object_curie_id = CHEMBL_CURIE_BASE_COMPOUND + ':' + metabolite_id
         predicate_label = kg2_util.EDGE_LABEL_BIOLINK_HAS_METABOLITE
@@ -2,8 +2,12 @@
 ''' drugbank_xml_to_kg_json.py: Extracts a KG2 JSON file from the
     DrugBank database in XML format
 
-    Usage: drugbank_xml_to_kg_json.py [--test] <inputFile.json>
+    Usage: drugbank_xml_to_kg_json.py [--test] <inputFile.xml[.gz|.zip]>
     <outputNodesFile.json> <outputEdgesFile.json>
+
+    The DrugBank XML is streamed one <drug> record at a time, so peak memory
+    is bounded by the largest single drug record; the input file can be
+    gzipped or zipped.
 '''
 
 import kg2_util as kg2_util
@@ -11,7 +15,6 @@ import argparse
 import xmltodict
 import datetime
 import sys
-import pickle
 import json
 
 __author__ = 'Erica Wood'
@@ -500,39 +503,42 @@ def make_edges(drug: dict):
     return edges
 
 
-def make_kg2_graph(drugbank_dict: dict, nodes_output, edges_output, test_mode: bool):
-    drugs = drugbank_dict["drugbank"]["drug"]
-
-    update_date = drugbank_dict["drugbank"]["@exported-on"]
-    version = drugbank_dict["drugbank"]["@version"]
-    drugbank_kp_node = kg2_util.make_node(DRUGBANK_KB_CURIE_ID,
-                                          DRUGBANK_KB_IRI,
-                                          "DrugBank v" + version,
-                                          kg2_util.SOURCE_NODE_CATEGORY,
-                                          update_date,
-                                          DRUGBANK_KB_CURIE_ID)
-
-    nodes_output.write(drugbank_kp_node)
-
+def make_kg2_graph(input_file_name: str, nodes_output, edges_output, test_mode: bool):
     drug_ctr = 0
 
-    for drug in drugs:
+    def process_drug(path: list, drug: dict):
+        nonlocal drug_ctr
+        if path[-1][0] != 'drug':
+            return True
         drug_ctr += 1
+        if drug_ctr == 1:
+            # the attributes of the <drugbank> root element are in the path
+            drugbank_attributes = path[0][1]
+            update_date = drugbank_attributes["exported-on"]
+            version = drugbank_attributes["version"]
+            drugbank_kp_node = kg2_util.make_node(DRUGBANK_KB_CURIE_ID,
+                                                  DRUGBANK_KB_IRI,
+                                                  "DrugBank v" + version,
+                                                  kg2_util.SOURCE_NODE_CATEGORY,
+                                                  update_date,
+                                                  DRUGBANK_KB_CURIE_ID)
+            nodes_output.write(drugbank_kp_node)
         if test_mode and drug_ctr > 10000:
-            break
+            return False
         node = make_node(drug)
         if node is not None:
             nodes_output.write(node)
         for edge in make_edges(drug):
             if edge is not None:
                 edges_output.write(edge)
+        return True
 
-
-def xml_to_drugbank_dict(input_file_name: str):
-    drugbank = open(input_file_name)
-    drugbank_dict = xmltodict.parse(drugbank.read())
+    drugbank = kg2_util.open_compressed_or_plain_file(input_file_name)
+    try:
+        xmltodict.parse(drugbank, item_depth=2, item_callback=process_drug)
+    except xmltodict.ParsingInterrupted:
+        pass
     drugbank.close()
-    return drugbank_dict
 
 
 if __name__ == '__main__':
@@ -547,14 +553,8 @@ if __name__ == '__main__':
     nodes_output = nodes_info[0]
     edges_output = edges_info[0]
 
-    print("Start load: ", date())
-    drugbank_dict = xml_to_drugbank_dict(input_file_name)
-    # For debugging only
-    #drugbank_dict = pickle.load(open(input_file_name, 'rb'))
-    print("Finish load: ", date())
-
     print("Start nodes and edges: ", date())
-    make_kg2_graph(drugbank_dict, nodes_output, edges_output, test_mode)
+    make_kg2_graph(input_file_name, nodes_output, edges_output, test_mode)
     print("Finish nodes and edges: ", date())
 
     print("Start closing JSON: ", date())
@@ -6,11 +6,11 @@
 set -o nounset -o pipefail -o errexit
 
 if [[ "${1:-}" == "--help" || "${1:-}" == "-h" ]]; then
-    echo Usage: "$0 <output-xml-file>"
+    echo Usage: "$0 <output-xml-gz-file>"
     exit 2
 fi
 
-# Usage: extract-drugbank.sh <output_xml_file>
+# Usage: extract-drugbank.sh <output_xml_gz_file>
 
 echo "================= starting extract-drugbank.sh =================="
 date
@@ -19,12 +19,12 @@ config_dir=`dirname "$0"`
 source ${config_dir}/master-config.shinc
 
 drugbank_version=5.1.10
-output_file=${1:-"${BUILD_DIR}/drugbank.xml"}
+output_file=${1:-"${BUILD_DIR}/drugbank.xml.gz"}
 
 xml_filename=drugbank_${drugbank_version}.xml.gz
 
-${s3_cp_cmd} s3://${s3_bucket}/${xml_filename} ${BUILD_DIR}
-gzip -cdf ${BUILD_DIR}/${xml_filename} > ${output_file}
+## drugbank_xml_to_kg_jsonl.py streams the gzipped XML directly
+${s3_cp_cmd} s3://${s3_bucket}/${xml_filename} ${output_file}
 
 date
 echo "================= finished extract-drugbank.sh =================="
@@ -22,9 +22,8 @@ output_file=hmdb_metabolites
 
 hmdb_link="https://hmdb.ca/system/downloads/current/hmdb_metabolites.zip"
 
+## hmdb_xml_to_kg_jsonl.py streams the XML file directly out of the zip archive
 ${curl_get} ${hmdb_link} > ${BUILD_DIR}/${output_file}.zip
 
-unzip -o ${BUILD_DIR}/${output_file}.zip -d ${BUILD_DIR}
-
 date
 echo "================= finishing extract-hmdb.sh =================="
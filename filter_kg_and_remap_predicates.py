@@ -16,11 +16,24 @@ __status__ = 'Prototype'
 
 import argparse
 import kg2_util
+import multiprocessing
+import os
 import pprint
+import shutil
 import sys
 import json
+import tempfile
+import typing
 from datetime import datetime
 
+# the input edges file is split into this many byte ranges per worker
+# process, so that a slow byte range does not hold up the other workers
+EDGES_BYTE_RANGES_PER_WORKER = 4
+
+# arguments of remap_edges that are shared with the worker processes by
+# forking, rather than by pickling them for each byte range
+SHARED_REMAP_EDGES_ARGS = None
+
 # 1. What is the indicator for negation?
 # - It's a prefix in the relation property in the edge... possibly. 
 # - Negated edges only come from SEMMEDDB, so we look in semmeddb_tuple_list_json_to_kg_json
@@ -52,6 +65,8 @@ def make_arg_parser():
     arg_parser.add_argument('--test', dest='test', action='store_true', default=False)
     arg_parser.add_argument('--dropSelfEdgesExcept', required=False, dest='drop_self_edges_except', default=None)
     arg_parser.add_argument('--dropNegated', dest='drop_negated', action='store_true', default=False)
+    arg_parser.add_argument('--numWorkers', dest='num_workers', type=int, default=1,
+                            help="number of worker processes that remap the edges in parallel")
     return arg_parser
 
 
@@ -119,6 +134,24 @@ def warning_record_of_source_predicate_curie_occurrences(record_of_source_predic
                 file=sys.stderr)
 
 
+def remap_node(node_dict, infores_remap_config, knowledge_source_curies_not_in_config_nodes):
+    # remaps the node's knowledge sources to infores CURIEs, in place
+    if node_dict.get('provided_by') is None:
+        node_dict['provided_by'] = node_dict.pop('knowledge_source')
+    if isinstance(node_dict.get('provided_by'), str):
+        node_dict['provided_by'] = [node_dict['provided_by']]
+    knowledge_source = node_dict['provided_by']
+    infores_curies = list()
+    for source in knowledge_source:
+        infores_curie_dict = infores_remap_config.get(source, None)
+        if infores_curie_dict is None:
+            knowledge_source_curies_not_in_config_nodes.add(source)
+        else:
+            infores_curie = infores_curie_dict['infores_curie']
+            infores_curies.append(infores_curie)
+    node_dict['provided_by'] = infores_curies
+
+
 def process_nodes(input_nodes_file_name, infores_remap_config, nodes_output):
     knowledge_source_curies_not_in_config_nodes = set()
 
@@ -133,20 +166,7 @@ def process_nodes(input_nodes_file_name, infores_remap_config, nodes_output):
         if node_ctr % 1000000 == 0:
             print(f"Processing node {node_ctr}")
         node_id = node_dict["id"]
-        if node_dict.get('provided_by') is None:
-            node_dict['provided_by'] = node_dict.pop('knowledge_source')
-        if isinstance(node_dict.get('provided_by'), str):
-            node_dict['provided_by'] = [node_dict['provided_by']]
-        knowledge_source = node_dict['provided_by']
-        infores_curies = list()
-        for source in knowledge_source:
-            infores_curie_dict = infores_remap_config.get(source, None)
-            if infores_curie_dict is None:
-                knowledge_source_curies_not_in_config_nodes.add(source)
-            else:
-                infores_curie = infores_curie_dict['infores_curie']
-                infores_curies.append(infores_curie)
-        node_dict['provided_by'] = infores_curies
+        remap_node(node_dict, infores_remap_config, knowledge_source_curies_not_in_config_nodes)
         nodes_output.write(node_dict)
         nodes_set.add(node_id)
 
@@ -159,30 +179,111 @@ def process_nodes(input_nodes_file_name, infores_remap_config, nodes_output):
     return nodes_set
 
 
-def process_edges(input_edges_file_name, infores_remap_config, predicate_remap_file_name, curies_to_uri_file_name, edges_output, drop_self_edges_except, nodes):
-    predicate_remap_config = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(predicate_remap_file_name))
-    map_dict = kg2_util.make_uri_curie_mappers(curies_to_uri_file_name)
+def make_build_node(version_file_name, test_mode):
+    update_date = datetime.now().strftime("%Y-%m-%d %H:%M")
+    version_file = open(version_file_name, 'r')
+    build_name = str
+    # Add node to describe build
+    for line in version_file:
+        test_flag = ""
+        if test_mode:
+            test_flag = "-TEST"
+        build_name = "RTX-KG" + line.rstrip() + test_flag
+        break
+    version_file.close()
+    build_node = kg2_util.make_node(kg2_util.CURIE_PREFIX_RTX + ':' + 'KG2',
+                                    kg2_util.BASE_URL_RTX + 'KG2',
+                                    build_name,
+                                    kg2_util.SOURCE_NODE_CATEGORY,
+                                    update_date,
+                                    kg2_util.CURIE_PREFIX_RTX + ':')
+    build_info = {'version': build_node['name'], 'timestamp_utc': build_node['update_date']}
+    pprint.pprint(build_info)
+    return build_node
+
+
+def compile_predicate_remap_config(predicate_remap_config: dict):
+    # compiles each source predicate's entry in predicate-remap.yaml into a
+    # tuple of (operation, core predicate, qualified predicate, qualified
+    # object aspect, qualified object direction, edge ID qualifiers), where the
+    # last is the part of the new edge ID that goes between the source
+    # predicate and the object
+    command_set = {'delete', 'keep', 'invert'}
+    remap_table = dict()
+    for source_predicate_curie, command in predicate_remap_config.items():
+        # The length of the 'command' could be 1 if it just has the operation, such as with 'delete'
+        # or up to 4 if there is the operation, core predicate, qualified predicate, and qualifiers
+        # Verify that the operation is allowed
+        assert len(command) in range(1, 5)
+        operation = command["operation"]
+        assert operation in command_set
+        core_predicate_curie = command.get("core_predicate", None)
+        qualified_predicate = None
+        qualified_object_aspect = None
+        qualified_object_direction = None
+        if operation == "invert" or core_predicate_curie is not None:
+            assert core_predicate_curie is not None
+            qualified_predicate = command.get("qualified_predicate", None)
+            qualifiers = command.get("qualifiers", None)
+            if qualifiers is not None:
+                qualified_object_aspect = qualifiers.get("object_aspect", None)
+                qualified_object_direction = qualifiers.get("object_direction", None)
+        remap_table[source_predicate_curie] = (operation,
+                                               core_predicate_curie,
+                                               qualified_predicate,
+                                               qualified_object_aspect,
+                                               qualified_object_direction,
+                                               f"{qualified_predicate}---{qualified_object_aspect}---{qualified_object_direction}")
+    return remap_table
+
+
+def make_remap_action_for_unconfigured_predicate(source_predicate_curie: str):
+    # a source predicate CURIE that is not in the config file is kept; if it is
+    # a biolink predicate, it is also the core predicate
+    core_predicate_curie = None
+    if source_predicate_curie.startswith(kg2_util.CURIE_PREFIX_BIOLINK + ":"):
+        core_predicate_curie = source_predicate_curie
+    return ('keep', core_predicate_curie, None, None, None, "None---None---None")
+
+
+def replace_edge_id_qualifiers(edge_id: str, edge_id_qualifiers: str):
+    # same result as update_edge_id, but only searches for the second and
+    # the second-to-last "---" separators, instead of splitting the whole ID;
+    # returns None (so the caller falls back to update_edge_id) if the ID has
+    # fewer than three parts, or a run of dashes that would make the
+    # separators ambiguous
+    predicate_end = edge_id.find("---", edge_id.find("---") + 3)
+    if predicate_end < 0 or "----" in edge_id:
+        return None
+    object_start = edge_id.rfind("---", 0, edge_id.rfind("---"))
+    return edge_id[:predicate_end] + "---" + edge_id_qualifiers + edge_id[object_start:]
+
+
+def remap_edges(edges: typing.Iterable[dict],
+                infores_remap_config: dict,
+                predicate_remap_config: dict,
+                curie_to_uri_expander: callable,
+                edges_output,
+                drop_self_edges_except: set,
+                nodes: set,
+                drop_negated: bool = False):
+    remap_table = compile_predicate_remap_config(predicate_remap_config)
+    knowledge_source_to_infores_curie = {knowledge_source: infores_curie_dict['infores_curie']
+                                         for knowledge_source, infores_curie_dict in infores_remap_config.items()}
 
-    curie_to_uri_expander = map_dict['expand']
     source_predicate_curies_not_in_config = set()
     source_predicate_curies_not_in_nodes = set()
+    source_predicate_curies_checked_in_nodes = set()
     knowledge_source_curies_not_in_config_edges = set()
     record_of_source_predicate_curie_occurrences = {source_predicate_curie: False for source_predicate_curie in predicate_remap_config.keys()}
 
-    command_set = {'delete', 'keep', 'invert'}
-    # The length of the 'command' could be 1 if it just has the operation, such as with 'delete'
-    # or up to 4 if there is the operation, core predicate, qualified predicate, and qualifiers
-    # Verify that the operation is allowed
-    for source_predicate_curie, command in predicate_remap_config.items():
-        assert len(command) in range(1, 5)
-        assert command["operation"] in command_set
+    # the remap action for each source predicate CURIE seen so far in the
+    # edges; the per-predicate bookkeeping is done the first time that a
+    # source predicate CURIE is seen
+    remap_actions = dict()
 
     edge_ctr = 0
 
-    edges_read_jsonlines_info = kg2_util.start_read_jsonlines(input_edges_file_name)
-    edges = edges_read_jsonlines_info[0]
-
-    print(f"Starting edges {kg2_util.date()}")
     for edge_dict in edges:
         edge_ctr += 1
         if edge_ctr == 1:
@@ -192,109 +293,179 @@ def process_edges(input_edges_file_name, infores_remap_config, predicate_remap_f
         if drop_negated and edge_dict['negated']:
             continue
         source_predicate_label = edge_dict['relation_label']
-        predicate_label = source_predicate_label
         if edge_dict.get('source_predicate') is None:
             edge_dict['source_predicate'] = edge_dict.pop('original_predicate')
         source_predicate_curie = edge_dict['source_predicate']
-        predicate_curie = source_predicate_curie
 
-        core_predicate_curie = None   # never reuse a core_predicate_curie from previous iteration through loop
-        
-        if record_of_source_predicate_curie_occurrences.get(source_predicate_curie, None) is not None:
-            record_of_source_predicate_curie_occurrences[source_predicate_curie] = True 
-            pred_remap_info = predicate_remap_config.get(source_predicate_curie, None)   
-        else:
-            # there is a original predicate CURIE in the graph that is not in the config file
-            source_predicate_curies_not_in_config.add(source_predicate_curie)
-            #print(f"Source predicate curie missing {source_predicate_curie}")
-            pred_remap_info = {'operation': 'keep'}
-        
-        assert pred_remap_info is not None, f"Edge {edge_dict} missing {pred_remap_info}"
-        
-        invert = False
-        get_new_rel_info = False
-
-        operation = pred_remap_info.get('operation', None)
+        remap_action = remap_actions.get(source_predicate_curie, None)
+        if remap_action is None:
+            remap_action = remap_table.get(source_predicate_curie, None)
+            if remap_action is not None:
+                record_of_source_predicate_curie_occurrences[source_predicate_curie] = True
+                if remap_action[1] is None and source_predicate_curie.startswith(kg2_util.CURIE_PREFIX_BIOLINK + ":"):
+                    remap_action = (remap_action[0], source_predicate_curie) + remap_action[2:]
+            else:
+                # there is a original predicate CURIE in the graph that is not in the config file
+                source_predicate_curies_not_in_config.add(source_predicate_curie)
+                remap_action = make_remap_action_for_unconfigured_predicate(source_predicate_curie)
+            remap_actions[source_predicate_curie] = remap_action
+
+        (operation, core_predicate_curie, qualified_predicate,
+         qualified_object_aspect, qualified_object_direction, edge_id_qualifiers) = remap_action
+
         if operation == "delete":
             continue
-        get_new_rel_info = True
         if operation == "invert":
-            invert = True
-        elif pred_remap_info.get("core_predicate") is None:
-            assert operation == "keep"
-            get_new_rel_info = False
-
-        qualified_predicate = None
-        qualified_object_aspect = None
-        qualified_object_direction = None
-
-        if get_new_rel_info:
-            assert pred_remap_info.get("core_predicate") is not None
-            core_predicate_curie = pred_remap_info.get("core_predicate")
-            qualified_predicate = pred_remap_info.get("qualified_predicate", None)
-            qualifiers = pred_remap_info.get("qualifiers", None)
-            if qualifiers is not None:
-                qualifiers_dict = qualifiers
-                qualified_object_aspect = qualifiers_dict.get("object_aspect", None)
-                qualified_object_direction = qualifiers_dict.get("object_direction", None)
-            if qualified_object_aspect is not None and qualified_object_direction is not None and \
-                    qualifiers is None:
-                assert qualified_predicate is not None, f"Qualifier but not qualified predicate {edge_dict}"
-        if invert:
             edge_dict['relation_label'] = 'INVERTED:' + source_predicate_label
             new_object = edge_dict['subject']
             edge_dict['subject'] = edge_dict['object']
             edge_dict['object'] = new_object
-        edge_dict["predicate_label"] = predicate_label
+        edge_dict["predicate_label"] = source_predicate_label
         if drop_self_edges_except is not None and \
                 edge_dict['subject'] == edge_dict['object'] and \
-                predicate_label not in drop_self_edges_except:
+                source_predicate_label not in drop_self_edges_except:
             continue
-        edge_dict['predicate'] = predicate_curie
+        edge_dict['predicate'] = core_predicate_curie
         edge_dict['qualified_predicate'] = qualified_predicate
         edge_dict['qualified_object_aspect'] = qualified_object_aspect
         edge_dict['qualified_object_direction'] = qualified_object_direction
-        if core_predicate_curie is None and predicate_curie.startswith(kg2_util.CURIE_PREFIX_BIOLINK + ":"):
-            core_predicate_curie = predicate_curie
-        edge_dict['predicate'] = core_predicate_curie
         edge_id = edge_dict["id"]
-        new_edge_id = update_edge_id(edge_id, qualified_predicate, qualified_object_aspect, qualified_object_direction)
+        new_edge_id = replace_edge_id_qualifiers(edge_id, edge_id_qualifiers)
+        if new_edge_id is None:
+            new_edge_id = update_edge_id(edge_id, qualified_predicate, qualified_object_aspect, qualified_object_direction)
         edge_dict["id"] = new_edge_id
 
-        if predicate_curie not in nodes:
-            predicate_curie_prefix = predicate_curie.split(':')[0]
-            predicate_uri_prefix = curie_to_uri_expander(predicate_curie_prefix + ':')
-            # Create list of curies to complain about if not in biolink
-            if predicate_uri_prefix == predicate_curie_prefix:
-                source_predicate_curies_not_in_nodes.add(predicate_curie)
+        # checked for the first edge with this source predicate CURIE that is
+        # written, i.e., that is not deleted or dropped as a self-edge
+        if source_predicate_curie not in source_predicate_curies_checked_in_nodes:
+            source_predicate_curies_checked_in_nodes.add(source_predicate_curie)
+            if source_predicate_curie not in nodes:
+                predicate_curie_prefix = source_predicate_curie.split(':')[0]
+                predicate_uri_prefix = curie_to_uri_expander(predicate_curie_prefix + ':')
+                # Create list of curies to complain about if not in biolink
+                if predicate_uri_prefix == predicate_curie_prefix:
+                    source_predicate_curies_not_in_nodes.add(source_predicate_curie)
+
         if edge_dict.get("primary_knowledge_source") is None:
-            #print(f"{edge_dict}")
             edge_dict["primary_knowledge_source"] = edge_dict.pop("knowledge_source")
         primary_knowledge_source = edge_dict["primary_knowledge_source"]
-        infores_curie_dict = infores_remap_config.get(primary_knowledge_source, None)
-        if infores_curie_dict is None:
+        infores_curie = knowledge_source_to_infores_curie.get(primary_knowledge_source, None)
+        if infores_curie is None:
             knowledge_source_curies_not_in_config_edges.add(primary_knowledge_source)
         else:
-            infores_curie = infores_curie_dict['infores_curie']
             edge_dict['primary_knowledge_source'] = infores_curie
 
-        edge_subject = edge_dict['subject'] 
-        edge_object = edge_dict['object']
-
-        edge_key = f"{edge_subject} /// {predicate_curie} /// {qualified_predicate} /// {qualified_object_aspect} /// {qualified_object_direction} /// {edge_object} /// {primary_knowledge_source}"
-
         edges_output.write(edge_dict)
 
-    kg2_util.end_read_jsonlines(edges_read_jsonlines_info)
-    print(f"Finished edges {kg2_util.date()}")
+    return (record_of_source_predicate_curie_occurrences,
+            source_predicate_curies_not_in_nodes,
+            source_predicate_curies_not_in_config,
+            knowledge_source_curies_not_in_config_edges)
 
-    # Warnings for issues that came up
+
+def warning_remap_edges_results(remap_edges_results: tuple):
+    (record_of_source_predicate_curie_occurrences,
+     source_predicate_curies_not_in_nodes,
+     source_predicate_curies_not_in_config,
+     knowledge_source_curies_not_in_config_edges) = remap_edges_results
     warning_record_of_source_predicate_curie_occurrences(record_of_source_predicate_curie_occurrences)
     warning_source_predicate_curies_not_in_nodes(source_predicate_curies_not_in_nodes)
     warning_source_predicate_curies_not_in_config(source_predicate_curies_not_in_config)
     warning_knowledge_source_curies_not_in_config_edges(knowledge_source_curies_not_in_config_edges)
 
 
+def union_remap_edges_results(remap_edges_results_list: list):
+    record_of_source_predicate_curie_occurrences = dict()
+    source_predicate_curies_not_in_nodes = set()
+    source_predicate_curies_not_in_config = set()
+    knowledge_source_curies_not_in_config_edges = set()
+    for remap_edges_results in remap_edges_results_list:
+        for source_predicate_curie, occurred in remap_edges_results[0].items():
+            record_of_source_predicate_curie_occurrences[source_predicate_curie] = \
+                record_of_source_predicate_curie_occurrences.get(source_predicate_curie, False) or occurred
+        source_predicate_curies_not_in_nodes |= remap_edges_results[1]
+        source_predicate_curies_not_in_config |= remap_edges_results[2]
+        knowledge_source_curies_not_in_config_edges |= remap_edges_results[3]
+    return (record_of_source_predicate_curie_occurrences,
+            source_predicate_curies_not_in_nodes,
+            source_predicate_curies_not_in_config,
+            knowledge_source_curies_not_in_config_edges)
+
+
+def process_edges(input_edges_file_name, infores_remap_config, predicate_remap_file_name, curies_to_uri_file_name, edges_output, drop_self_edges_except, nodes,
+                  drop_negated=False):
+    predicate_remap_config = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(predicate_remap_file_name))
+    map_dict = kg2_util.make_uri_curie_mappers(curies_to_uri_file_name)
+
+    curie_to_uri_expander = map_dict['expand']
+
+    edges_read_jsonlines_info = kg2_util.start_read_jsonlines(input_edges_file_name)
+    edges = edges_read_jsonlines_info[0]
+
+    print(f"Starting edges {kg2_util.date()}")
+    remap_edges_results = remap_edges(edges,
+                                      infores_remap_config,
+                                      predicate_remap_config,
+                                      curie_to_uri_expander,
+                                      edges_output,
+                                      drop_self_edges_except,
+                                      nodes,
+                                      drop_negated)
+
+    kg2_util.end_read_jsonlines(edges_read_jsonlines_info)
+    print(f"Finished edges {kg2_util.date()}")
+
+    # Warnings for issues that came up
+    warning_remap_edges_results(remap_edges_results)
+
+
+def remap_edges_byte_range(byte_range_args: tuple):
+    (input_edges_file_name, start, end, output_edges_file_name, test_mode) = byte_range_args
+    edges_info = kg2_util.create_single_jsonlines(test_mode)
+    remap_edges_results = remap_edges(kg2_util.read_jsonlines_byte_range(input_edges_file_name, start, end),
+                                      SHARED_REMAP_EDGES_ARGS[0],
+                                      SHARED_REMAP_EDGES_ARGS[1],
+                                      SHARED_REMAP_EDGES_ARGS[2],
+                                      edges_info[0],
+                                      *SHARED_REMAP_EDGES_ARGS[3:])
+    kg2_util.close_single_jsonlines(edges_info, output_edges_file_name)
+    return remap_edges_results
+
+
+def process_edges_in_parallel(input_edges_file_name, infores_remap_config, predicate_remap_file_name, curies_to_uri_file_name, drop_self_edges_except, nodes,
+                              drop_negated, test_mode, num_workers, output_dir):
+    # splits the input edges file into byte ranges that are remapped by
+    # num_workers worker processes; returns the names of the output edges
+    # files of the byte ranges, in the order of the byte ranges in the input
+    # file, so that their concatenation is the output of process_edges
+    global SHARED_REMAP_EDGES_ARGS
+    predicate_remap_config = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(predicate_remap_file_name))
+    map_dict = kg2_util.make_uri_curie_mappers(curies_to_uri_file_name)
+
+    curie_to_uri_expander = map_dict['expand']
+
+    # the workers are forked after this point, so they share the node IDs
+    SHARED_REMAP_EDGES_ARGS = (infores_remap_config, predicate_remap_config, curie_to_uri_expander,
+                               drop_self_edges_except, nodes, drop_negated)
+    byte_ranges = kg2_util.get_jsonlines_byte_ranges(input_edges_file_name, num_workers * EDGES_BYTE_RANGES_PER_WORKER)
+    output_edges_file_names = [os.path.join(output_dir, 'edges-' + str(range_index) + '.jsonl')
+                               for range_index in range(len(byte_ranges))]
+
+    print(f"Starting edges {kg2_util.date()}")
+    with multiprocessing.get_context('fork').Pool(num_workers) as pool:
+        remap_edges_results_list = pool.map(remap_edges_byte_range,
+                                            [(input_edges_file_name, start, end, output_edges_file_name, test_mode)
+                                             for (start, end), output_edges_file_name in zip(byte_ranges, output_edges_file_names)],
+                                            chunksize=1)
+    SHARED_REMAP_EDGES_ARGS = None
+    print(f"Finished edges {kg2_util.date()}")
+
+    # Warnings for issues that came up
+    warning_remap_edges_results(union_remap_edges_results(remap_edges_results_list))
+
+    return output_edges_file_names
+
+
 if __name__ == '__main__':
     args = make_arg_parser().parse_args()
     predicate_remap_file_name = args.predicateRemapYaml
@@ -307,10 +478,15 @@ if __name__ == '__main__':
     test_mode = args.test
     drop_negated = args.drop_negated
     drop_self_edges_except = args.drop_self_edges_except
+    num_workers = args.num_workers
+
+    if num_workers > 1 and input_edges_file_name.endswith(kg2_util.COMPRESSED_FILE_SUFFIXES):
+        # a compressed file cannot be split into byte ranges
+        print("the input edges file is compressed, so it will be processed by a single process", file=sys.stderr)
+        num_workers = 1
 
-    nodes_info, edges_info = kg2_util.create_kg2_jsonlines(test_mode)
+    nodes_info = kg2_util.create_single_jsonlines(test_mode)
     nodes_output = nodes_info[0]
-    edges_output = edges_info[0]
 
     infores_remap_config = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(infores_remap_file_name))
 
@@ -325,27 +501,22 @@ if __name__ == '__main__':
 
     nodes = process_nodes(input_nodes_file_name, infores_remap_config, nodes_output)
     
-    process_edges(input_edges_file_name, infores_remap_config, predicate_remap_file_name, curies_to_uri_file_name, edges_output, drop_self_edges_except, nodes)
+    if num_workers > 1:
+        edges_dir = tempfile.mkdtemp(prefix=kg2_util.TEMP_FILE_PREFIX + '-simplify-')
+        output_edges_file_names = process_edges_in_parallel(input_edges_file_name, infores_remap_config, predicate_remap_file_name, curies_to_uri_file_name,
+                                                            drop_self_edges_except, nodes, drop_negated, test_mode, num_workers, edges_dir)
+    else:
+        edges_info = kg2_util.create_single_jsonlines(test_mode)
+        edges_output = edges_info[0]
+        process_edges(input_edges_file_name, infores_remap_config, predicate_remap_file_name, curies_to_uri_file_name, edges_output, drop_self_edges_except, nodes,
+                      drop_negated)
     
-    update_date = datetime.now().strftime("%Y-%m-%d %H:%M")
-    version_file = open(args.versionFile, 'r')
-    build_name = str
-    # Add node to describe build
-    for line in version_file:
-        test_flag = ""
-        if test_mode:
-            test_flag = "-TEST"
-        build_name = "RTX-KG" + line.rstrip() + test_flag
-        break
-    build_node = kg2_util.make_node(kg2_util.CURIE_PREFIX_RTX + ':' + 'KG2',
-                                    kg2_util.BASE_URL_RTX + 'KG2',
-                                    build_name,
-                                    kg2_util.SOURCE_NODE_CATEGORY,
-                                    update_date,
-                                    kg2_util.CURIE_PREFIX_RTX + ':')
-    build_info = {'version': build_node['name'], 'timestamp_utc': build_node['update_date']}
-    pprint.pprint(build_info)
-    nodes_output.write(build_node)
+    nodes_output.write(make_build_node(args.versionFile, test_mode))
     print(f"Closing simplified file {kg2_util.date()}")
-    kg2_util.close_kg2_jsonlines(nodes_info, edges_info, output_nodes_file_name, output_edges_file_name)
+    kg2_util.close_single_jsonlines(nodes_info, output_nodes_file_name)
+    if num_workers > 1:
+        kg2_util.concatenate_files(output_edges_file_names, output_edges_file_name)
+        shutil.rmtree(edges_dir)
+    else:
+        kg2_util.close_single_jsonlines(edges_info, output_edges_file_name)
     print(f"Completed closing file {kg2_util.date()}")
@@ -40,14 +40,33 @@ BUILD_DIR=${17}
 simplified_report_file_base=${18}
 VENV_DIR=${19}
 previous_simplified_report_base="previous-${simplified_report_file_base}"
+## aws s3 rm takes the options of aws s3 cp, except for --no-progress
+s3_rm_cmd=`echo ${s3_cp_cmd} | sed 's/ cp / rm /; s/ --no-progress//'`
 
 echo "================= starting finish-snakemake.sh =================="
 date
 
 gzip -fk ${final_output_nodes_file_full}
 gzip -fk ${final_output_edges_file_full}
-tar -C ${kg2_tsv_dir} -czvf ${kg2_tsv_tarball} nodes.tsv nodes_header.tsv edges.tsv edges_header.tsv
-${s3_cp_cmd} ${kg2_tsv_tarball} s3://${s3_bucket}/
+kg2_tsv_bundle=`basename ${kg2_tsv_tarball} .tar.gz`
+if [[ -f ${kg2_tsv_dir}/edges.tsv ]]
+then
+    tar -C ${kg2_tsv_dir} -czvf ${kg2_tsv_tarball} nodes.tsv nodes_header.tsv edges.tsv edges_header.tsv
+    ${s3_cp_cmd} ${kg2_tsv_tarball} s3://${s3_bucket}/
+    # tsv-to-neo4j.sh loads the sharded TSV files if there is a manifest for
+    # them, so delete the shards (and manifest) of an older build
+    ${s3_rm_cmd} --recursive s3://${s3_bucket}/${kg2_tsv_bundle}/
+else
+    # The nodes and edges TSV files were written as gzip-compressed shards,
+    # which are uploaded as they are (in parallel), with a manifest listing
+    # them so that tsv-to-neo4j.sh does not pick up shards of an older build;
+    # the shards of an older build are deleted first, and the manifest is
+    # uploaded last
+    (cd ${kg2_tsv_dir} && ls nodes_header.tsv edges_header.tsv nodes_*.tsv.gz edges_*.tsv.gz) > ${kg2_tsv_dir}/manifest.txt
+    ${s3_rm_cmd} --recursive s3://${s3_bucket}/${kg2_tsv_bundle}/
+    ${s3_cp_cmd} --recursive ${kg2_tsv_dir} s3://${s3_bucket}/${kg2_tsv_bundle}/ --exclude manifest.txt
+    ${s3_cp_cmd} ${kg2_tsv_dir}/manifest.txt s3://${s3_bucket}/${kg2_tsv_bundle}/
+fi
 
 gzip -fk ${simplified_output_nodes_file_full}
 gzip -fk ${simplified_output_edges_file_full}
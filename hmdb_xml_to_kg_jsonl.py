@@ -2,15 +2,22 @@
 ''' hmdb_xml_to_kg_json.py: Extracts a KG2 JSON file from the
     HMDB metabolite download in XML format
 
-    Usage: hmdb_xml_to_kg_json.py [--test] <inputFile.xml>
-    <outputNodesFile.json> <outputEdgesFile.json>
+    Usage: hmdb_xml_to_kg_json.py [--test] [--numWorkers <N>]
+    <inputFile.xml[.zip]> <outputNodesFile.json> <outputEdgesFile.json>
+
+    The HMDB XML is streamed one <metabolite> element at a time; with
+    --numWorkers > 1, batches of metabolites are converted to nodes and edges
+    in a pool of worker processes, and the results are written in input order.
 '''
 
 import xmltodict
 import kg2_util
 import argparse
+import collections
 import datetime
-import os
+import multiprocessing
+import sys
+import time
 
 
 __author__ = 'Erica Wood'
@@ -30,6 +37,9 @@ HMDB_PROVIDED_BY_CURIE_ID = kg2_util.CURIE_PREFIX_IDENTIFIERS_ORG_REGISTRY \
 
 CURIE_PREFIX_HMDB = kg2_util.CURIE_PREFIX_HMDB
 
+METABOLITE_BATCH_SIZE = 100
+TEST_MODE_MAX_METABOLITES = 10000
+
 
 def get_args():
     arg_parser = argparse.ArgumentParser(description='hmdb_xml_to_kg_json.py: \
@@ -39,6 +49,12 @@ def get_args():
                             dest='test',
                             action="store_true",
                             default=False)
+    arg_parser.add_argument('--numWorkers',
+                            dest='num_workers',
+                            type=int,
+                            default=1,
+                            help='number of worker processes that convert '
+                                 'metabolites to nodes and edges')
     arg_parser.add_argument('inputFile', type=str)
     arg_parser.add_argument('outputNodesFile', type=str)
     arg_parser.add_argument('outputEdgesFile', type=str)
@@ -618,6 +634,103 @@ def make_property_edges(metabolite: dict, hmdb_id: str):
     return edges
 
 
+def convert_metabolites(metabolites: list):
+    # converts a batch of metabolites; returns the nodes and edges (in input
+    # order), the version of the last metabolite, and the conversion time
+    start_time = time.perf_counter()
+    nodes = []
+    edges = []
+    version = None
+    for metabolite in metabolites:
+        hmdb_id = metabolite["accession"]
+        version = float(metabolite['version'])
+        nodes.append(make_node(metabolite, hmdb_id))
+        edges += make_disease_edges(metabolite, hmdb_id)
+        edges += make_protein_edges(metabolite, hmdb_id)
+        edges += make_equivalencies(metabolite, hmdb_id)
+        edges += make_property_edges(metabolite, hmdb_id)
+    return nodes, edges, version, time.perf_counter() - start_time
+
+
+def convert_hmdb_file(input_file_name: str,
+                      nodes_output,
+                      edges_output,
+                      test_mode: bool,
+                      num_workers: int):
+    # The XML is parsed in this process; each batch of metabolites is either
+    # converted inline or submitted to the pool, and the pending results are
+    # collected in submission order, so the output order does not depend on
+    # the number of workers.  The number of pending batches is bounded so
+    # that memory use stays constant however far ahead the parser gets.
+    pool = None
+    if num_workers > 1:
+        pool = multiprocessing.get_context('fork').Pool(num_workers)
+    max_pending_batches = 2 * num_workers
+    pending_results = collections.deque()
+    batch = []
+    metabolite_count = 0
+    max_version = 0
+    convert_time = 0.0
+
+    def write_result(result):
+        nonlocal max_version, convert_time
+        nodes, edges, version, batch_convert_time = result
+        for node in nodes:
+            nodes_output.write(node)
+        for edge in edges:
+            edges_output.write(edge)
+        if version is not None:
+            max_version = version
+        convert_time += batch_convert_time
+
+    def submit_batch():
+        nonlocal batch
+        if pool is None:
+            write_result(convert_metabolites(batch))
+        else:
+            pending_results.append(pool.apply_async(convert_metabolites, (batch,)))
+            while len(pending_results) > max_pending_batches:
+                write_result(pending_results.popleft().get())
+        batch = []
+
+    def process_metabolite(path: list, metabolite: dict):
+        nonlocal metabolite_count
+        if path[-1][0] != 'metabolite':
+            return True
+        metabolite_count += 1
+        if metabolite_count >= TEST_MODE_MAX_METABOLITES and test_mode:
+            return False
+        batch.append(metabolite)
+        if len(batch) >= METABOLITE_BATCH_SIZE:
+            submit_batch()
+        return True
+
+    start_time = time.perf_counter()
+    xml_file = kg2_util.open_compressed_or_plain_file(input_file_name)
+    try:
+        xmltodict.parse(xml_file, item_depth=2, item_callback=process_metabolite)
+    except xmltodict.ParsingInterrupted:
+        pass
+    xml_file.close()
+    if len(batch) > 0:
+        submit_batch()
+    parse_end_time = time.perf_counter()
+    while len(pending_results) > 0:
+        write_result(pending_results.popleft().get())
+    end_time = time.perf_counter()
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    kg2_util.log_message("parsed and converted " + str(metabolite_count) + " metabolites in " +
+                         "{0:.1f}".format(end_time - start_time) + " s (parsing finished after " +
+                         "{0:.1f}".format(parse_end_time - start_time) + " s; conversion took " +
+                         "{0:.1f}".format(convert_time) + " s of CPU time in " + str(num_workers) +
+                         " worker(s))",
+                         output_stream=sys.stderr)
+    return max_version
+
+
 if __name__ == '__main__':
     print("Script starting at", kg2_util.date())
     args = get_args()
@@ -630,37 +743,15 @@ if __name__ == '__main__':
     nodes_output = nodes_info[0]
     edges_output = edges_info[0]
 
-    print("Starting load at", kg2_util.date())
-    xml_file = open(args.inputFile)
-    metabolite_data = xmltodict.parse(xml_file.read())
-    xml_file.close()
-
-    print("Finishing load at", kg2_util.date())
-    locations = {}
+    print("Starting parse and conversion at", kg2_util.date())
+    max_version = convert_hmdb_file(input_file_name,
+                                    nodes_output,
+                                    edges_output,
+                                    test_mode,
+                                    args.num_workers)
+    print("Finishing parse and conversion at", kg2_util.date())
 
-    metabolite_count = 0
-
-    for metabolite in metabolite_data["hmdb"]["metabolite"]:
-        max_version = 0
-        metabolite_count += 1
-        if metabolite_count >= 10000 and test_mode:
-            break
-        else:
-            hmdb_id = metabolite["accession"]
-            version = float(metabolite['version'])
-            if version > max_version:
-                max_version = version
-            nodes_output.write(make_node(metabolite, hmdb_id))
-            for edge in make_disease_edges(metabolite, hmdb_id):
-                edges_output.write(edge)
-            for edge in make_protein_edges(metabolite, hmdb_id):
-                edges_output.write(edge)
-            for edge in make_equivalencies(metabolite, hmdb_id):
-                edges_output.write(edge)
-            for edge in make_property_edges(metabolite, hmdb_id):
-                edges_output.write(edge)
-
-    file_update_date = kg2_util.convert_date(os.path.getmtime(args.inputFile))
+    file_update_date = kg2_util.convert_date(kg2_util.get_compressed_or_plain_file_mtime(args.inputFile))
     hmdb_kp_node = kg2_util.make_node(HMDB_PROVIDED_BY_CURIE_ID,
                                       HMDB_KB_IRI,
                                       "Human Metabolome Database v" + str(max_version),
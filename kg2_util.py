@@ -14,16 +14,20 @@ __maintainer__ = ''
 __email__ = ''
 __status__ = 'Prototype'
 
+import atexit
 import collections
 import copy
 import datetime
 import enum
+import functools
 import gzip
+import hashlib
 import html.parser
 import io
 import json
-import jsonlines
 import math
+import networkx
+import numpy
 import ontobio
 import os
 import pathlib
@@ -40,12 +44,38 @@ import time
 import typing
 import urllib.parse
 import urllib.request
-import validators
 import yaml
+import zipfile
 from typing import Dict, Optional
 from decimal import *
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 TEMP_FILE_PREFIX = 'kg2'
+SQL_FETCH_BATCH_SIZE = 10000
+CURIE_MAPPER_CACHE_SIZE = 1 << 20
+ONTOLOGY_CACHE_FORMAT_VERSION = 1
+ONTOLOGY_CACHE_FILE_SUFFIX = '.ontcache'
+ONTOLOGY_FRAGMENT_FILE_SUFFIX = '.ontfragment'
+ONTOLOGY_CACHE_MAX_SIZE_GB = 50
+FILE_HASH_CHUNK_SIZE = 1 << 20
+HTTP_URL_PREFIXES = ('http://', 'https://')
+LOG_SUMMARY_INTERVAL_SEC = 60.0
+LOG_SUMMARY_NUM_SAMPLES = 3
+JSONLINES_BACKEND_ENV_VAR = 'KG2_JSONLINES_BACKEND'
+JSONLINES_BACKEND_JSON = 'json'
+JSONLINES_BACKEND_ORJSON = 'orjson'
+JSONLINES_BUFFER_SIZE = 1 << 24
+COMPRESSED_FILE_SUFFIXES = ('.gz', '.zst')
+GZIP_COMPRESS_LEVEL = 6
 FIRST_CAP_RE = re.compile(r'(.)([A-Z][a-z]+)')
 ALL_CAP_RE = re.compile(r'([a-z0-9])([A-Z])')
 NCBI_TAXON_ID_HUMAN = 9606
@@ -335,27 +365,119 @@ def save_json(data, output_file_name: str, test_mode: bool = False):
     shutil.move(temp_output_file_name, output_file_name)
 
 
+def get_jsonlines_backend(backend: str = None):
+    if backend is None:
+        backend = os.environ.get(JSONLINES_BACKEND_ENV_VAR, None)
+    if backend is None:
+        backend = JSONLINES_BACKEND_ORJSON if orjson is not None else JSONLINES_BACKEND_JSON
+    assert backend in (JSONLINES_BACKEND_JSON, JSONLINES_BACKEND_ORJSON), \
+        "unknown " + JSONLINES_BACKEND_ENV_VAR + ": " + backend
+    if backend == JSONLINES_BACKEND_ORJSON and orjson is None:
+        raise ImportError("the orjson package is needed for the \"" + JSONLINES_BACKEND_ORJSON +
+                          "\" JSON Lines backend; install it (see requirements-kg2-build.txt), or set " +
+                          JSONLINES_BACKEND_ENV_VAR + " to \"" + JSONLINES_BACKEND_JSON + "\"")
+    return backend
+
+
+def get_zstandard(file_name: str):
+    # zstandard is an optional dependency, only needed for ".zst" files
+    if zstandard is None:
+        raise ImportError("the zstandard package is needed for the Zstandard-compressed file " + file_name +
+                          "; install it (see requirements-kg2-build.txt)")
+    return zstandard
+
+
+class JSONLinesWriter:
+    '''Writes records to a binary file in JSON Lines format, in place of a
+    jsonlines.Writer.  With the "json" backend, each record is encoded as
+    jsonlines.Writer encodes it (so the output is byte-for-byte the same);
+    with the "orjson" backend (the default, if orjson is installed), each
+    record is encoded by orjson, in compact form.  A record that orjson
+    cannot encode (e.g., one with an integer of more than 64 bits) is encoded
+    by the json module, also in compact form.
+    '''
+
+    def __init__(self, file, sort_keys: bool = False, backend: str = None):
+        self.file = file
+        self.backend = get_jsonlines_backend(backend)
+        self.sort_keys = sort_keys
+        if self.backend == JSONLINES_BACKEND_ORJSON:
+            self.orjson_option = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+            if sort_keys:
+                self.orjson_option |= orjson.OPT_SORT_KEYS
+            separators = (",", ":")
+        else:
+            separators = (", ", ": ")
+        self.json_encode = json.JSONEncoder(ensure_ascii=False,
+                                            separators=separators,
+                                            sort_keys=sort_keys).encode
+
+    def write(self, obj):
+        if self.backend == JSONLINES_BACKEND_ORJSON:
+            try:
+                self.file.write(orjson.dumps(obj, option=self.orjson_option))
+                return
+            except TypeError:
+                pass
+        self.file.write((self.json_encode(obj) + '\n').encode('utf-8'))
+
+    def close(self):
+        self.file.flush()
+
+
+class JSONLinesReader:
+    '''Reads records from an iterable of the lines (as bytes or str) of a
+    JSON Lines file, in place of a jsonlines.Reader; the lines are decoded
+    with orjson if the "orjson" backend is in use.
+    '''
+
+    def __init__(self, lines: typing.Iterable, backend: str = None):
+        self.lines = lines
+        self.backend = get_jsonlines_backend(backend)
+
+    def iter(self, type=None):
+        loads = orjson.loads if self.backend == JSONLINES_BACKEND_ORJSON else json.loads
+        for line in self.lines:
+            try:
+                record = loads(line)
+            except ValueError:
+                # orjson does not decode integers of more than 64 bits
+                record = json.loads(line)
+            if type is not None and not isinstance(record, type):
+                raise ValueError("JSON Lines record is not of type " + type.__name__ + ": " + str(record))
+            yield record
+
+    def close(self):
+        if hasattr(self.lines, 'close'):
+            self.lines.close()
+
+
 def create_single_jsonlines(test_mode: bool = False):
     sort_keys = not test_mode
 
     temp_output_file_name = tempfile.mkstemp(prefix='kg2-')[1]
 
-    temp_output_file = open(temp_output_file_name, 'w')
+    temp_output_file = open(temp_output_file_name, 'wb', buffering=JSONLINES_BUFFER_SIZE)
 
-    temp_output_jsonlines = jsonlines.Writer(temp_output_file, sort_keys=sort_keys)
+    temp_output_jsonlines = JSONLinesWriter(temp_output_file, sort_keys=sort_keys)
 
     return (temp_output_jsonlines, temp_output_file, temp_output_file_name)
 
 
 def close_single_jsonlines(info: tuple, output_file_name: str):
+    # the output file is compressed if its name ends in ".gz" or ".zst"
     (temp_output_jsonlines, temp_output_file, temp_output_file_name) = info
 
-    shutil.move(temp_output_file_name, output_file_name)
-
     temp_output_jsonlines.close()
 
     temp_output_file.close()
 
+    if output_file_name.endswith(COMPRESSED_FILE_SUFFIXES):
+        compress_file(temp_output_file_name, output_file_name)
+        os.remove(temp_output_file_name)
+    else:
+        shutil.move(temp_output_file_name, output_file_name)
+
 
 def create_kg2_jsonlines(test_mode: bool = False):
     return create_single_jsonlines(test_mode), create_single_jsonlines(test_mode)
@@ -368,8 +490,9 @@ def close_kg2_jsonlines(nodes_info: tuple, edges_info: tuple,
 
 
 def start_read_jsonlines(file_name: str, type=dict):
-    file = open(file_name, 'r')
-    jsonlines_reader = jsonlines.Reader(file)
+    # a ".gz" or ".zst" file is decompressed on the fly
+    file = open_compressed_or_plain_file(file_name)
+    jsonlines_reader = JSONLinesReader(file)
     return (jsonlines_reader.iter(type=type), jsonlines_reader, file)
 
 def end_read_jsonlines(read_jsonlines_info):
@@ -378,10 +501,141 @@ def end_read_jsonlines(read_jsonlines_info):
     jsonlines_reader.close()
 
 
+def compress_file(input_file_name: str, output_file_name: str):
+    # compresses a file with gzip or (for a ".zst" output file) zstandard
+    with open(input_file_name, 'rb') as input_file:
+        if output_file_name.endswith('.zst'):
+            with open(output_file_name, 'wb') as output_file:
+                get_zstandard(output_file_name).ZstdCompressor(threads=-1).copy_stream(input_file, output_file,
+                                                                 write_size=JSONLINES_BUFFER_SIZE)
+        else:
+            with gzip.open(output_file_name, 'wb', compresslevel=GZIP_COMPRESS_LEVEL) as output_file:
+                shutil.copyfileobj(input_file, output_file, JSONLINES_BUFFER_SIZE)
+
+
+def get_jsonlines_byte_ranges(file_name: str, num_ranges: int):
+    # splits a JSON Lines file into (at most) num_ranges (start, end) byte
+    # ranges of about the same size, each of which begins at the start of a
+    # line and ends just after a newline (or at the end of the file)
+    file_size = os.path.getsize(file_name)
+    boundaries = [0]
+    with open(file_name, 'rb') as file:
+        for range_index in range(1, num_ranges):
+            offset = (file_size * range_index) // num_ranges
+            if offset <= boundaries[-1]:
+                continue
+            file.seek(offset - 1)
+            file.readline()
+            boundaries.append(file.tell())
+    boundaries.append(file_size)
+    return [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start]
+
+
+def read_jsonlines_byte_range(file_name: str, start: int, end: int, type=dict):
+    # yields the records of a JSON Lines file that are in a byte range from
+    # get_jsonlines_byte_ranges
+    def read_lines(file):
+        file.seek(start)
+        position = start
+        while position < end:
+            line = file.readline()
+            if line == b'':
+                break
+            position += len(line)
+            yield line
+    with open(file_name, 'rb', buffering=JSONLINES_BUFFER_SIZE) as file:
+        jsonlines_reader = JSONLinesReader(read_lines(file))
+        yield from jsonlines_reader.iter(type=type)
+        jsonlines_reader.close()
+
+
+def concatenate_files(input_file_names: list, output_file_name: str):
+    # the output file is compressed if its name ends in ".gz" or ".zst", as
+    # in close_single_jsonlines
+    temp_output_file_name = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX + '-')[1]
+    with open(temp_output_file_name, 'wb') as output_file:
+        for input_file_name in input_file_names:
+            with open(input_file_name, 'rb') as input_file:
+                shutil.copyfileobj(input_file, output_file, 1 << 24)
+    if output_file_name.endswith(COMPRESSED_FILE_SUFFIXES):
+        compress_file(temp_output_file_name, output_file_name)
+        os.remove(temp_output_file_name)
+    else:
+        shutil.move(temp_output_file_name, output_file_name)
+
+
+def stream_sql_results(connection, sql: str, batch_size: int = SQL_FETCH_BATCH_SIZE):
+    # runs a query on a pymysql connection using an unbuffered (server-side)
+    # cursor, and yields the result rows as they are fetched from the server
+    # in batches of batch_size, so the result set is never held in client
+    # memory in its entirety; no other query can be run on the connection
+    # until the generator is exhausted or closed.  An error from the server
+    # is raised where it happens, which can be after some rows have been
+    # yielded (unlike with fetchall, which gives either all rows or none)
+    import pymysql.cursors
+    with connection.cursor(pymysql.cursors.SSCursor) as cursor:
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if len(rows) == 0:
+                break
+            yield from rows
+
+
+class ZipFileMemberReader(io.BufferedReader):
+    '''Reads a member of a zip file, and closes the zip file when it is closed
+    (closing only the member's stream would leave the zip file open).
+    '''
+
+    def __init__(self, zip_file: zipfile.ZipFile, member_name: str):
+        self.zip_file = zip_file
+        super().__init__(zip_file.open(member_name, 'r'), JSONLINES_BUFFER_SIZE)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.zip_file.close()
+
+
+def get_zip_file_first_member(zip_file: zipfile.ZipFile):
+    return [info for info in zip_file.infolist() if not info.is_dir()][0]
+
+
+def open_compressed_or_plain_file(file_name: str):
+    # opens a file for binary reading; a ".gz" or ".zst" file is decompressed
+    # on the fly, as is the (first) member of a ".zip" file
+    if file_name.endswith('.gz'):
+        return io.BufferedReader(gzip.open(file_name, 'rb'), JSONLINES_BUFFER_SIZE)
+    if file_name.endswith('.zst'):
+        return io.BufferedReader(get_zstandard(file_name).ZstdDecompressor().stream_reader(open(file_name, 'rb'),
+                                                                                           read_across_frames=True),
+                                 JSONLINES_BUFFER_SIZE)
+    if file_name.endswith('.zip'):
+        zip_file = zipfile.ZipFile(file_name)
+        try:
+            return ZipFileMemberReader(zip_file, get_zip_file_first_member(zip_file).filename)
+        except BaseException:
+            zip_file.close()
+            raise
+    return open(file_name, 'rb', buffering=JSONLINES_BUFFER_SIZE)
+
+
 def get_file_last_modified_timestamp(file_name: str):
     return time.gmtime(os.path.getmtime(file_name))
 
 
+def get_compressed_or_plain_file_mtime(file_name: str):
+    # the modification time (in seconds since the epoch) of the file that
+    # open_compressed_or_plain_file reads; for a ".zip" file, that is the
+    # (local) time stamp of its first member, which unzip would give the
+    # extracted file, rather than the time that the archive was downloaded
+    if file_name.endswith('.zip'):
+        with zipfile.ZipFile(file_name) as zip_file:
+            return time.mktime(get_zip_file_first_member(zip_file).date_time + (0, 0, -1))
+    return os.path.getmtime(file_name)
+
+
 def read_file_to_string(local_file_name: str):
     with open(local_file_name, 'r') as myfile:
         file_contents_string = myfile.read()
@@ -522,19 +776,90 @@ def get_biolink_categories_ontology_depths(biolink_ontology: ontobio.ontol.Ontol
     return ret_depths
 
 
+class CURIEMapper:
+    '''Shortens IRIs to CURIE IDs and expands CURIE IDs to IRIs, giving the
+    same results as shorten_iri_to_curie and expand_curie_to_iri (which call
+    prefixcommons, and so scan the whole list of prefixes on every call).
+    The IRI prefixes of the contraction map are stored in a character trie,
+    so that all of the IRI prefixes of a given IRI are found in a single walk
+    along the IRI; the expansion map is flattened into a dict; and the
+    results of both methods are held in an LRU cache.
+    '''
+
+    def __init__(self, expand_map: list, contract_map: list,
+                 cache_size: int = CURIE_MAPPER_CACHE_SIZE):
+        # as in prefixcommons.expand_uri, the first map with the prefix wins
+        self.prefix_to_iri_prefix = dict()
+        for prefix_map in expand_map:
+            for prefix, iri_prefix in prefix_map.items():
+                self.prefix_to_iri_prefix.setdefault(prefix, iri_prefix)
+        # each trie node is a dict keyed by the next character; under the
+        # key None, it lists the (IRI prefix, CURIE prefix) pairs whose IRI
+        # prefix ends at that node
+        self.iri_prefix_trie = dict()
+        for prefix_map in contract_map:
+            for prefix, iri_prefix in prefix_map.items():
+                if isinstance(iri_prefix, str):
+                    trie_node = self.iri_prefix_trie
+                    for char in iri_prefix:
+                        trie_node = trie_node.setdefault(char, dict())
+                    trie_node.setdefault(None, []).append((iri_prefix, prefix))
+        self.shorten_iri_to_curie = functools.lru_cache(maxsize=cache_size)(self.shorten_iri_to_curie_uncached)
+        self.expand_curie_to_iri = functools.lru_cache(maxsize=cache_size)(self.expand_curie_to_iri_uncached)
+
+    def contract_uri(self, iri: str) -> list:
+        # same result as prefixcommons.contract_uri(iri, contract_map)
+        trie_node = self.iri_prefix_trie
+        matches = list(trie_node.get(None, ()))
+        for char in iri:
+            trie_node = trie_node.get(char, None)
+            if trie_node is None:
+                break
+            if None in trie_node:
+                matches += trie_node[None]
+        curies = list({iri.replace(iri_prefix, prefix + ':') for (iri_prefix, prefix) in matches})
+        if len(curies) > 1:
+            min_len = min(len(curie) for curie in curies)
+            curies = [curie for curie in curies if len(curie) == min_len]
+        return curies
+
+    def shorten_iri_to_curie_uncached(self, iri: str) -> Optional[str]:
+        if iri is None:
+            raise ValueError('cannot shorten an IRI with value None')
+        curie_list = self.contract_uri(iri)
+        if len(curie_list) == 0:
+            return None
+        assert len(curie_list) == 1, \
+            "somehow got a list after calling contract_uri: " + \
+            iri + "; list is: " + str(curie_list)
+        return curie_list[0]
+
+    def expand_curie_to_iri_uncached(self, curie_id: str) -> Optional[str]:
+        if curie_id.startswith('UMLS:CN'):
+            curie_id = curie_id.replace('UMLS:CN', 'medgen:CN')  # see GitHub issue 810
+        if ':' not in curie_id:
+            return None
+        [prefix, local_id] = curie_id.split(':', 1)
+        if prefix not in self.prefix_to_iri_prefix:
+            return None
+        iri = self.prefix_to_iri_prefix[prefix] + local_id
+        if iri == curie_id:
+            iri = None
+        return iri
+
+
 def make_uri_curie_mappers(curies_to_uri_file_name: str) -> Dict[str, callable]:
     yaml_string = read_file_to_string(curies_to_uri_file_name)
     expand_map = make_curies_to_uri_map(yaml_string, IDMapperType.EXPAND)
     contract_map = make_curies_to_uri_map(yaml_string, IDMapperType.CONTRACT)
-    expander = make_curie_to_uri_expander(expand_map)
-    contracter = make_uri_to_curie_shortener(contract_map)
-    return {'expand': expander, 'contract': contracter}
+    curie_mapper = CURIEMapper(expand_map, contract_map)
+    return {'expand': curie_mapper.expand_curie_to_iri,
+            'contract': curie_mapper.shorten_iri_to_curie}
 
 
-def log_message(message: str,
-                ontology_name: str = None,
-                node_curie_id: str = None,
-                output_stream=sys.stdout):
+def format_log_message(message: str,
+                       ontology_name: str = None,
+                       node_curie_id: str = None):
     if node_curie_id is not None:
         node_str = ": " + node_curie_id
     else:
@@ -543,7 +868,245 @@ def log_message(message: str,
         ont_str = '[' + ontology_name + '] '
     else:
         ont_str = ''
-    print(ont_str + message + node_str, file=output_stream)
+    return ont_str + message + node_str
+
+
+class LogSink:
+    '''Aggregates the messages passed to log_message, so that a message that
+    recurs for many nodes (e.g., "could not shorten this IRI to a CURIE") is
+    printed only the first time it is logged.  After that, each recurrence is
+    counted under its (ontology name, message template) key, keeping a few
+    sample node IDs (or messages); every summary_interval seconds, and when
+    the sink is closed, a summary line is printed for each key that recurred
+    since the last summary.  If detail_file_name is given, every message is
+    also written in full to that gzip-compressed file.  Messages logged from a
+    forked child process (e.g., a multiprocessing worker) are printed
+    directly, since the child's copy of the sink would never be flushed.
+    '''
+
+    def __init__(self, summary_interval: float = LOG_SUMMARY_INTERVAL_SEC,
+                 detail_file_name: str = None,
+                 num_samples: int = LOG_SUMMARY_NUM_SAMPLES):
+        self.pid = os.getpid()
+        self.summary_interval = summary_interval
+        self.num_samples = num_samples
+        self.seen_keys = set()
+        # for each key that recurred since the last summary: [output stream,
+        # count, samples]
+        self.recurrences = dict()
+        self.next_summary_time = time.monotonic() + summary_interval
+        if detail_file_name is not None:
+            self.detail_file = gzip.open(detail_file_name, 'wt', encoding='utf-8')
+        else:
+            self.detail_file = None
+
+    def log(self, message: str, ontology_name: str, node_curie_id: str,
+            output_stream, template: str):
+        if os.getpid() != self.pid:
+            print(format_log_message(message, ontology_name, node_curie_id), file=output_stream)
+            return
+        if self.detail_file is not None:
+            print(format_log_message(message, ontology_name, node_curie_id), file=self.detail_file)
+        key = (ontology_name, template)
+        if key not in self.seen_keys:
+            self.seen_keys.add(key)
+            print(format_log_message(message, ontology_name, node_curie_id), file=output_stream)
+        else:
+            recurrence = self.recurrences.get(key, None)
+            if recurrence is None:
+                recurrence = [output_stream, 0, []]
+                self.recurrences[key] = recurrence
+            recurrence[1] += 1
+            if len(recurrence[2]) < self.num_samples:
+                recurrence[2].append(node_curie_id if node_curie_id is not None else message)
+        if time.monotonic() >= self.next_summary_time:
+            self.flush()
+
+    def flush(self):
+        if os.getpid() != self.pid:
+            return
+        for (ontology_name, template), (output_stream, count, samples) in self.recurrences.items():
+            print(format_log_message(template + " [repeated " + str(count) + " more times, e.g.: " +
+                                     '; '.join(samples) + "]", ontology_name),
+                  file=output_stream)
+            output_stream.flush()
+        self.recurrences = dict()
+        self.next_summary_time = time.monotonic() + self.summary_interval
+
+    def close(self):
+        if os.getpid() != self.pid:
+            return
+        self.flush()
+        if self.detail_file is not None:
+            self.detail_file.close()
+            self.detail_file = None
+
+
+log_sink = None
+
+
+def start_log_sink(summary_interval: float = LOG_SUMMARY_INTERVAL_SEC,
+                   detail_file_name: str = None):
+    global log_sink
+    if log_sink is not None:
+        log_sink.close()
+    log_sink = LogSink(summary_interval, detail_file_name)
+    atexit.register(log_sink.close)
+    return log_sink
+
+
+def log_message(message: str,
+                ontology_name: str = None,
+                node_curie_id: str = None,
+                output_stream=sys.stdout,
+                template: str = None):
+    # "template" is the part of the message that does not vary from one
+    # occurrence to the next, which the log sink (if one has been started
+    # with start_log_sink) uses to aggregate recurring messages
+    if log_sink is not None:
+        log_sink.log(message, ontology_name, node_curie_id, output_stream,
+                     template if template is not None else message)
+    else:
+        print(format_log_message(message, ontology_name, node_curie_id), file=output_stream)
+
+
+@functools.lru_cache(maxsize=None)
+def get_biolink_depth_of_category(category: str, biolink_depth_getter: callable):
+    return biolink_depth_getter(category)
+
+
+@functools.lru_cache(maxsize=None)
+def get_biolink_depth_of_category_label(category_label: str, biolink_depth_getter: callable):
+    return biolink_depth_getter(CURIE_PREFIX_BIOLINK + ':' + convert_snake_case_to_camel_case(category_label, uppercase_first_letter=True))
+
+
+def merge_values(ret_dict: dict, key: str, value, stored_value,
+                 x: dict, y: dict, biolink_depth_getter: callable = None):
+    # merges "value" (from dict y) into the value "stored_value" that
+    # ret_dict (the merge of dict x and the keys of y seen so far) has for
+    # "key"; only called if both values are non-None and are not equal
+    if type(value) == str and type(stored_value) == str:
+        if value.lower() != stored_value.lower():
+            if key == 'update_date':
+                # Use the longer of the two update-date fields
+                #   NOTE: this is not ideal; better to have actual
+                #         dates (and not strings) so we can use the
+                #         most recent date (see issue #980)
+                if len(value) > len(stored_value):
+                    ret_dict[key] = value
+            elif key == 'description':
+                ret_dict[key] = stored_value + '; ' + value
+            elif key == 'ontology node type':
+                log_message("warning:  for key: " + key + ", dropping second value: " + value + '; keeping first value: ' + stored_value,
+                            output_stream=sys.stderr,
+                            template="warning:  for key: " + key + ", dropping second value")
+                ret_dict[key] = stored_value
+            elif key == 'provided_by':
+                if value.endswith('/STY'):
+                    ret_dict[key] = value
+            elif key == 'category_label':
+                if biolink_depth_getter is not None:
+                    depth_x = get_biolink_depth_of_category_label(stored_value, biolink_depth_getter)
+                    depth_y = get_biolink_depth_of_category_label(value, biolink_depth_getter)
+                    if depth_y is not None:
+                        if depth_x is not None:
+                            if depth_y > depth_x:
+                                ret_dict[key] = value
+                        else:
+                            ret_dict[key] = value
+                else:
+                    if 'named_thing' != value:
+                        if stored_value == 'named_thing':
+                            ret_dict[key] = value
+                        else:
+                            log_message(message="inconsistent category_label information; keeping original category_label " + stored_value +
+                                        " and discarding new category_label " + value,
+                                        ontology_name=str(x.get('provided_by', 'provided_by=UNKNOWN')),
+                                        node_curie_id=x.get('id', 'id=UNKNOWN'),
+                                        output_stream=sys.stderr,
+                                        template="inconsistent category_label information")
+                    return
+            elif key == 'category':
+                if biolink_depth_getter is not None:
+                    depth_x = get_biolink_depth_of_category(stored_value, biolink_depth_getter)
+                    depth_y = get_biolink_depth_of_category(value, biolink_depth_getter)
+                    if depth_y is not None:
+                        if depth_x is not None:
+                            if depth_y > depth_x:
+                                ret_dict[key] = value
+                        else:
+                            ret_dict[key] = value
+                else:
+                    if not value.endswith('NamedThing'):
+                        if stored_value.endswith('NamedThing'):
+                            ret_dict[key] = value
+                        else:
+                            log_message(message="inconsistent category information; keeping original category " + stored_value +
+                                        " and discarding new category " + value,
+                                        ontology_name=str(x.get('provided_by', 'provided_by=UNKNOWN')),
+                                        node_curie_id=x.get('id', 'id=UNKNOWN'),
+                                        output_stream=sys.stderr,
+                                        template="inconsistent category information")
+                    return
+            elif key == 'name' or key == 'full_name':
+                if value.replace(' ', '_') != stored_value.replace(' ', '_'):
+                    stored_desc = ret_dict.get('description', None)
+                    new_desc = y.get('description', None)
+                    stored_provided_by =  ret_dict.get('provided_by', None)
+                    new_provided_by = ret_dict.get('provided_by', None)
+                    if stored_provided_by == CURIE_ID_UMLS_SOURCE_CUI:
+                        ret_dict[key] = stored_value
+                    elif new_provided_by == CURIE_ID_UMLS_SOURCE_CUI:
+                        ret_dict[key] = value
+                        log_message(message='Warning: for ' + x.get('id', 'id=UNKNOWN') + ' original name of ' + stored_value +
+                                    ' is being overwriten to ' + value,
+                                    output_stream=sys.stderr,
+                                    template='Warning: original name is being overwritten')
+                    elif stored_desc is not None and new_desc is not None:
+                        if len(new_desc) > len(stored_desc):
+                            ret_dict[key] = value
+                        log_message(message='Warning: for ' + x.get('id', 'id=UNKNOWN') + ' original name of ' + stored_value +
+                                    ' is being overwriten to ' + value,
+                                    output_stream=sys.stderr,
+                                    template='Warning: original name is being overwritten')
+                    elif new_desc is not None:
+                        ret_dict[key] = value
+                        log_message(message='Warning: for ' + x.get('id', 'id=UNKNOWN') + ' original name of ' + stored_value +
+                                    ' is being overwritten to ' + value,
+                                    output_stream=sys.stderr,
+                                    template='Warning: original name is being overwritten')
+            elif key == 'has_biological_sequence':
+                if stored_value is None and value is not None:
+                    ret_dict[key] = value
+            else:
+                log_message("warning:  for key: " + key + ", dropping second value: " + value + '; keeping first value: ' + stored_value,
+                            output_stream=sys.stderr,
+                            template="warning:  for key: " + key + ", dropping second value")
+    elif type(value) == list and type(stored_value) == list:
+        if key != 'synonym':
+            ret_dict[key] = sorted(list(set(value + stored_value)))
+        else:
+            if len(stored_value) > 0:
+                first_element = {stored_value[0]}
+            elif len(value) > 0 and len(stored_value) == 0:
+                first_element = {value[0]}
+            else:
+                first_element = set()
+            ret_dict[key] = list(first_element) + sorted(filter(None, list(set(value + stored_value) - first_element)))
+    elif type(value) == list and type(stored_value) == str:
+        ret_dict[key] = sorted(list(set(value + [stored_value])))
+    elif type(value) == str and type(stored_value) == list:
+        ret_dict[key] = sorted(list(set([value] + stored_value)))
+    elif type(value) == dict and type(stored_value) == dict:
+        ret_dict[key] = merge_two_dicts(value, stored_value, biolink_depth_getter)
+    elif key == 'deprecated' and type(value) == bool:
+        ret_dict[key] = True  # special case for deprecation; True always trumps False for this property
+    else:
+        log_message(message="invalid type for key: " + key,
+                    ontology_name=str(x.get('provided_by', 'provided_by=UNKNOWN')),
+                    node_curie_id=x.get('id', 'id=UNKNOWN'),
+                    output_stream=sys.stderr)
+        assert False
 
 
 def merge_two_dicts(x: dict, y: dict, biolink_depth_getter: callable = None):
@@ -555,124 +1118,78 @@ def merge_two_dicts(x: dict, y: dict, biolink_depth_getter: callable = None):
                 ret_dict[key] = value
         else:
             if value is not None and value != stored_value:
-                if type(value) == str and type(stored_value) == str:
-                    if value.lower() != stored_value.lower():
-                        if key == 'update_date':
-                            # Use the longer of the two update-date fields
-                            #   NOTE: this is not ideal; better to have actual
-                            #         dates (and not strings) so we can use the
-                            #         most recent date (see issue #980)
-                            if len(value) > len(stored_value):
-                                ret_dict[key] = value
-                        elif key == 'description':
-                            ret_dict[key] = stored_value + '; ' + value
-                        elif key == 'ontology node type':
-                            log_message("warning:  for key: " + key + ", dropping second value: " + value + '; keeping first value: ' + stored_value,
-                                        output_stream=sys.stderr)
-                            ret_dict[key] = stored_value
-                        elif key == 'provided_by':
-                            if value.endswith('/STY'):
-                                ret_dict[key] = value
-                        elif key == 'category_label':
-                            if biolink_depth_getter is not None:
-                                depth_x = biolink_depth_getter(CURIE_PREFIX_BIOLINK + ':' + convert_snake_case_to_camel_case(stored_value, uppercase_first_letter=True))
-                                depth_y = biolink_depth_getter(CURIE_PREFIX_BIOLINK + ':' + convert_snake_case_to_camel_case(value, uppercase_first_letter=True))
-                                if depth_y is not None:
-                                    if depth_x is not None:
-                                        if depth_y > depth_x:
-                                            ret_dict[key] = value
-                                    else:
-                                        ret_dict[key] = value
-                            else:
-                                if 'named_thing' != value:
-                                    if stored_value == 'named_thing':
-                                        ret_dict[key] = value
-                                    else:
-                                        log_message(message="inconsistent category_label information; keeping original category_label " + stored_value +
-                                                    " and discarding new category_label " + value,
-                                                    ontology_name=str(x.get('provided_by', 'provided_by=UNKNOWN')),
-                                                    node_curie_id=x.get('id', 'id=UNKNOWN'),
-                                                    output_stream=sys.stderr)
-                                continue
-                        elif key == 'category':
-                            if biolink_depth_getter is not None:
-                                depth_x = biolink_depth_getter(stored_value)
-                                depth_y = biolink_depth_getter(value)
-                                if depth_y is not None:
-                                    if depth_x is not None:
-                                        if depth_y > depth_x:
-                                            ret_dict[key] = value
-                                    else:
-                                        ret_dict[key] = value
-                            else:
-                                if not value.endswith('NamedThing'):
-                                    if stored_value.endswith('NamedThing'):
-                                        ret_dict[key] = value
-                                    else:
-                                        log_message(message="inconsistent category information; keeping original category " + stored_value +
-                                                    " and discarding new category " + value,
-                                                    ontology_name=str(x.get('provided_by', 'provided_by=UNKNOWN')),
-                                                    node_curie_id=x.get('id', 'id=UNKNOWN'),
-                                                    output_stream=sys.stderr)
-                                continue
-                        elif key == 'name' or key == 'full_name':
-                            if value.replace(' ', '_') != stored_value.replace(' ', '_'):
-                                stored_desc = ret_dict.get('description', None)
-                                new_desc = y.get('description', None)
-                                stored_provided_by =  ret_dict.get('provided_by', None)
-                                new_provided_by = ret_dict.get('provided_by', None)
-                                if stored_provided_by == CURIE_ID_UMLS_SOURCE_CUI:
-                                    ret_dict[key] = stored_value
-                                elif new_provided_by == CURIE_ID_UMLS_SOURCE_CUI:
-                                    ret_dict[key] = value
-                                    log_message(message='Warning: for ' + x.get('id', 'id=UNKNOWN') + ' original name of ' + stored_value +
-                                                ' is being overwriten to ' + value,
-                                                output_stream=sys.stderr)
-                                elif stored_desc is not None and new_desc is not None:
-                                    if len(new_desc) > len(stored_desc):
-                                        ret_dict[key] = value
-                                    log_message(message='Warning: for ' + x.get('id', 'id=UNKNOWN') + ' original name of ' + stored_value +
-                                                ' is being overwriten to ' + value,
-                                                output_stream=sys.stderr)
-                                elif new_desc is not None:
-                                    ret_dict[key] = value
-                                    log_message(message='Warning: for ' + x.get('id', 'id=UNKNOWN') + ' original name of ' + stored_value +
-                                                ' is being overwritten to ' + value,
-                                                output_stream=sys.stderr)
-                        elif key == 'has_biological_sequence':
-                            if stored_value is None and value is not None:
-                                ret_dict[key] = value
-                        else:
-                            log_message("warning:  for key: " + key + ", dropping second value: " + value + '; keeping first value: ' + stored_value,
-                                        output_stream=sys.stderr)
-                elif type(value) == list and type(stored_value) == list:
-                    if key != 'synonym':
-                        ret_dict[key] = sorted(list(set(value + stored_value)))
-                    else:
-                        if len(stored_value) > 0:
-                            first_element = {stored_value[0]}
-                        elif len(value) > 0 and len(stored_value) == 0:
-                            first_element = {value[0]}
-                        else:
-                            first_element = set()
-                        ret_dict[key] = list(first_element) + sorted(filter(None, list(set(value + stored_value) - first_element)))
-                elif type(value) == list and type(stored_value) == str:
-                    ret_dict[key] = sorted(list(set(value + [stored_value])))
-                elif type(value) == str and type(stored_value) == list:
-                    ret_dict[key] = sorted(list(set([value] + stored_value)))
-                elif type(value) == dict and type(stored_value) == dict:
-                    ret_dict[key] = merge_two_dicts(value, stored_value, biolink_depth_getter)
-                elif key == 'deprecated' and type(value) == bool:
-                    ret_dict[key] = True  # special case for deprecation; True always trumps False for this property
-                else:
-                    log_message(message="invalid type for key: " + key,
-                                ontology_name=str(x.get('provided_by', 'provided_by=UNKNOWN')),
-                                node_curie_id=x.get('id', 'id=UNKNOWN'),
-                                output_stream=sys.stderr)
-                    assert False
+                merge_values(ret_dict, key, value, stored_value, x, y, biolink_depth_getter)
     return ret_dict
 
 
+class ListMergeAccumulator:
+    '''Holds the union of the list values for one key of a dict that is being
+    merged by merge_two_dicts_in_place(), as an insertion-ordered set, so that
+    the union is only sorted once (by to_list()) rather than on every merge.
+    For the 'synonym' key, the first synonym is kept in first place, as
+    merge_two_dicts() does.
+    '''
+
+    __slots__ = ('first', 'items')
+
+    def __init__(self, key: str, stored_value: list, value: list):
+        if key != 'synonym':
+            self.first = None
+        elif len(stored_value) > 0:
+            self.first = (stored_value[0],)
+        elif len(value) > 0:
+            self.first = (value[0],)
+        else:
+            self.first = ()
+        self.items = dict.fromkeys(stored_value)
+        self.add(value)
+
+    def add(self, value: list):
+        self.items.update(dict.fromkeys(value))
+
+    def to_list(self):
+        if self.first is None:
+            return sorted(self.items)
+        return list(self.first) + sorted(filter(None, (item for item in self.items if item not in self.first)))
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+
+def merge_two_dicts_in_place(x: dict, y: dict, biolink_depth_getter: callable = None):
+    '''Merges y into x, with the same per-key rules as merge_two_dicts(), but
+    without copying x, and by accumulating merged list values in
+    ListMergeAccumulator objects. The caller must own both x and y, and must
+    call finish_merged_dict() on x before using the merged dict.
+    '''
+    for key, value in y.items():
+        stored_value = x.get(key, None)
+        if stored_value is None:
+            if value is not None:
+                x[key] = value
+        elif type(stored_value) == ListMergeAccumulator:
+            if type(value) == list:
+                stored_value.add(value)
+            elif value is not None:
+                stored_value = stored_value.to_list()
+                x[key] = stored_value
+                if value != stored_value:
+                    merge_values(x, key, value, stored_value, x, y, biolink_depth_getter)
+        elif value is not None and value != stored_value:
+            if type(value) == list and type(stored_value) == list:
+                x[key] = ListMergeAccumulator(key, stored_value, value)
+            else:
+                merge_values(x, key, value, stored_value, x, y, biolink_depth_getter)
+    return x
+
+
+def finish_merged_dict(x: dict):
+    for key, value in x.items():
+        if type(value) == ListMergeAccumulator:
+            x[key] = value.to_list()
+    return x
+
+
 def format_timestamp(timestamp: time.struct_time):
     return time.strftime('%Y-%m-%d %H:%M:%S %Z', timestamp)
 
@@ -834,13 +1351,12 @@ def make_edge_biolink(subject_curie_id: str,
 
 
 def is_a_valid_http_url(id: str) -> bool:
-    valid = True
-    try:
-        validators.url(id)
-        valid = id.startswith('http://') or id.startswith('https://')
-    except validators.ValidationFailure:
-        valid = False
-    return valid
+    # This used to also call validators.url(id), but that returns a (false)
+    # ValidationFailure object rather than raising it, so the verdict only
+    # ever depended on the scheme prefix.  Checking just the prefix gives the
+    # same verdicts without running the URL regex for every ontology node ID
+    # and predicate (see misc-tools/benchmark_is_a_valid_http_url.py).
+    return id.startswith(HTTP_URL_PREFIXES)
 
 
 def load_ontology_from_owl_or_json_file(ontology_file_name: str):
@@ -850,36 +1366,177 @@ def load_ontology_from_owl_or_json_file(ontology_file_name: str):
     return ont_factory.create(ontology_file_name, ignore_cache=True)
 
 
-# This function will load the ontology object from a pickle file (if it exists)
-# or it will create the ontology object by parsing the OWL-XML ontology file
+@functools.lru_cache(maxsize=None)
+def _get_file_sha256(file_name: str, file_size: int, file_mtime_ns: int):
+    sha256 = hashlib.sha256()
+    with open(file_name, 'rb') as file:
+        for chunk in iter(lambda: file.read(FILE_HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_file_sha256(file_name: str):
+    # memoized on the file's size and modification time, since the ontology
+    # files are hashed both for scheduling and for loading
+    file_stat = os.stat(file_name)
+    return _get_file_sha256(os.path.abspath(file_name), file_stat.st_size, file_stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=None)
+def get_owltools_version():
+    # The owltools executable that KG2 installs is a self-contained launcher
+    # script with the jar appended, so its hash identifies the owltools build.
+    owltools_path = shutil.which('owltools')
+    if owltools_path is None:
+        return 'none'
+    return get_file_sha256(owltools_path)
+
+
+def get_ontology_cache_key(file_name: str):
+    # the cache key covers everything that determines the loaded ontology:
+    # the source file's contents, the converter (owltools, which is not used
+    # for a JSON source file), the loader (ontobio), and the cache format
+    owltools_version = get_owltools_version() if not file_name.endswith('.json') else ''
+    key_str = '\t'.join([get_file_sha256(file_name),
+                         owltools_version,
+                         ontobio.__version__,
+                         str(ONTOLOGY_CACHE_FORMAT_VERSION)])
+    return hashlib.sha256(key_str.encode('utf-8')).hexdigest()
+
+
+def get_ontology_cache_file_name(file_name: str, cache_dir: str):
+    return os.path.join(cache_dir, get_ontology_cache_key(file_name) + ONTOLOGY_CACHE_FILE_SUFFIX)
+
+
+def save_to_ontology_cache(cache_data, cache_file_name: str):
+    cache_dir = os.path.dirname(cache_file_name)
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temp file and rename, so that a concurrent reader never sees
+    # a partially written cache file
+    temp_fd, temp_file_name = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX + '-', dir=cache_dir)
+    with os.fdopen(temp_fd, 'wb') as temp_file:
+        pickle.dump(cache_data, temp_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file_name, cache_file_name)
+
+
+def load_from_ontology_cache(cache_file_name: str):
+    with open(cache_file_name, 'rb') as cache_file:
+        cache_data = pickle.load(cache_file)
+    # mark the cache file as recently used, for evict_ontology_cache
+    os.utime(cache_file_name)
+    return cache_data
+
+
+def save_ontology_to_cache(ontology: ontobio.ontol.Ontology, cache_file_name: str):
+    # Saves the graphs as plain node and edge lists rather than pickling the
+    # ontobio.ontol.Ontology object, whose networkx graphs store every edge
+    # twice (as successor and predecessor) and which also holds the entire
+    # obographs JSON document ("graphdoc"), which KG2 does not use.
+    cache_data = {'handle': ontology.handle,
+                  'id': ontology.id,
+                  'meta': ontology.meta,
+                  'nodes': list(ontology.graph.nodes(data=True)),
+                  'edges': list(ontology.graph.edges(keys=True, data=True)),
+                  'xref_nodes': list(ontology.xref_graph.nodes(data=True)),
+                  'xref_edges': list(ontology.xref_graph.edges(keys=True, data=True)),
+                  'logical_definitions': ontology.all_logical_definitions,
+                  'property_chain_axioms': ontology.all_property_chain_axioms}
+    save_to_ontology_cache(cache_data, cache_file_name)
+
+
+def load_ontology_from_cache(cache_file_name: str):
+    cache_data = load_from_ontology_cache(cache_file_name)
+    graph = networkx.MultiDiGraph()
+    graph.add_nodes_from(cache_data['nodes'])
+    graph.add_edges_from(cache_data['edges'])
+    xref_graph = networkx.MultiGraph()
+    xref_graph.add_nodes_from(cache_data['xref_nodes'])
+    xref_graph.add_edges_from(cache_data['xref_edges'])
+    return ontobio.ontol.Ontology(handle=cache_data['handle'],
+                                  id=cache_data['id'],
+                                  payload={'meta': cache_data['meta'],
+                                           'graph': graph,
+                                           'xref_graph': xref_graph,
+                                           'graphdoc': None,
+                                           'logical_definitions': cache_data['logical_definitions'],
+                                           'property_chain_axioms': cache_data['property_chain_axioms']})
+
+
+def evict_ontology_cache(cache_dir: str, max_size_bytes: int):
+    # least-recently-used eviction, using the file modification time (which
+    # load_from_ontology_cache updates) as the time of last use
+    cache_files = []
+    for dir_entry in os.scandir(cache_dir):
+        if dir_entry.name.endswith((ONTOLOGY_CACHE_FILE_SUFFIX, ONTOLOGY_FRAGMENT_FILE_SUFFIX)) and \
+           dir_entry.is_file():
+            file_stat = dir_entry.stat()
+            cache_files.append((file_stat.st_mtime_ns, file_stat.st_size, dir_entry.path))
+    cache_files.sort(reverse=True)
+    total_size_bytes = 0
+    for ctr, (_, file_size, cache_file_name) in enumerate(cache_files):
+        total_size_bytes += file_size
+        # never evict the most recently used file (i.e., the one just saved)
+        if total_size_bytes > max_size_bytes and ctr > 0:
+            log_message("Evicting ontology cache file: " + cache_file_name, output_stream=sys.stderr)
+            try:
+                os.remove(cache_file_name)
+            except FileNotFoundError:
+                # another process evicted it first
+                pass
+
+
+def convert_ontology_file_to_json(file_name: str):
+    temp_file_name = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX + '-')[1] + '.json'
+    size = os.path.getsize(file_name)
+    log_message(message="Reading ontology file: " + file_name + "; size: " + "{0:.2f}".format(size/1024) + " KiB",
+                ontology_name=None)
+    cp = subprocess.run(['owltools', file_name, '-o', '-f', 'json', temp_file_name],
+                        check=True)
+    # robot commented out because it is giving a NullPointerException on umls-semantictypes.owl
+    # Once robot no longer gives a NullPointerException, we can use it like this:
+    #cp = subprocess.run(['robot', 'convert', '--input', file_name, '--output', temp_file_name])
+    if cp.stdout is not None:
+        log_message(message="OWL convert result: " + cp.stdout, ontology_name=None, output_stream=sys.stdout)
+    if cp.stderr is not None:
+        log_message(message="OWL convert result: " + cp.stderr, ontology_name=None, output_stream=sys.stderr)
+    assert cp.returncode == 0
+    json_file = os.path.splitext(file_name)[0] + ".json"
+    shutil.move(temp_file_name, json_file)
+    return json_file
+
+
+# This function will load the ontology object from the ontology cache (if
+# cache_dir is specified and the cache has an entry for the file's contents),
+# or from a pickle file next to the ontology file (e.g., foodon.pickle for
+# foodon.owl, which the build downloads from S3 to seed an empty cache), or
+# it will create the ontology object by parsing the OWL-XML ontology file
 # NOTE: it seems that ontobio can't directly read a TTL file (at least, it is
 # not working for me), so we convert all input files (whether OWL or TTL) to
 # JSON and then load the JSON files using ontobio, for "simplicity". A second
 # reason why we load using JSON is because when it loads an OWL file, ontobio
 # does some internal caching that cannot be opted out of; it does not do this
 # caching if you load an ontology in JSON format.
-def make_ontology_from_local_file(file_name: str, save_pickle: bool = False):
-    file_name_without_ext = os.path.splitext(file_name)[0]
-    file_name_with_pickle_ext = file_name_without_ext + ".pickle"
-    if not os.path.isfile(file_name_with_pickle_ext) or save_pickle:
-        # the ontology hsa not been saved as a pickle file, so we need to load it from a text file
+def make_ontology_from_local_file(file_name: str,
+                                  cache_dir: str = None,
+                                  cache_max_size_gb: float = ONTOLOGY_CACHE_MAX_SIZE_GB):
+    cache_file_name = None
+    if cache_dir is not None:
+        cache_file_name = get_ontology_cache_file_name(file_name, cache_dir)
+        if os.path.isfile(cache_file_name):
+            size = os.path.getsize(cache_file_name)
+            log_message("Reading ontology cache file for " + file_name + ": " + cache_file_name +
+                        "; size: " + "{0:.2f}".format(size/1024) + " KiB", ontology_name=None)
+            return load_ontology_from_cache(cache_file_name)
+    pickle_file_name = os.path.splitext(file_name)[0] + '.pickle'
+    if not file_name.endswith('.json') and os.path.isfile(pickle_file_name):
+        size = os.path.getsize(pickle_file_name)
+        log_message("Reading ontology file: " + pickle_file_name + "; size: " + "{0:.2f}".format(size/1024) + " KiB",
+                    ontology_name=None)
+        with open(pickle_file_name, 'rb') as pickle_file:
+            ont_return = pickle.load(pickle_file)
+    else:
         if not file_name.endswith('.json'):
-            temp_file_name = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX + '-')[1] + '.json'
-            size = os.path.getsize(file_name)
-            log_message(message="Reading ontology file: " + file_name + "; size: " + "{0:.2f}".format(size/1024) + " KiB",
-                        ontology_name=None)
-            cp = subprocess.run(['owltools', file_name, '-o', '-f', 'json', temp_file_name],
-                                check=True)
-            # robot commented out because it is giving a NullPointerException on umls-semantictypes.owl
-            # Once robot no longer gives a NullPointerException, we can use it like this:
-            #cp = subprocess.run(['robot', 'convert', '--input', file_name, '--output', temp_file_name])
-            if cp.stdout is not None:
-                log_message(message="OWL convert result: " + cp.stdout, ontology_name=None, output_stream=sys.stdout)
-            if cp.stderr is not None:
-                log_message(message="OWL convert result: " + cp.stderr, ontology_name=None, output_stream=sys.stderr)
-            assert cp.returncode == 0
-            json_file = file_name_without_ext + ".json"
-            shutil.move(temp_file_name, json_file)
+            json_file = convert_ontology_file_to_json(file_name)
         else:
             json_file = file_name
         size = os.path.getsize(json_file)
@@ -887,10 +1544,219 @@ def make_ontology_from_local_file(file_name: str, save_pickle: bool = False):
                     ontology_name=None)
         assert os.path.exists(json_file)
         ont_return = load_ontology_from_owl_or_json_file(json_file)
-        if save_pickle:
-            pickle.dump(ont_return, open(file_name_with_pickle_ext, 'wb'))
-    else:
-        size = os.path.getsize(file_name_with_pickle_ext)
-        log_message("Reading ontology file: " + file_name_with_pickle_ext + "; size: " + "{0:.2f}".format(size/1024) + " KiB", ontology_name=None)
-        ont_return = pickle.load(open(file_name_with_pickle_ext, "rb"))
+    if cache_file_name is not None:
+        save_ontology_to_cache(ont_return, cache_file_name)
+        evict_ontology_cache(cache_dir, int(cache_max_size_gb * (1 << 30)))
     return ont_return
+
+
+class HashedIDSet:
+    '''A compact set of ID strings (CURIEs, edge IDs) for membership tests on
+    tens of millions of IDs.  Each ID is stored as its 64-bit hash in a sorted,
+    memory-mapped array on disk; newly added IDs are buffered in a small Python
+    set and periodically merged into the array.  Hashes come from the built-in
+    hash(), so a HashedIDSet is only valid within the process that built it
+    (and any processes forked from it).  With exact=True the ID strings are
+    also kept in a side file so that a hash match is confirmed against the ID
+    itself, and the (rare) IDs whose hashes collide are kept in a plain set.
+    Without exact=True, a collision goes undetected: an ID whose hash equals
+    that of an ID in the set is taken to be in the set.  log_collisions logs
+    the number of collisions found (exact=True) or expected (otherwise).
+    '''
+
+    MIN_BUFFER_SIZE = 1 << 20
+    BATCH_SIZE = 1 << 16
+
+    def __init__(self, ids: typing.Iterable[str] = None, exact: bool = False,
+                 temp_dir: str = None):
+        self.exact = exact
+        self.dir = tempfile.mkdtemp(prefix=TEMP_FILE_PREFIX + '-idset-', dir=temp_dir)
+        self.generation = 0
+        self.sorted_hashes = numpy.empty(0, dtype=numpy.int64)
+        self.buffer = dict() if exact else set()
+        self.collisions = set()
+        self.num_collisions = 0
+        if exact:
+            self.sorted_offsets = numpy.empty(0, dtype=numpy.int64)
+            self.ids_file_name = os.path.join(self.dir, 'ids')
+            self.ids_file = open(self.ids_file_name, 'w+b')
+            self.ids_file_size = 0
+        if ids is not None:
+            self.update(ids)
+
+    def __len__(self):
+        return len(self.sorted_hashes) + len(self.buffer) + len(self.collisions)
+
+    def __contains__(self, id: str):
+        return self.contains_many([id])[0]
+
+    def add(self, id: str):
+        return self.add_many([id])[0]
+
+    def update(self, ids: typing.Iterable[str]):
+        batch = []
+        for id in ids:
+            batch.append(id)
+            if len(batch) >= HashedIDSet.BATCH_SIZE:
+                self.add_many(batch)
+                batch = []
+        self.add_many(batch)
+        self.flush()
+
+    def read_id(self, offset: int):
+        length = int.from_bytes(os.pread(self.ids_file.fileno(), 4, offset), 'little')
+        return os.pread(self.ids_file.fileno(), length, offset + 4).decode('utf-8')
+
+    def write_id(self, id: str):
+        id_bytes = id.encode('utf-8')
+        offset = self.ids_file_size
+        self.ids_file.write(len(id_bytes).to_bytes(4, 'little') + id_bytes)
+        self.ids_file_size += 4 + len(id_bytes)
+        return offset
+
+    def find_sorted(self, hashes: numpy.ndarray):
+        # vectorized lookup of a batch of hashes in the sorted array; returns
+        # the index of each hash in the array, or -1 if it is not there
+        num_sorted = len(self.sorted_hashes)
+        if num_sorted == 0:
+            return numpy.full(len(hashes), -1, dtype=numpy.int64)
+        indices = numpy.minimum(self.sorted_hashes.searchsorted(hashes), num_sorted - 1)
+        return numpy.where(self.sorted_hashes[indices] == hashes, indices, -1)
+
+    def stored_id(self, hash_value: int, sorted_index: int):
+        self.ids_file.flush()
+        if sorted_index >= 0:
+            return self.read_id(int(self.sorted_offsets[sorted_index]))
+        return self.read_id(self.buffer[hash_value])
+
+    def contains_many(self, ids: list):
+        hashes = numpy.fromiter(map(hash, ids), dtype=numpy.int64, count=len(ids))
+        sorted_indices = self.find_sorted(hashes)
+        buffer = self.buffer
+        if len(buffer) == 0 and not self.exact:
+            return (sorted_indices >= 0).tolist()
+        ret = []
+        for id, hash_value, sorted_index in zip(ids, hashes.tolist(), sorted_indices.tolist()):
+            present = sorted_index >= 0 or hash_value in buffer
+            if present and self.exact:
+                present = id in self.collisions or self.stored_id(hash_value, sorted_index) == id
+                if not present:
+                    self.num_collisions += 1
+            ret.append(present)
+        return ret
+
+    def add_many(self, ids: list):
+        '''Adds each ID in order; returns, for each ID, whether it was new.'''
+        hashes = numpy.fromiter(map(hash, ids), dtype=numpy.int64, count=len(ids))
+        sorted_indices = self.find_sorted(hashes)
+        buffer = self.buffer
+        ret = []
+        if not self.exact:
+            for hash_value, sorted_index in zip(hashes.tolist(), sorted_indices.tolist()):
+                if sorted_index < 0 and hash_value not in buffer:
+                    buffer.add(hash_value)
+                    ret.append(True)
+                else:
+                    ret.append(False)
+        else:
+            for id, hash_value, sorted_index in zip(ids, hashes.tolist(), sorted_indices.tolist()):
+                if sorted_index < 0 and hash_value not in buffer:
+                    buffer[hash_value] = self.write_id(id)
+                    ret.append(True)
+                elif id not in self.collisions and self.stored_id(hash_value, sorted_index) != id:
+                    self.collisions.add(id)
+                    self.num_collisions += 1
+                    ret.append(True)
+                else:
+                    ret.append(False)
+        if len(buffer) >= max(HashedIDSet.MIN_BUFFER_SIZE, len(self.sorted_hashes) // 16):
+            self.flush()
+        return ret
+
+    def expected_num_collisions(self):
+        # the expected number of pairs of IDs in the set whose 64-bit hashes
+        # are the same
+        num_ids = len(self)
+        return num_ids * (num_ids - 1) / 2 ** 65
+
+    def log_collisions(self, description: str):
+        log_hash_collisions(description, self.exact, self.num_collisions,
+                            self.expected_num_collisions())
+
+    def make_memmap(self, name: str, size: int):
+        file_name = os.path.join(self.dir, name + '-' + str(self.generation))
+        return numpy.memmap(file_name, dtype=numpy.int64, mode='w+', shape=(size,))
+
+    def flush(self):
+        '''Merges the buffered hashes into the sorted, memory-mapped array.'''
+        if len(self.buffer) == 0:
+            return
+        if self.exact:
+            self.ids_file.flush()
+        new_hashes = numpy.fromiter(self.buffer, dtype=numpy.int64, count=len(self.buffer))
+        order = numpy.argsort(new_hashes)
+        new_offsets = None
+        if self.exact:
+            new_offsets = numpy.fromiter(self.buffer.values(), dtype=numpy.int64,
+                                         count=len(self.buffer))[order]
+        self.merge_sorted(new_hashes[order], new_offsets)
+        self.buffer = dict() if self.exact else set()
+
+    def update_hashes(self, hashes: numpy.ndarray):
+        '''Adds the IDs whose hash() values are in an array (which may have
+        duplicates); only for a HashedIDSet that is not exact.'''
+        assert not self.exact
+        self.flush()
+        new_hashes = numpy.unique(hashes)
+        self.merge_sorted(new_hashes[self.find_sorted(new_hashes) < 0])
+
+    def merge_sorted(self, new_hashes: numpy.ndarray, new_offsets: numpy.ndarray = None):
+        # merges sorted hashes that are not in the sorted array into it
+        if len(new_hashes) == 0:
+            return
+        num_old = len(self.sorted_hashes)
+        num_total = num_old + len(new_hashes)
+        # each new hash lands after the old hashes that are smaller than it
+        # and after the new hashes that precede it
+        new_positions = self.sorted_hashes.searchsorted(new_hashes) + numpy.arange(len(new_hashes))
+        old_mask = numpy.ones(num_total, dtype=bool)
+        old_mask[new_positions] = False
+        self.generation += 1
+        merged_hashes = self.make_memmap('hashes', num_total)
+        merged_hashes[new_positions] = new_hashes
+        merged_hashes[old_mask] = self.sorted_hashes
+        merged_hashes.flush()
+        if self.exact:
+            merged_offsets = self.make_memmap('offsets', num_total)
+            merged_offsets[new_positions] = new_offsets
+            merged_offsets[old_mask] = self.sorted_offsets
+            merged_offsets.flush()
+            self.remove_memmap(self.sorted_offsets)
+            self.sorted_offsets = merged_offsets
+        self.remove_memmap(self.sorted_hashes)
+        self.sorted_hashes = merged_hashes
+
+    def remove_memmap(self, array):
+        if isinstance(array, numpy.memmap):
+            os.remove(array.filename)
+
+    def close(self):
+        self.sorted_hashes = numpy.empty(0, dtype=numpy.int64)
+        if self.exact:
+            self.sorted_offsets = numpy.empty(0, dtype=numpy.int64)
+            self.ids_file.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def log_hash_collisions(description: str, exact: bool, num_collisions: int,
+                        expected_num_collisions: float):
+    # for a HashedIDSet (or several, e.g., one per shard) of the IDs described
+    # by "description"; only an exact index can detect the collisions
+    if exact:
+        log_message("number of hash collisions detected in the index of " + description + ": " +
+                    str(num_collisions),
+                    output_stream=sys.stderr)
+    else:
+        log_message("expected number of undetected hash collisions in the index of " + description + ": " +
+                    "{0:.3g}".format(expected_num_collisions) + " (use an exact ID index to detect them)",
+                    output_stream=sys.stderr)
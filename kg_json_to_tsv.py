@@ -2,13 +2,20 @@
 
 ''' Creates a set of tsv files for importing into Neo4j from KG2 JSON
 
-    Usage: kg_json_to_tsv.py  <inputKGfile.json> <outputFileLocationDirectory>
+    Usage: kg_json_to_tsv.py [--numWorkers <N>] [--maxShardBytes <N>]
+                             <inputNodesFile.jsonl> <inputEdgesFile.jsonl>
+                             <kg2-provided-by-curie-to-infores-curie.yaml> <outputFileLocationDirectory>
 '''
 
 import json
 import csv as tsv
 import datetime
 import argparse
+import functools
+import gzip
+import io
+import multiprocessing
+import operator
 import sys
 import yaml
 import kg2_util
@@ -24,6 +31,21 @@ __status__ = 'Prototype'
 
 NEO4J_CHAR_LIMIT = 3000000
 
+# rows are written to the TSV files in batches of this many rows, through a
+# file buffer of this size
+TSV_BATCH_SIZE = 10000
+TSV_BUFFER_SIZE = 1 << 24
+
+# with --maxShardBytes, the rows are written to gzip-compressed shards
+# (nodes_00001.tsv.gz, nodes_00002.tsv.gz, ...) of at most that many bytes
+# of uncompressed TSV each, which neo4j-admin import reads as one file
+TSV_SHARD_FILE_SUFFIX = "_{:05d}.tsv.gz"
+
+# the columns whose values are converted by make_node_tsv_row and
+# make_edge_tsv_row (all of the other values are copied as they are)
+NODE_TSV_CONVERTED_COLUMNS = {"synonym", "publications", "description"}
+EDGE_TSV_CONVERTED_COLUMNS = {"publications_info", "relation_label", "publications"}
+
 
 def get_args():
     arg_parser = argparse.ArgumentParser(description='kg_json_to_tsv.py: \
@@ -32,6 +54,10 @@ def get_args():
     arg_parser.add_argument("inputEdgesFile", type=str, help="Path to Knowledge Graph Edges JSON File to Import")
     arg_parser.add_argument("kg2ProvidedByCurieToInforesCurieFile", type=str, help="kg2-provided-by-curie-to-infores-curie.yaml")
     arg_parser.add_argument("outputFileLocation", help="Path to Directory for Output TSV Files to Go", type=str)
+    arg_parser.add_argument("--numWorkers", dest="num_workers", type=int, default=1,
+                            help="Number of processes; with 2 or more, the nodes and edges TSV files are written concurrently")
+    arg_parser.add_argument("--maxShardBytes", dest="max_shard_bytes", type=int, default=None,
+                            help="Write the nodes and edges as gzip-compressed TSV shards of at most this many bytes (uncompressed) each, instead of as nodes.tsv and edges.tsv; 0 means no shards")
     return arg_parser.parse_args()
 
 
@@ -115,7 +141,11 @@ def truncate_node_synonyms_if_too_large(node_synonym_field, node_id):
     buffer size 4194304' - see Github issue #460).
     Replaces any newlines with spaces - see Github issue #1076.
     """
-    if len(json.dumps(node_synonym_field)) > NEO4J_CHAR_LIMIT:
+    # json.dumps turns a character into at most 12 characters, so a list of
+    # synonyms only needs to be measured with json.dumps if it is long enough
+    # that it might be too large
+    if 12 * sum(map(len, filter(None, node_synonym_field))) + 8 * len(node_synonym_field) + 2 > NEO4J_CHAR_LIMIT and \
+       len(json.dumps(node_synonym_field)) > NEO4J_CHAR_LIMIT:
         print("warning: truncating 'synonym' field on node {} because it's too big for neo4j".format(node_id), file=sys.stderr)
         return [synonym.replace("\n"," ") for synonym in node_synonym_field[0:20] if synonym is not None]  # Only include the first 20 synonyms
     else:
@@ -157,31 +187,251 @@ def check_all_nodes_have_same_set(nodekeys_list):
     for node_label in nodekeys_list:
         assert node_label in supported_node_keys, f"Node label not in supported list: {node_label}"
 
-    
-def nodes(input_nodes_file, provided_by_infores_map, output_file_location):
+
+def format_list_field(value):
     """
-    :param input_file: The input file
-    :param output_file_location: A string containing the
-                                path to the TSV output directory
+    Formats a list of strings (e.g., synonyms or publications) as a
+    "; "-separated string.
+    :param value: A list of strings
+    """
+    # The same as the str(value).replace(...) chain below, which is only
+    # needed if a string in the list has a character that repr() would quote
+    # or escape, or is ", " (whose quotes would be taken for a separator)
+    if type(value) == list and ", " not in value:
+        try:
+            joined_str = "; ".join(value)
+        except TypeError:
+            joined_str = None
+        if joined_str is not None and joined_str.isprintable() and \
+           "'" not in joined_str and '"' not in joined_str and '\\' not in joined_str:
+            return joined_str.replace("[", "").replace("]", "")
+    return str(value).replace("', '", "; ").replace("'", "").replace("[", "").replace("]", "")
+
+
+def make_tsv_schema(keys: tuple, columns: list, converted_columns: set):
+    """
+    :param keys: A tuple of the keys of the nodes or edges
+    :param columns: A list of the property labels of the columns
+    :param converted_columns: A set of the property labels whose values are converted
+    """
+    # A schema is the tuple of columns, a function that gets the tuple of
+    # property values of a node or edge for the columns (a missing property
+    # has the value None), and the (index, property label) of each column
+    # whose value is converted
+    if all(key in keys for key in columns):
+        get_values = operator.itemgetter(*columns)
+    else:
+        def get_values(record):
+            return tuple(record.get(key) for key in columns)
+    return (tuple(columns),
+            get_values,
+            tuple((index, key) for index, key in enumerate(columns) if key in converted_columns))
+
+
+@functools.lru_cache(maxsize=None)
+def get_node_tsv_schema(node_keys: tuple):
+    """
+    :param node_keys: A tuple of the keys of a node, in the node's order
     """
-    # Generate list of output file names for the nodes TSV files
-    nodes_file = output_files(output_file_location, "nodes")
+    # The columns only depend on the keys, so they are checked and sorted
+    # once for each distinct tuple of keys
+    nodekeys = list(sorted(node_keys))
+    check_all_nodes_have_same_set(nodekeys)
+    nodekeys.append("category")
+    return make_tsv_schema(node_keys, nodekeys, NODE_TSV_CONVERTED_COLUMNS)
 
-    # Open output TSV files
-    # To address #278, added newline='' per https://docs.python.org/3/library/csv.html#id1
-    tsvfile = open(nodes_file[0], 'w+', newline='')
-    tsvfile_h = open(nodes_file[1], 'w+', newline='')
 
-    # Set up TSV files to be written to
-    tsvwrite = tsv.writer(tsvfile, delimiter="\t",
-                          quoting=tsv.QUOTE_MINIMAL)
-    tsvwrite_h = tsv.writer(tsvfile_h, delimiter="\t",
-                            quoting=tsv.QUOTE_MINIMAL)
+@functools.lru_cache(maxsize=None)
+def get_edge_tsv_schema(edge_keys: tuple):
+    """
+    :param edge_keys: A tuple of the keys of an edge, in the edge's order
+    """
+    edgekeys = list(sorted(edge_keys))
+    check_all_edges_have_same_set(edgekeys)
+
+    # Add an extra property of "predicate" to the list so that predicates
+    # can be a property and a label
+    edgekeys.append('predicate')
+    edgekeys.append('subject')
+    edgekeys.append('object')
+    return make_tsv_schema(edge_keys, edgekeys, EDGE_TSV_CONVERTED_COLUMNS)
+
 
+class TSVOutput:
+    """
+    Writes the rows of the nodes or edges TSV file, and the header TSV file
+    (from the property labels of the first row)
+    """
+    def __init__(self, output_file_location, graph_type, make_header, max_shard_bytes=None):
+        """
+        :param output_file_location: A string containing the path to
+                                    the TSV output directory
+        :param graph_type: A string (either "nodes" or "edges") used to
+                            name the TSV output files
+        :param make_header: A function that makes the header row from a
+                            list of property labels
+        :param max_shard_bytes: If not None or 0, the rows are written to
+                                gzip-compressed shards of at most this
+                                many bytes (uncompressed) each
+        """
+        # Generate list of output file names for the TSV files
+        tsv_files = output_files(output_file_location, graph_type)
+
+        # Open output TSV files
+        # To address #278, added newline='' per https://docs.python.org/3/library/csv.html#id1
+        self.max_shard_bytes = max_shard_bytes
+        if max_shard_bytes:
+            self.shard_file_base = tsv_files[0][:-len(".tsv")]
+            self.shard_ctr = 0
+            self.open_shard()
+        else:
+            self.tsvfile = open(tsv_files[0], 'w+', newline='', buffering=TSV_BUFFER_SIZE)
+        self.tsvfile_h = open(tsv_files[1], 'w+', newline='')
+
+        # Set up TSV files to be written to; the rows are written to the
+        # TSV file in batches of lines
+        self.tsvwrite_h = tsv.writer(self.tsvfile_h, delimiter="\t",
+                                     quoting=tsv.QUOTE_MINIMAL)
+
+        self.make_header = make_header
+        self.row_ctr = 0
+        self.lines = []
+
+        # Rows that need quoting are formatted by a TSV writer
+        self.quoted_line_buffer = io.StringIO()
+        self.quoted_line_write = tsv.writer(self.quoted_line_buffer, delimiter="\t",
+                                            quoting=tsv.QUOTE_MINIMAL)
+
+    def write_row(self, keys, vallist):
+        """
+        :param keys: A list of the property labels of the row
+        :param vallist: A list of the property values of the row
+        """
+        self.row_ctr += 1
+        # Add the property labels to the header TSV file
+        # But only for the first row
+        if self.row_ctr == 1:
+            self.tsvwrite_h.writerow(self.make_header(keys))
+        line = self.format_line(vallist)
+        if self.max_shard_bytes:
+            # A row is never split between shards, so a shard is only
+            # larger than the limit if it has a single row that is
+            line_bytes = len(line) if line.isascii() else len(line.encode('utf-8'))
+            if self.shard_bytes > 0 and self.shard_bytes + line_bytes > self.max_shard_bytes:
+                self.write_lines()
+                self.tsvfile.close()
+                self.open_shard()
+            self.shard_bytes += line_bytes
+        self.lines.append(line)
+        if len(self.lines) >= TSV_BATCH_SIZE:
+            self.write_lines()
+
+    def open_shard(self):
+        self.shard_ctr += 1
+        self.shard_bytes = 0
+        self.tsvfile = gzip.open(self.shard_file_base + TSV_SHARD_FILE_SUFFIX.format(self.shard_ctr), 'wt',
+                                 compresslevel=kg2_util.GZIP_COMPRESS_LEVEL, encoding='utf-8', newline='')
+
+    def format_line(self, vallist):
+        """
+        :param vallist: A list of the property values of the row
+        """
+        # The same line as the TSV writer's: if no value has a tab, a quote,
+        # or a line break, no value is quoted, and the values are just joined
+        fields = [value if type(value) == str else ('' if value is None else str(value)) for value in vallist]
+        line = "\t".join(fields)
+        if line.count("\t") == len(fields) - 1 and '"' not in line and '\n' not in line and '\r' not in line:
+            return line + "\r\n"
+        self.quoted_line_write.writerow(vallist)
+        line = self.quoted_line_buffer.getvalue()
+        self.quoted_line_buffer.seek(0)
+        self.quoted_line_buffer.truncate()
+        return line
+
+    def write_lines(self):
+        self.tsvfile.write("".join(self.lines))
+        self.lines = []
+
+    def close(self):
+        self.write_lines()
+        # Close all of the files to prevent a memory leak
+        self.tsvfile.close()
+        self.tsvfile_h.close()
+
+
+def make_knowledge_source_to_infores_map(provided_by_infores_map):
+    """
+    :param provided_by_infores_map: The kg2-provided-by-curie-to-infores-curie.yaml file
+    """
     # Create infores map to verify knowledge_source with
     with open(provided_by_infores_map, 'r') as yaml_file:
         ir_map = yaml.safe_load(yaml_file)
-        map_ks_curie_to_infores_curie = {k: d['infores_curie'] for k, d in ir_map.items()}
+        return {k: d['infores_curie'] for k, d in ir_map.items()}
+
+
+def make_node_tsv_row(node, map_ks_curie_to_infores_curie):
+    """
+    :param node: A node dictionary (its knowledge_source is moved to
+                 its provided_by)
+    :param map_ks_curie_to_infores_curie: A dictionary from the
+                                          make_knowledge_source_to_infores_map function
+    """
+    # Add all node property labels to a list and check if they are supported
+    knowledge_source = node.get('knowledge_source')
+    if knowledge_source is not None:
+        assert type(knowledge_source)==str, "expected a string type"
+        knowledge_source_infores = map_ks_curie_to_infores_curie.get(knowledge_source)
+        if knowledge_source_infores is not None:
+            provided_by = node.get('provided_by')
+            if provided_by is not None:
+                assert type(provided_by)==list, "expected a list type"
+                provided_by = list(set(provided_by + [knowledge_source_infores]))
+                node['provided_by'] = provided_by
+            else:
+                node['provided_by'] = [knowledge_source_infores]
+        del node['knowledge_source']
+
+    nodekeys, get_values, converted_columns = get_node_tsv_schema(tuple(node))
+
+    vallist = list(get_values(node))
+
+    for index, key in converted_columns:
+        value = vallist[index]
+        if key == "synonym":
+            vallist[index] = format_list_field(truncate_node_synonyms_if_too_large(value, node['id']))
+        elif key == "publications":
+            vallist[index] = format_list_field(value)
+        elif key == "description" and value is not None:
+            vallist[index] = shorten_description_if_too_large(value, node['id'])
+
+    vallist = [value.replace('\t', ' ').replace('\n', ' ').replace('\r', ' ') if type(value) == str else value
+               for value in vallist]
+
+    return nodekeys, vallist
+
+
+def make_node_tsv_header(nodekeys):
+    """
+    :param nodekeys: A list of the property labels from the make_node_tsv_row function
+    """
+    nodekeys = list(nodekeys)
+    nodekeys = no_space('id', nodekeys, 'id:ID')
+    nodekeys = no_space('publications', nodekeys, "publications:string[]")
+    nodekeys = no_space('synonym', nodekeys, "synonym:string[]")
+    nodekeys = no_space('category', nodekeys, ':LABEL')
+    return nodekeys
+
+
+def nodes(input_nodes_file, provided_by_infores_map, output_file_location, max_shard_bytes=None):
+    """
+    :param input_file: The input file
+    :param output_file_location: A string containing the
+                                path to the TSV output directory
+    :param max_shard_bytes: The maximum size of a nodes TSV shard, or None
+    """
+    nodes_output = TSVOutput(output_file_location, "nodes", make_node_tsv_header, max_shard_bytes)
+
+    map_ks_curie_to_infores_curie = make_knowledge_source_to_infores_map(provided_by_infores_map)
 
     input_nodes_jsonlines_info = kg2_util.start_read_jsonlines(input_nodes_file)
     input_nodes = input_nodes_jsonlines_info[0]
@@ -192,57 +442,11 @@ def nodes(input_nodes_file, provided_by_infores_map, output_file_location):
         if node_ctr % 1000000 == 0:
             print(f"Processing node: {node_ctr}")
 
-        # Add all node property labels to a list and check if they are supported
-        knowledge_source = node.get('knowledge_source')
-        if knowledge_source is not None:
-            assert type(knowledge_source)==str, "expected a string type"
-            knowledge_source_infores = map_ks_curie_to_infores_curie.get(knowledge_source)
-            if knowledge_source_infores is not None:
-                provided_by = node.get('provided_by')
-                if provided_by is not None:
-                    assert type(provided_by)==list, "expected a list type"
-                    provided_by = list(set(provided_by + [knowledge_source_infores]))
-                    node['provided_by'] = provided_by
-                else:
-                    node['provided_by'] = [knowledge_source_infores]
-            del node['knowledge_source']
-
-        nodekeys = list(sorted(node.keys()))
-        check_all_nodes_have_same_set(nodekeys)
-        nodekeys.append("category")
-
-        vallist = []
-
-        for key in nodekeys:
-            assert key in nodekeys, key
-            if key == "synonym":
-                value = truncate_node_synonyms_if_too_large(node[key], node['id'])
-                value = str(value).replace("', '", "; ").replace("'", "").replace("[", "").replace("]", "")
-            elif key == "publications":
-                value = str(node[key]).replace("', '", "; ").replace("'", "").replace("[", "").replace("]", "")
-            elif key == "description" and node[key] is not None:
-                value = shorten_description_if_too_large(node[key], node['id'])
-            else:
-                # If the property does exist, assign the property value
-                value = node[key]
-            # Add the value of the property to the property value list
-            if type(value) == str:
-                value = value.replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
-            vallist.append(value)
-
-        if node_ctr == 1:
-            nodekeys = no_space('id', nodekeys, 'id:ID')
-            nodekeys = no_space('publications', nodekeys, "publications:string[]")
-            nodekeys = no_space('synonym', nodekeys, "synonym:string[]")
-            nodekeys = no_space('category', nodekeys, ':LABEL')
-            tsvwrite_h.writerow(nodekeys)
-
-        tsvwrite.writerow(vallist)
+        nodes_output.write_row(*make_node_tsv_row(node, map_ks_curie_to_infores_curie))
 
     # Close all of the files to prevent a memory leak
     kg2_util.end_read_jsonlines(input_nodes_jsonlines_info)
-    tsvfile.close()
-    tsvfile_h.close()
+    nodes_output.close()
 
 
 def limit_publication_info_size(key, pub_inf_dict):
@@ -252,6 +456,11 @@ def limit_publication_info_size(key, pub_inf_dict):
     """
     new_pub_inf_dict = {}
 
+    # A dictionary with no more than 6 pieces of publication info would not
+    # be changed, so there is no need to measure it
+    if isinstance(pub_inf_dict, dict) and len(pub_inf_dict) < 7:
+        return pub_inf_dict
+
     # Dump the publications_info dictionary into a string
     value_string = json.dumps(pub_inf_dict)
 
@@ -267,24 +476,50 @@ def limit_publication_info_size(key, pub_inf_dict):
     return pub_inf_dict
 
 
-def edges(input_edges_file, output_file_location):
+def make_edge_tsv_row(edge):
+    """
+    :param edge: An edge dictionary
+    """
+    # Add all edge property label to a list in the same order and test
+    # to make sure they are the same
+    edgekeys, get_values, converted_columns = get_edge_tsv_schema(tuple(edge))
+
+    # Create list for values of edge properties to be added to
+    vallist = list(get_values(edge))
+    for index, key in converted_columns:
+        # Limit the size of the publications_info dictionary
+        # to avoid Neo4j buffer size error
+        value = vallist[index]
+        if key == "publications_info":
+            vallist[index] = limit_publication_info_size(key, value)
+        elif key == 'relation_label':  # fix for issue number 473 (hyphens in relation_labels)
+            vallist[index] = value.replace('-', '_').replace('(', '').replace(')', '')
+        elif key == 'publications':
+            vallist[index] = format_list_field(value)
+
+    return edgekeys, vallist
+
+
+def make_edge_tsv_header(edgekeys):
+    """
+    :param edgekeys: A list of the property labels from the make_edge_tsv_row function
+    """
+    edgekeys = list(edgekeys)
+    edgekeys = no_space('predicate', edgekeys, 'predicate:TYPE')
+    edgekeys = no_space('subject', edgekeys, ':START_ID')
+    edgekeys = no_space('object', edgekeys, ':END_ID')
+    edgekeys = no_space('publications', edgekeys, "publications:string[]")
+    return edgekeys
+
+
+def edges(input_edges_file, output_file_location, max_shard_bytes=None):
     """
     :param input_file: The input file
     :param output_file_location: A string containing the path to the
                                 TSV output directory
+    :param max_shard_bytes: The maximum size of an edges TSV shard, or None
     """
-    # Generate list of output file names for the edges TSV files
-    edges_file = output_files(output_file_location, "edges")
-
-    # Open output TSV files
-    # To address #278, added newline='' per https://docs.python.org/3/library/csv.html#id1
-    tsvfile = open(edges_file[0], 'w+', newline='')
-    tsvfile_h = open(edges_file[1], 'w+', newline='')
-
-    # Set up TSV files to be written to
-    tsvwrite = tsv.writer(tsvfile, delimiter="\t", quoting=tsv.QUOTE_MINIMAL)
-    tsvwrite_h = tsv.writer(tsvfile_h, delimiter="\t",
-                            quoting=tsv.QUOTE_MINIMAL)
+    edges_output = TSVOutput(output_file_location, "edges", make_edge_tsv_header, max_shard_bytes)
 
     input_edges_jsonlines_info = kg2_util.start_read_jsonlines(input_edges_file)
     input_edges = input_edges_jsonlines_info[0]
@@ -295,46 +530,11 @@ def edges(input_edges_file, output_file_location):
         if edge_ctr % 1000000 == 0:
             print(f"Processing edge: {edge_ctr}")
 
-        # Add all edge property label to a list in the same order and test
-        # to make sure they are the same
-        edgekeys = list(sorted(edge.keys()))
-        check_all_edges_have_same_set(edgekeys)
-
-        # Add an extra property of "predicate" to the list so that predicates
-        # can be a property and a label
-        edgekeys.append('predicate')
-        edgekeys.append('subject')
-        edgekeys.append('object')
-
-        # Create list for values of edge properties to be added to
-        vallist = []
-        for key in edgekeys:
-            # Add the value for each edge property to the value list
-            # and limit the size of the publications_info dictionary
-            # to avoid Neo4j buffer size error
-            value = edge.get(key)
-            if key == "publications_info":
-                value = limit_publication_info_size(key, value)
-            elif key == 'relation_label':  # fix for issue number 473 (hyphens in relation_labels)
-                value = value.replace('-', '_').replace('(', '').replace(')', '')
-            elif key == 'publications':
-                value = str(value).replace("', '", "; ").replace("'", "").replace("[", "").replace("]", "")
-            vallist.append(value)
-
-        # Add the edge property labels to the edge header TSV file
-        # But only for the first edge
-        if edge_ctr == 1:
-            edgekeys = no_space('predicate', edgekeys, 'predicate:TYPE')
-            edgekeys = no_space('subject', edgekeys, ':START_ID')
-            edgekeys = no_space('object', edgekeys, ':END_ID')
-            edgekeys = no_space('publications', edgekeys, "publications:string[]")
-            tsvwrite_h.writerow(edgekeys)
-        tsvwrite.writerow(vallist)
+        edges_output.write_row(*make_edge_tsv_row(edge))
 
     # Close all of the files to prevent a memory leak
     kg2_util.end_read_jsonlines(input_edges_jsonlines_info)
-    tsvfile.close()
-    tsvfile_h.close()
+    edges_output.close()
 
 
 if __name__ == '__main__':
@@ -344,11 +544,29 @@ if __name__ == '__main__':
     input_edges_file = args.inputEdgesFile
     provided_by_infores_map = args.kg2ProvidedByCurieToInforesCurieFile
     output_file_location = args.outputFileLocation
-    
-    print("Start nodes: ", date())
-    nodes(input_nodes_file, provided_by_infores_map, output_file_location)
-    print("Finish nodes: ", date())
-    print("Start edges: ", date())
-    edges(input_edges_file, output_file_location)
-    print("Finish edges: ", date())
+    num_workers = args.num_workers
+    max_shard_bytes = args.max_shard_bytes
+
+    if num_workers > 1:
+        # The nodes TSV files are written by a child process, while the
+        # edges TSV files are written by this process
+        print("Start nodes and edges: ", date())
+        nodes_process = multiprocessing.get_context('fork').Process(target=nodes,
+                                                                    args=(input_nodes_file, provided_by_infores_map, output_file_location,
+                                                                          max_shard_bytes))
+        nodes_process.start()
+        edges(input_edges_file, output_file_location, max_shard_bytes)
+        print("Finish edges: ", date())
+        nodes_process.join()
+        if nodes_process.exitcode != 0:
+            print("writing the nodes TSV files failed", file=sys.stderr)
+            exit(1)
+        print("Finish nodes: ", date())
+    else:
+        print("Start nodes: ", date())
+        nodes(input_nodes_file, provided_by_infores_map, output_file_location, max_shard_bytes)
+        print("Finish nodes: ", date())
+        print("Start edges: ", date())
+        edges(input_edges_file, output_file_location, max_shard_bytes)
+        print("Finish edges: ", date())
     print("Finish time: ", date())
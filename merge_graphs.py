@@ -2,9 +2,37 @@
 '''merge_graphs.py: merge two KGs that are in the KG2 JSON format
 
    Usage: merge_graphs.py [--kgFileOrphanEdges <kgFileOrphanEdges>]
+                           [--externalMerge] [--externalMergeChunkSize <N>]
+                           [--tempDir <dir>] [--exactIDIndex]
+                           [--sourcePriorityFile <merge-source-priority.yaml>]
+                           [--numShards <N>]
                            --outpufFile <outputFile.json>
                            <kgNodesFile1> ... <kgNodesFileN>
                            <kgEdgesFile1> ... <kgEdgesFileN>
+
+   With --externalMerge, the nodes are merged using a disk-backed external
+   sort (sorted runs of at most externalMergeChunkSize nodes, then a k-way
+   merge) so that peak memory does not grow with the size of the graph.  The
+   output is identical to the default in-memory merge.
+
+   Orphan-edge detection and edge-ID de-duplication use a compact, disk-backed
+   index of hashed IDs (kg2_util.HashedIDSet); with --exactIDIndex, every
+   hash match is also confirmed against the ID string itself.  Without it, two
+   distinct IDs whose 64-bit hashes collide are taken to be the same ID, so a
+   (very rare) collision can drop a distinct edge or let an orphan edge
+   through unnoticed; the expected number of such collisions is logged.
+
+   Nodes are merged "first file wins" (see kg2_util.merge_two_dicts), and the
+   first copy of a duplicated edge is kept.  With --sourcePriorityFile, the
+   input files are put in the order given by that YAML file, so that the
+   result does not depend on the order of the files on the command line.
+
+   With --numShards N (N > 1), nodes and edges are partitioned into N shards
+   by a hash of the node ID (or edge ID), each shard is merged in its own
+   worker process, and the shard outputs are merged back together in the
+   order of the input records, so that the output (and the logged counts of
+   nodes and edges added from each file) are the same as for the
+   single-process merge.
 '''
 
 __author__ = 'Stephen Ramsey'
@@ -17,9 +45,30 @@ __email__ = ''
 __status__ = 'Prototype'
 
 import argparse
-import kg2_util
+import heapq
+import itertools
 import json
+import kg2_util
+import multiprocessing
+import numpy
+import os
+import shutil
 import sys
+import tempfile
+import yaml
+import zlib
+
+EXTERNAL_MERGE_DEFAULT_CHUNK_SIZE = 1000000
+EXTERNAL_MERGE_MAX_FAN_IN = 128
+
+# in the sharded merge, each record is tagged with its position in the
+# input, (file index << POSITION_FILE_INDEX_SHIFT) + line index, and the
+# positions are written to and read from files in blocks of this many
+POSITION_FILE_INDEX_SHIFT = 40
+POSITIONS_BLOCK_SIZE = 1 << 20
+
+# set in the parent process before the edge-shard workers are forked
+SHARED_NODE_IDS = None
 
 
 def make_arg_parser():
@@ -30,88 +79,502 @@ def make_arg_parser():
     arg_parser.add_argument('--outputEdgesFile', type=str, nargs='?', default=None)
     arg_parser.add_argument('--kgNodesFiles', type=str, nargs='+')
     arg_parser.add_argument('--kgEdgesFiles', type=str, nargs='+')
+    arg_parser.add_argument('--externalMerge', dest='external_merge', action='store_true', default=False,
+                            help='merge nodes using a disk-backed external sort instead of an in-memory dict')
+    arg_parser.add_argument('--externalMergeChunkSize', dest='external_merge_chunk_size', type=int,
+                            default=EXTERNAL_MERGE_DEFAULT_CHUNK_SIZE,
+                            help='maximum number of nodes held in memory per sorted run')
+    arg_parser.add_argument('--tempDir', dest='temp_dir', type=str, default=None,
+                            help='directory in which to write the sorted runs and ID indexes (default: system temp dir)')
+    arg_parser.add_argument('--exactIDIndex', dest='exact_id_index', action='store_true', default=False,
+                            help='confirm hashed node-ID and edge-ID matches against the ID strings; without it, '
+                                 'a hash collision can silently drop a distinct edge or hide an orphan edge '
+                                 '(only the expected number of collisions is logged)')
+    arg_parser.add_argument('--sourcePriorityFile', dest='source_priority_file', type=str, default=None,
+                            help='YAML file listing the KG2 sources in merge-priority order')
+    arg_parser.add_argument('--numShards', dest='num_shards', type=int, default=1,
+                            help='number of shards (and worker processes) to merge in parallel')
+    arg_parser.add_argument('--logSummaryInterval', dest='log_summary_interval', type=float, default=None,
+                            help='aggregate recurring log messages, printing a summary of them every N seconds')
+    arg_parser.add_argument('--logDetailFile', dest='log_detail_file', type=str, default=None,
+                            help='gzip-compressed file to which every log message is written in full')
     return arg_parser
 
 
-if __name__ == '__main__':
-    args = make_arg_parser().parse_args()
-    kg_nodes_file_names = args.kgNodesFiles
-    kg_edges_file_names = args.kgEdgesFiles
-    test_mode = args.test
-    output_nodes_file_name = args.outputNodesFile
-    output_edges_file_name = args.outputEdgesFile
-    orphan_edges_file_name = args.kgFileOrphanEdges
+def get_source_of_file(file_name: str):
+    # e.g., "/home/ubuntu/kg2-build/kg2-umls-nodes-test.jsonl" -> "kg2-umls"
+    source = os.path.basename(file_name)
+    if source.endswith('.jsonl'):
+        source = source[:-len('.jsonl')]
+    if source.endswith('-test'):
+        source = source[:-len('-test')]
+    for suffix in ('-nodes', '-edges'):
+        if source.endswith(suffix):
+            source = source[:-len(suffix)]
+    return source
 
-    nodes_info, edges_info = kg2_util.create_kg2_jsonlines(test_mode)
-    nodes_output = nodes_info[0]
-    edges_output = edges_info[0]
 
-    orphan_info = kg2_util.create_single_jsonlines(test_mode)
-    orphan_output = orphan_info[0]
+def order_files_by_source_priority(file_names: list, source_priority: list):
+    source_ranks = {source: rank for rank, source in enumerate(source_priority)}
+    for file_name in file_names:
+        if get_source_of_file(file_name) not in source_ranks:
+            raise ValueError("source of file " + file_name + " is not in the source priority file")
+    return sorted(file_names, key=lambda file_name: source_ranks[get_source_of_file(file_name)])
 
-    nodes = dict()
 
-    for kg_nodes_file_name in kg_nodes_file_names:
-        kg2_util.log_message("reading nodes from file",
+def get_shard(id: str, num_shards: int):
+    return zlib.crc32(id.encode('utf-8')) % num_shards
+
+
+def write_run(records: list, temp_dir: str, sort_key: callable):
+    records.sort(key=sort_key)
+    run_file_name = tempfile.mkstemp(prefix=kg2_util.TEMP_FILE_PREFIX + '-run-', dir=temp_dir)[1]
+    with open(run_file_name, 'w') as run_file:
+        for record in records:
+            run_file.write(json.dumps(record) + '\n')
+    return run_file_name
+
+
+def read_run(run_file_name: str):
+    with open(run_file_name, 'r') as run_file:
+        for line in run_file:
+            yield json.loads(line)
+
+
+def merge_runs(run_file_names: list, temp_dir: str, sort_key: callable):
+    # reduce the number of runs until they can all be opened at once
+    while len(run_file_names) > EXTERNAL_MERGE_MAX_FAN_IN:
+        new_run_file_names = []
+        for i in range(0, len(run_file_names), EXTERNAL_MERGE_MAX_FAN_IN):
+            batch = run_file_names[i:(i + EXTERNAL_MERGE_MAX_FAN_IN)]
+            merged_run_file_name = tempfile.mkstemp(prefix=kg2_util.TEMP_FILE_PREFIX + '-run-', dir=temp_dir)[1]
+            with open(merged_run_file_name, 'w') as merged_run_file:
+                for record in heapq.merge(*[read_run(run_file_name) for run_file_name in batch], key=sort_key):
+                    merged_run_file.write(json.dumps(record) + '\n')
+            for run_file_name in batch:
+                os.remove(run_file_name)
+            new_run_file_names.append(merged_run_file_name)
+        run_file_names = new_run_file_names
+    return heapq.merge(*[read_run(run_file_name) for run_file_name in run_file_names], key=sort_key)
+
+
+def sort_nodes_by_id(kg_nodes_file_names: list, temp_dir: str, chunk_size: int):
+    # Each record is [node_id, file_index, line_index, node]; the file and line
+    # indices are kept so that duplicates get folded in exactly the order in
+    # which the in-memory merge would have seen them.
+    run_file_names = []
+    sort_key = lambda record: (record[0], record[1], record[2])
+    for file_index, kg_nodes_file_name in enumerate(kg_nodes_file_names):
+        kg2_util.log_message("sorting nodes from file",
                              ontology_name=kg_nodes_file_name,
                              output_stream=sys.stderr)
-        num_nodes_added = 0
+        records = []
+        kg_nodes_read_jsonlines_info = kg2_util.start_read_jsonlines(kg_nodes_file_name)
+        for line_index, node in enumerate(kg_nodes_read_jsonlines_info[0]):
+            records.append([node['id'], file_index, line_index, node])
+            if len(records) >= chunk_size:
+                run_file_names.append(write_run(records, temp_dir, sort_key))
+                records = []
+        kg2_util.end_read_jsonlines(kg_nodes_read_jsonlines_info)
+        if len(records) > 0:
+            run_file_names.append(write_run(records, temp_dir, sort_key))
+    return merge_runs(run_file_names, temp_dir, sort_key)
+
+
+def log_counts(file_names: list, counts: list, description: str):
+    for file_name, count in zip(file_names, counts):
+        kg2_util.log_message("number of " + description + ": " + str(count),
+                             ontology_name=file_name,
+                             output_stream=sys.stderr)
+
+
+def write_positions(positions: list, positions_file):
+    numpy.array(positions, dtype=numpy.int64).tofile(positions_file)
+    positions.clear()
+
+
+def read_positions(positions_file_name: str):
+    if os.path.getsize(positions_file_name) == 0:
+        return
+    positions = numpy.memmap(positions_file_name, dtype=numpy.int64, mode='r')
+    for start in range(0, len(positions), POSITIONS_BLOCK_SIZE):
+        yield from positions[start:(start + POSITIONS_BLOCK_SIZE)].tolist()
+
+
+def merge_nodes_in_memory(kg_nodes_file_names: list, nodes_output, node_ids,
+                          kg_nodes_positions_file_names: list = None,
+                          output_positions_file_name: str = None):
+    # with kg_nodes_positions_file_names (a shard of the sharded merge), the
+    # position in the input of each merged node (i.e., of its first copy) is
+    # written to output_positions_file_name, and the numbers of nodes added
+    # from the files are returned instead of being logged
+    nodes = dict()
+    positions = dict() if kg_nodes_positions_file_names is not None else None
+    num_nodes_added = []
+
+    for file_index, kg_nodes_file_name in enumerate(kg_nodes_file_names):
+        if kg_nodes_positions_file_names is None:
+            kg2_util.log_message("reading nodes from file",
+                                 ontology_name=kg_nodes_file_name,
+                                 output_stream=sys.stderr)
+        num_nodes_added.append(0)
         kg_nodes_read_jsonlines_info = kg2_util.start_read_jsonlines(kg_nodes_file_name)
         kg_nodes = kg_nodes_read_jsonlines_info[0]
-        for node in kg_nodes:
+        if kg_nodes_positions_file_names is not None:
+            kg_nodes = zip(kg_nodes, read_positions(kg_nodes_positions_file_names[file_index]))
+        else:
+            kg_nodes = zip(kg_nodes, itertools.repeat(None))
+        for node, position in kg_nodes:
             node_id = node['id']
             if node_id not in nodes:
                 nodes[node_id] = node
-                num_nodes_added += 1
+                if positions is not None:
+                    positions[node_id] = position
+                num_nodes_added[file_index] += 1
             else:
-                nodes[node_id] = kg2_util.merge_two_dicts(nodes[node_id], node)
-        kg2_util.log_message("number of nodes added: " + str(num_nodes_added),
-                             ontology_name=kg_nodes_file_name,
-                             output_stream=sys.stderr)
+                kg2_util.merge_two_dicts_in_place(nodes[node_id], node)
+        if kg_nodes_positions_file_names is None:
+            log_counts([kg_nodes_file_name], [num_nodes_added[file_index]], "nodes added")
         kg2_util.end_read_jsonlines(kg_nodes_read_jsonlines_info)
 
     for node in nodes.values():
-        nodes_output.write(node)
-    nodes_list = nodes.keys()
-    del nodes
-
-    ctr_edges_added = 0
-    last_edges_added = 0
-    last_orphan_edges = 0
-    kg_orphan_edges_count = 0
-    edge_keys = set()
-    for kg_edges_file_name in kg_edges_file_names:
-        kg2_util.log_message("reading edges from file",
-                             ontology_name=kg_edges_file_name,
-                             output_stream=sys.stderr)
+        nodes_output.write(kg2_util.finish_merged_dict(node))
+    node_ids.update(nodes.keys())
+    if output_positions_file_name is not None:
+        with open(output_positions_file_name, 'wb') as output_positions_file:
+            write_positions(list(positions.values()), output_positions_file)
+    return num_nodes_added
+
+
+def merge_nodes_external(kg_nodes_file_names: list, nodes_output, node_ids,
+                         chunk_size: int, temp_dir: str = None):
+    run_dir = tempfile.mkdtemp(prefix=kg2_util.TEMP_FILE_PREFIX + '-merge-', dir=temp_dir)
+    try:
+        # pass 1: fold duplicate nodes, keyed on the position at which each
+        # node ID first appeared, into runs sorted by that position
+        num_nodes_added = [0] * len(kg_nodes_file_names)
+        order_sort_key = lambda record: (record[0], record[1])
+        order_run_file_names = []
+        merged_records = []
+        merged_node_ids = []
+        sorted_records = sort_nodes_by_id(kg_nodes_file_names, run_dir, chunk_size)
+        for node_id, group in itertools.groupby(sorted_records, key=lambda record: record[0]):
+            _, file_index, line_index, node = next(group)
+            for record in group:
+                kg2_util.merge_two_dicts_in_place(node, record[3])
+            kg2_util.finish_merged_dict(node)
+            num_nodes_added[file_index] += 1
+            merged_node_ids.append(node_id)
+            if len(merged_node_ids) >= kg2_util.HashedIDSet.BATCH_SIZE:
+                node_ids.add_many(merged_node_ids)
+                merged_node_ids = []
+            merged_records.append([file_index, line_index, node])
+            if len(merged_records) >= chunk_size:
+                order_run_file_names.append(write_run(merged_records, run_dir, order_sort_key))
+                merged_records = []
+        if len(merged_records) > 0:
+            order_run_file_names.append(write_run(merged_records, run_dir, order_sort_key))
+        del merged_records
+        node_ids.update(merged_node_ids)
+
+        log_counts(kg_nodes_file_names, num_nodes_added, "nodes added")
+
+        # pass 2: emit the merged nodes in first-appearance order, which is
+        # the order in which the in-memory merge writes them out
+        for record in merge_runs(order_run_file_names, run_dir, order_sort_key):
+            nodes_output.write(record[2])
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def merge_edges(kg_edges_file_names: list, node_ids, edge_keys,
+                edges_output, orphan_output,
+                kg_edges_positions_file_names: list = None,
+                output_positions_files: tuple = None):
+    # with kg_edges_positions_file_names (a shard of the sharded merge), the
+    # positions in the input of the kept edges and of the orphan edges are
+    # written to the two files of output_positions_files, and the numbers of
+    # edges added and of orphan edges from the files are returned instead of
+    # being logged
+    num_edges_added = []
+    num_orphan_edges = []
+    for file_index, kg_edges_file_name in enumerate(kg_edges_file_names):
+        if kg_edges_positions_file_names is None:
+            kg2_util.log_message("reading edges from file",
+                                 ontology_name=kg_edges_file_name,
+                                 output_stream=sys.stderr)
+        num_edges_added.append(0)
+        num_orphan_edges.append(0)
 
         edges_read_jsonlines_info = kg2_util.start_read_jsonlines(kg_edges_file_name)
         kg_edges = edges_read_jsonlines_info[0]
+        if kg_edges_positions_file_names is not None:
+            kg_edges_positions = read_positions(kg_edges_positions_file_names[file_index])
+        else:
+            kg_edges_positions = itertools.repeat(None)
 
-        for rel_dict in kg_edges:
-            subject_curie = rel_dict['subject']
-            object_curie = rel_dict['object']
-            if subject_curie in nodes_list and object_curie in nodes_list:
-                ctr_edges_added += 1
-                edge_key =rel_dict["id"]
-                if edge_key not in edge_keys:
-                    edge_keys.add(edge_key)
+        # edges are checked against the ID indexes in batches, so that the
+        # hash lookups are vectorized
+        while True:
+            rel_dicts = list(itertools.islice(kg_edges, kg2_util.HashedIDSet.BATCH_SIZE))
+            if len(rel_dicts) == 0:
+                break
+            num_rel_dicts = len(rel_dicts)
+            rel_positions = list(itertools.islice(kg_edges_positions, num_rel_dicts))
+            kept_positions = []
+            orphan_positions = []
+            nodes_found = node_ids.contains_many([rel_dict['subject'] for rel_dict in rel_dicts] +
+                                                 [rel_dict['object'] for rel_dict in rel_dicts])
+            kept_rel_dicts = []
+            kept_rel_positions = []
+            for rel_dict, rel_position, subject_found, object_found in zip(rel_dicts,
+                                                                           rel_positions,
+                                                                           nodes_found[:num_rel_dicts],
+                                                                           nodes_found[num_rel_dicts:]):
+                if subject_found and object_found:
+                    kept_rel_dicts.append(rel_dict)
+                    kept_rel_positions.append(rel_position)
+                else:
+                    orphan_output.write(rel_dict)
+                    orphan_positions.append(rel_position)
+                    num_orphan_edges[file_index] += 1
+            num_edges_added[file_index] += len(kept_rel_dicts)
+            edges_new = edge_keys.add_many([rel_dict['id'] for rel_dict in kept_rel_dicts])
+            for rel_dict, rel_position, edge_new in zip(kept_rel_dicts, kept_rel_positions, edges_new):
+                if edge_new:
                     edges_output.write(rel_dict)
-            else:
-                orphan_output.write(rel_dict)
-                kg_orphan_edges_count += 1
+                    kept_positions.append(rel_position)
+            if output_positions_files is not None:
+                write_positions(kept_positions, output_positions_files[0])
+                write_positions(orphan_positions, output_positions_files[1])
 
         kg2_util.end_read_jsonlines(edges_read_jsonlines_info)
 
-        kg2_util.log_message("number of edges added: " + str(ctr_edges_added - last_edges_added),
-                             ontology_name=kg_edges_file_name,
-                             output_stream=sys.stderr)
-        last_edges_added = ctr_edges_added
-        kg2_util.log_message("number of orphan edges: " + str(kg_orphan_edges_count -
-                                                              last_orphan_edges),
-                             ontology_name=kg_edges_file_name,
-                             output_stream=sys.stderr)
-        last_orphan_edges = kg_orphan_edges_count
+        if kg_edges_positions_file_names is None:
+            log_counts([kg_edges_file_name], [num_edges_added[file_index]], "edges added")
+            log_counts([kg_edges_file_name], [num_orphan_edges[file_index]], "orphan edges")
+    return num_edges_added, num_orphan_edges
+
+
+def get_positions_file_name(file_name: str):
+    return file_name + '.positions'
+
+
+def partition_file(partition_args: tuple):
+    # each line goes to its shard's piece of the file, and its position in
+    # the input goes to the piece's positions file; the input file is
+    # decompressed if its name ends in ".gz" or ".zst" (or ".zip")
+    (input_file_name, file_index, shard_file_names, id_key) = partition_args
+    num_shards = len(shard_file_names)
+    shard_files = [open(shard_file_name, 'wb') for shard_file_name in shard_file_names]
+    positions_files = [open(get_positions_file_name(shard_file_name), 'wb') for shard_file_name in shard_file_names]
+    shard_positions = [[] for shard in range(num_shards)]
+    position = file_index << POSITION_FILE_INDEX_SHIFT
+    with kg2_util.open_compressed_or_plain_file(input_file_name) as input_file:
+        for line in input_file:
+            if line.strip() == b'':
+                continue
+            if not line.endswith(b'\n'):
+                line += b'\n'
+            shard = get_shard(json.loads(line)[id_key], num_shards)
+            shard_files[shard].write(line)
+            shard_positions[shard].append(position)
+            position += 1
+            if len(shard_positions[shard]) >= POSITIONS_BLOCK_SIZE:
+                write_positions(shard_positions[shard], positions_files[shard])
+    for shard in range(num_shards):
+        write_positions(shard_positions[shard], positions_files[shard])
+        shard_files[shard].close()
+        positions_files[shard].close()
+
+
+def partition_files(input_file_names: list, kind: str, num_shards: int,
+                    shard_dir: str, pool):
+    # returns, for each shard, the list of that shard's pieces of the input
+    # files, in the same order as the input files; nodes and edges are both
+    # sharded on their 'id' field
+    shard_file_names = [[os.path.join(shard_dir, kind + '-shard' + str(shard) + '-' + str(file_index) + '.jsonl')
+                         for file_index in range(len(input_file_names))]
+                        for shard in range(num_shards)]
+    pool.map(partition_file,
+             [(input_file_name, file_index, [shard_file_names[shard][file_index] for shard in range(num_shards)], 'id')
+              for file_index, input_file_name in enumerate(input_file_names)])
+    return shard_file_names
+
+
+def merge_files_by_position(file_names: list, output_file_name: str, temp_dir: str = None):
+    # merges the lines of the shards' output files into the order of their
+    # positions in the input; the output file is compressed if its name ends
+    # in ".gz" or ".zst"
+    def read_positioned_lines(file_name: str):
+        with open(file_name, 'rb') as file:
+            yield from zip(read_positions(get_positions_file_name(file_name)), file)
+    temp_output_file_name = tempfile.mkstemp(prefix=kg2_util.TEMP_FILE_PREFIX + '-', dir=temp_dir)[1]
+    with open(temp_output_file_name, 'wb', buffering=kg2_util.JSONLINES_BUFFER_SIZE) as output_file:
+        for _, line in heapq.merge(*[read_positioned_lines(file_name) for file_name in file_names],
+                                   key=lambda positioned_line: positioned_line[0]):
+            output_file.write(line)
+    if output_file_name.endswith(kg2_util.COMPRESSED_FILE_SUFFIXES):
+        kg2_util.compress_file(temp_output_file_name, output_file_name)
+        os.remove(temp_output_file_name)
+    else:
+        shutil.move(temp_output_file_name, output_file_name)
+
+
+def merge_node_shard(shard_args: tuple):
+    (shard_file_names, output_nodes_file_name, output_node_ids_file_name, test_mode) = shard_args
+    nodes_info = kg2_util.create_single_jsonlines(test_mode)
+    node_ids = set()
+    num_nodes_added = merge_nodes_in_memory(shard_file_names, nodes_info[0], node_ids,
+                                            [get_positions_file_name(file_name) for file_name in shard_file_names],
+                                            get_positions_file_name(output_nodes_file_name))
+    kg2_util.close_single_jsonlines(nodes_info, output_nodes_file_name)
+    with open(output_node_ids_file_name, 'w') as output_node_ids_file:
+        for node_id in node_ids:
+            output_node_ids_file.write(json.dumps(node_id) + '\n')
+    return num_nodes_added
+
+
+def read_node_ids(node_ids_file_names: list):
+    for node_ids_file_name in node_ids_file_names:
+        with open(node_ids_file_name, 'r') as node_ids_file:
+            for line in node_ids_file:
+                yield json.loads(line)
 
-    kg2_util.close_kg2_jsonlines(nodes_info, edges_info, output_nodes_file_name, output_edges_file_name)
+
+def merge_edge_shard(shard_args: tuple):
+    (shard_file_names, output_edges_file_name, orphan_edges_file_name,
+     test_mode, exact_id_index, temp_dir) = shard_args
+    edges_info = kg2_util.create_single_jsonlines(test_mode)
+    orphan_info = kg2_util.create_single_jsonlines(test_mode)
+    edge_keys = kg2_util.HashedIDSet(exact=exact_id_index, temp_dir=temp_dir)
+    num_node_id_collisions = SHARED_NODE_IDS.num_collisions
+    with open(get_positions_file_name(output_edges_file_name), 'wb') as edges_positions_file, \
+         open(get_positions_file_name(orphan_edges_file_name), 'wb') as orphan_positions_file:
+        counts = merge_edges(shard_file_names, SHARED_NODE_IDS, edge_keys, edges_info[0], orphan_info[0],
+                             [get_positions_file_name(file_name) for file_name in shard_file_names],
+                             (edges_positions_file, orphan_positions_file))
+    collisions = (SHARED_NODE_IDS.num_collisions - num_node_id_collisions,
+                  edge_keys.num_collisions,
+                  edge_keys.expected_num_collisions())
+    edge_keys.close()
+    kg2_util.close_single_jsonlines(edges_info, output_edges_file_name)
     kg2_util.close_single_jsonlines(orphan_info, orphan_edges_file_name)
+    return counts, collisions
+
+
+def merge_sharded(kg_nodes_file_names: list, kg_edges_file_names: list,
+                  output_nodes_file_name: str, output_edges_file_name: str,
+                  orphan_edges_file_name: str, num_shards: int, test_mode: bool,
+                  exact_id_index: bool, temp_dir: str = None):
+    global SHARED_NODE_IDS
+    shard_dir = tempfile.mkdtemp(prefix=kg2_util.TEMP_FILE_PREFIX + '-shards-', dir=temp_dir)
+    mp_context = multiprocessing.get_context('fork')
+    try:
+        with mp_context.Pool(num_shards) as pool:
+            node_shard_file_names = partition_files(kg_nodes_file_names, 'nodes', num_shards, shard_dir, pool)
+            edge_shard_file_names = partition_files(kg_edges_file_names, 'edges', num_shards, shard_dir, pool)
+            merged_nodes_file_names = [os.path.join(shard_dir, 'merged-nodes-' + str(shard) + '.jsonl')
+                                       for shard in range(num_shards)]
+            node_ids_file_names = [os.path.join(shard_dir, 'node-ids-' + str(shard) + '.jsonl')
+                                   for shard in range(num_shards)]
+            shard_num_nodes_added = pool.map(merge_node_shard,
+                                             [(node_shard_file_names[shard], merged_nodes_file_names[shard],
+                                               node_ids_file_names[shard], test_mode)
+                                              for shard in range(num_shards)])
+        # each node ID is in only one shard, so the counts are summed over
+        # the shards
+        log_counts(kg_nodes_file_names, numpy.sum(shard_num_nodes_added, axis=0).tolist(), "nodes added")
+        merge_files_by_position(merged_nodes_file_names, output_nodes_file_name, temp_dir)
+
+        # the node-ID index is built in this process, so that the edge-shard
+        # workers (which are forked after this point) all share it
+        SHARED_NODE_IDS = kg2_util.HashedIDSet(read_node_ids(node_ids_file_names),
+                                               exact=exact_id_index, temp_dir=temp_dir)
+        merged_edges_file_names = [os.path.join(shard_dir, 'merged-edges-' + str(shard) + '.jsonl')
+                                   for shard in range(num_shards)]
+        orphan_edges_file_names = [os.path.join(shard_dir, 'orphan-edges-' + str(shard) + '.jsonl')
+                                   for shard in range(num_shards)]
+        with mp_context.Pool(num_shards) as pool:
+            shard_results = pool.map(merge_edge_shard,
+                                     [(edge_shard_file_names[shard], merged_edges_file_names[shard],
+                                       orphan_edges_file_names[shard], test_mode, exact_id_index, temp_dir)
+                                      for shard in range(num_shards)])
+        shard_counts = [counts for counts, _ in shard_results]
+        shard_collisions = [collisions for _, collisions in shard_results]
+        for kg_edges_file_name, num_edges_added, num_orphan_edges in \
+                zip(kg_edges_file_names,
+                    numpy.sum([counts[0] for counts in shard_counts], axis=0).tolist(),
+                    numpy.sum([counts[1] for counts in shard_counts], axis=0).tolist()):
+            log_counts([kg_edges_file_name], [num_edges_added], "edges added")
+            log_counts([kg_edges_file_name], [num_orphan_edges], "orphan edges")
+        # each edge ID is in only one shard, so the collisions are summed
+        # over the shards' edge-ID indexes
+        kg2_util.log_hash_collisions("node IDs", exact_id_index,
+                                     SHARED_NODE_IDS.num_collisions + sum(collisions[0] for collisions in shard_collisions),
+                                     SHARED_NODE_IDS.expected_num_collisions())
+        kg2_util.log_hash_collisions("edge IDs", exact_id_index,
+                                     sum(collisions[1] for collisions in shard_collisions),
+                                     sum(collisions[2] for collisions in shard_collisions))
+        SHARED_NODE_IDS.close()
+        SHARED_NODE_IDS = None
+        merge_files_by_position(merged_edges_file_names, output_edges_file_name, temp_dir)
+        merge_files_by_position(orphan_edges_file_names, orphan_edges_file_name, temp_dir)
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    arg_parser = make_arg_parser()
+    args = arg_parser.parse_args()
+    if args.log_summary_interval is not None or args.log_detail_file is not None:
+        kg2_util.start_log_sink(args.log_summary_interval if args.log_summary_interval is not None
+                                else kg2_util.LOG_SUMMARY_INTERVAL_SEC,
+                                args.log_detail_file)
+    kg_nodes_file_names = args.kgNodesFiles
+    kg_edges_file_names = args.kgEdgesFiles
+    test_mode = args.test
+    output_nodes_file_name = args.outputNodesFile
+    output_edges_file_name = args.outputEdgesFile
+    orphan_edges_file_name = args.kgFileOrphanEdges
+    temp_dir = args.temp_dir
+    exact_id_index = args.exact_id_index
+    num_shards = args.num_shards
+
+    if num_shards > 1 and args.external_merge:
+        arg_parser.error("--externalMerge cannot be combined with --numShards")
+
+    if args.source_priority_file is not None:
+        source_priority = yaml.safe_load(open(args.source_priority_file, 'r'))
+        kg_nodes_file_names = order_files_by_source_priority(kg_nodes_file_names, source_priority)
+        kg_edges_file_names = order_files_by_source_priority(kg_edges_file_names, source_priority)
+
+    if num_shards > 1:
+        merge_sharded(kg_nodes_file_names, kg_edges_file_names,
+                      output_nodes_file_name, output_edges_file_name,
+                      orphan_edges_file_name, num_shards, test_mode,
+                      exact_id_index, temp_dir)
+    else:
+        nodes_info, edges_info = kg2_util.create_kg2_jsonlines(test_mode)
+        nodes_output = nodes_info[0]
+        edges_output = edges_info[0]
+
+        orphan_info = kg2_util.create_single_jsonlines(test_mode)
+        orphan_output = orphan_info[0]
+
+        node_ids = kg2_util.HashedIDSet(exact=exact_id_index, temp_dir=temp_dir)
+        if not args.external_merge:
+            merge_nodes_in_memory(kg_nodes_file_names, nodes_output, node_ids)
+        else:
+            merge_nodes_external(kg_nodes_file_names, nodes_output, node_ids,
+                                 args.external_merge_chunk_size, temp_dir)
+
+        edge_keys = kg2_util.HashedIDSet(exact=exact_id_index, temp_dir=temp_dir)
+        merge_edges(kg_edges_file_names, node_ids, edge_keys, edges_output, orphan_output)
+        node_ids.log_collisions("node IDs")
+        edge_keys.log_collisions("edge IDs")
+        node_ids.close()
+        edge_keys.close()
+
+        kg2_util.close_kg2_jsonlines(nodes_info, edges_info, output_nodes_file_name, output_edges_file_name)
+        kg2_util.close_single_jsonlines(orphan_info, orphan_edges_file_name)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+''' benchmark_curie_mappers.py: times the prefixcommons-based IRI/CURIE
+        mappers (kg2_util.shorten_iri_to_curie and expand_curie_to_iri)
+        against the mappers from kg2_util.make_uri_curie_mappers (which use
+        kg2_util.CURIEMapper), on the node IRIs and CURIE IDs of KG2 nodes
+        files (e.g., kg2-ont-nodes.jsonl), and checks that they agree
+
+    Usage: benchmark_curie_mappers.py [--numCalls <N>] <curiesToURLsMap.yaml>
+                                      <nodesFile1.jsonl> ... <nodesFileN.jsonl>
+'''
+
+__author__ = ''
+__copyright__ = ''
+__credits__ = []
+__license__ = 'MIT'
+__version__ = '0.1.0'
+__maintainer__ = ''
+__email__ = ''
+__status__ = 'Prototype'
+
+import argparse
+import inspect
+import itertools
+import os
+import sys
+import time
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+import kg2_util
+
+
+def make_arg_parser():
+    arg_parser = argparse.ArgumentParser(description='benchmark_curie_mappers.py: times the KG2 IRI/CURIE mappers')
+    arg_parser.add_argument('--numCalls', dest='num_calls', type=int, default=2000000)
+    arg_parser.add_argument('curiesToURLsMapFile', type=str)
+    arg_parser.add_argument('nodesFiles', type=str, nargs='+')
+    return arg_parser
+
+
+def read_iris_and_curies(nodes_file_names: list, num_calls: int):
+    iris = []
+    curie_ids = []
+    for nodes_file_name in nodes_file_names:
+        read_jsonlines_info = kg2_util.start_read_jsonlines(nodes_file_name)
+        for node in read_jsonlines_info[0]:
+            if node.get('iri', None) is not None:
+                iris.append(node['iri'])
+            curie_ids.append(node['id'])
+            if len(curie_ids) >= num_calls:
+                break
+        kg2_util.end_read_jsonlines(read_jsonlines_info)
+    # repeat the inputs as needed, to make up the requested number of calls
+    iris = list(itertools.islice(itertools.cycle(iris), num_calls))
+    curie_ids = list(itertools.islice(itertools.cycle(curie_ids), num_calls))
+    return iris, curie_ids
+
+
+def time_mapper(mapper: callable, inputs: list):
+    start = time.perf_counter()
+    results = [mapper(input) for input in inputs]
+    return results, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    args = make_arg_parser().parse_args()
+    iris, curie_ids = read_iris_and_curies(args.nodesFiles, args.num_calls)
+    print("IRIs: " + str(len(iris)) + " (" + str(len(set(iris))) + " distinct); CURIE IDs: " +
+          str(len(curie_ids)) + " (" + str(len(set(curie_ids))) + " distinct)", file=sys.stderr)
+
+    yaml_string = kg2_util.read_file_to_string(args.curiesToURLsMapFile)
+    expand_map = kg2_util.make_curies_to_uri_map(yaml_string, kg2_util.IDMapperType.EXPAND)
+    contract_map = kg2_util.make_curies_to_uri_map(yaml_string, kg2_util.IDMapperType.CONTRACT)
+    uncached_mapper = kg2_util.CURIEMapper(expand_map, contract_map)
+    map_dict = kg2_util.make_uri_curie_mappers(args.curiesToURLsMapFile)
+
+    for (operation, inputs, engines) in \
+        (('contract', iris,
+          (('prefixcommons', kg2_util.make_uri_to_curie_shortener(contract_map)),
+           ('trie', uncached_mapper.shorten_iri_to_curie_uncached),
+           ('trie+cache', map_dict['contract']))),
+         ('expand', curie_ids,
+          (('prefixcommons', kg2_util.make_curie_to_uri_expander(expand_map)),
+           ('dict', uncached_mapper.expand_curie_to_iri_uncached),
+           ('dict+cache', map_dict['expand'])))):
+        reference_results = None
+        for (engine_name, engine) in engines:
+            results, elapsed = time_mapper(engine, inputs)
+            print(operation + " [" + engine_name + "]: " + "{0:.2f}".format(elapsed) + " s; " +
+                  "{0:.2f}".format(1e6 * elapsed / len(inputs)) + " us per call", file=sys.stderr)
+            if reference_results is None:
+                reference_results = results
+            else:
+                assert results == reference_results, \
+                    "the " + engine_name + " mapper gave different results for: " + operation
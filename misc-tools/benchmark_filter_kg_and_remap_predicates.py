@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+''' benchmark_filter_kg_and_remap_predicates.py: times the per-edge predicate
+        remapping of filter_kg_and_remap_predicates.py as it was done before
+        the predicate-remap config was compiled into a remap table (looking up
+        and re-deriving the remap info, and re-splitting the edge ID, for
+        every edge) against filter_kg_and_remap_predicates.remap_edges, on a
+        sample of KG2 edges (the edges files are re-read as needed to make up
+        the requested number of edges), and checks that they agree
+
+    Usage: benchmark_filter_kg_and_remap_predicates.py [--numEdges <N>] [--numCheckEdges <N>]
+                                                       <predicate-remap.yaml>
+                                                       <kg2-provided-by-curie-to-infores-curie.yaml>
+                                                       <curies-to-urls-map.yaml>
+                                                       <nodesFile.jsonl>
+                                                       <edgesFile1.jsonl> ... <edgesFileN.jsonl>
+'''
+
+__author__ = ''
+__copyright__ = ''
+__credits__ = []
+__license__ = 'MIT'
+__version__ = '0.1.0'
+__maintainer__ = ''
+__email__ = ''
+__status__ = 'Prototype'
+
+import argparse
+import contextlib
+import inspect
+import io
+import itertools
+import os
+import sys
+import time
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+import filter_kg_and_remap_predicates
+import kg2_util
+
+DROP_SELF_EDGES_EXCEPT = {'interacts_with', 'positively_regulates', 'inhibits', 'increase'}
+
+
+def make_arg_parser():
+    arg_parser = argparse.ArgumentParser(description='benchmark_filter_kg_and_remap_predicates.py: times the KG2 predicate remapping')
+    arg_parser.add_argument('--numEdges', dest='num_edges', type=int, default=10000000)
+    arg_parser.add_argument('--numCheckEdges', dest='num_check_edges', type=int, default=1000000)
+    arg_parser.add_argument('predicateRemapYaml', type=str)
+    arg_parser.add_argument('inforesRemapYaml', type=str)
+    arg_parser.add_argument('curiesToURIFile', type=str)
+    arg_parser.add_argument('nodesFile', type=str)
+    arg_parser.add_argument('edgesFiles', type=str, nargs='+')
+    return arg_parser
+
+
+def read_edges(edges_file_names: list):
+    # re-reads the edges files for as long as edges are requested (the
+    # remapping modifies each edge, so the edges cannot be reused)
+    while True:
+        for edges_file_name in edges_file_names:
+            read_jsonlines_info = kg2_util.start_read_jsonlines(edges_file_name)
+            yield from read_jsonlines_info[0]
+            kg2_util.end_read_jsonlines(read_jsonlines_info)
+
+
+class EdgesCounter:
+    def __init__(self):
+        self.num_edges = 0
+
+    def write(self, edge_dict: dict):
+        self.num_edges += 1
+
+
+class EdgesCollector:
+    def __init__(self):
+        self.edges = []
+
+    def write(self, edge_dict: dict):
+        self.edges.append(edge_dict)
+
+
+def remap_edges_uncompiled(edges, infores_remap_config, predicate_remap_config, curie_to_uri_expander,
+                           edges_output, drop_self_edges_except, nodes, drop_negated=False):
+    # the edges loop of filter_kg_and_remap_predicates.process_edges before
+    # the predicate-remap config was compiled into a remap table
+    source_predicate_curies_not_in_config = set()
+    source_predicate_curies_not_in_nodes = set()
+    knowledge_source_curies_not_in_config_edges = set()
+    record_of_source_predicate_curie_occurrences = {source_predicate_curie: False for source_predicate_curie in predicate_remap_config.keys()}
+
+    for edge_dict in edges:
+        if drop_negated and edge_dict['negated']:
+            continue
+        source_predicate_label = edge_dict['relation_label']
+        predicate_label = source_predicate_label
+        if edge_dict.get('source_predicate') is None:
+            edge_dict['source_predicate'] = edge_dict.pop('original_predicate')
+        source_predicate_curie = edge_dict['source_predicate']
+        predicate_curie = source_predicate_curie
+
+        core_predicate_curie = None
+
+        if record_of_source_predicate_curie_occurrences.get(source_predicate_curie, None) is not None:
+            record_of_source_predicate_curie_occurrences[source_predicate_curie] = True
+            pred_remap_info = predicate_remap_config.get(source_predicate_curie, None)
+        else:
+            source_predicate_curies_not_in_config.add(source_predicate_curie)
+            pred_remap_info = {'operation': 'keep'}
+
+        assert pred_remap_info is not None, f"Edge {edge_dict} missing {pred_remap_info}"
+
+        invert = False
+        get_new_rel_info = False
+
+        operation = pred_remap_info.get('operation', None)
+        if operation == "delete":
+            continue
+        get_new_rel_info = True
+        if operation == "invert":
+            invert = True
+        elif pred_remap_info.get("core_predicate") is None:
+            assert operation == "keep"
+            get_new_rel_info = False
+
+        qualified_predicate = None
+        qualified_object_aspect = None
+        qualified_object_direction = None
+
+        if get_new_rel_info:
+            assert pred_remap_info.get("core_predicate") is not None
+            core_predicate_curie = pred_remap_info.get("core_predicate")
+            qualified_predicate = pred_remap_info.get("qualified_predicate", None)
+            qualifiers = pred_remap_info.get("qualifiers", None)
+            if qualifiers is not None:
+                qualifiers_dict = qualifiers
+                qualified_object_aspect = qualifiers_dict.get("object_aspect", None)
+                qualified_object_direction = qualifiers_dict.get("object_direction", None)
+            if qualified_object_aspect is not None and qualified_object_direction is not None and \
+                    qualifiers is None:
+                assert qualified_predicate is not None, f"Qualifier but not qualified predicate {edge_dict}"
+        if invert:
+            edge_dict['relation_label'] = 'INVERTED:' + source_predicate_label
+            new_object = edge_dict['subject']
+            edge_dict['subject'] = edge_dict['object']
+            edge_dict['object'] = new_object
+        edge_dict["predicate_label"] = predicate_label
+        if drop_self_edges_except is not None and \
+                edge_dict['subject'] == edge_dict['object'] and \
+                predicate_label not in drop_self_edges_except:
+            continue
+        edge_dict['predicate'] = predicate_curie
+        edge_dict['qualified_predicate'] = qualified_predicate
+        edge_dict['qualified_object_aspect'] = qualified_object_aspect
+        edge_dict['qualified_object_direction'] = qualified_object_direction
+        if core_predicate_curie is None and predicate_curie.startswith(kg2_util.CURIE_PREFIX_BIOLINK + ":"):
+            core_predicate_curie = predicate_curie
+        edge_dict['predicate'] = core_predicate_curie
+        edge_id = edge_dict["id"]
+        new_edge_id = filter_kg_and_remap_predicates.update_edge_id(edge_id, qualified_predicate,
+                                                                    qualified_object_aspect,
+                                                                    qualified_object_direction)
+        edge_dict["id"] = new_edge_id
+
+        if predicate_curie not in nodes:
+            predicate_curie_prefix = predicate_curie.split(':')[0]
+            predicate_uri_prefix = curie_to_uri_expander(predicate_curie_prefix + ':')
+            if predicate_uri_prefix == predicate_curie_prefix:
+                source_predicate_curies_not_in_nodes.add(predicate_curie)
+        if edge_dict.get("primary_knowledge_source") is None:
+            edge_dict["primary_knowledge_source"] = edge_dict.pop("knowledge_source")
+        primary_knowledge_source = edge_dict["primary_knowledge_source"]
+        infores_curie_dict = infores_remap_config.get(primary_knowledge_source, None)
+        if infores_curie_dict is None:
+            knowledge_source_curies_not_in_config_edges.add(primary_knowledge_source)
+        else:
+            infores_curie = infores_curie_dict['infores_curie']
+            edge_dict['primary_knowledge_source'] = infores_curie
+
+        edge_subject = edge_dict['subject']
+        edge_object = edge_dict['object']
+
+        edge_key = f"{edge_subject} /// {predicate_curie} /// {qualified_predicate} /// {qualified_object_aspect} /// {qualified_object_direction} /// {edge_object} /// {primary_knowledge_source}"
+
+        edges_output.write(edge_dict)
+
+    return (record_of_source_predicate_curie_occurrences,
+            source_predicate_curies_not_in_nodes,
+            source_predicate_curies_not_in_config,
+            knowledge_source_curies_not_in_config_edges)
+
+
+def no_remap_edges(edges, infores_remap_config, predicate_remap_config, curie_to_uri_expander,
+                   edges_output, drop_self_edges_except, nodes, drop_negated=False):
+    # just reads the edges, to time the JSON parsing that the engines share
+    for edge_dict in edges:
+        edges_output.write(edge_dict)
+
+
+def run_engine(engine: callable, edges, remap_args: tuple, edges_output):
+    # the engines print progress messages to stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        ret = engine(edges, *remap_args[:3], edges_output, *remap_args[3:])
+        elapsed = time.perf_counter() - start
+    return ret, elapsed
+
+
+if __name__ == '__main__':
+    args = make_arg_parser().parse_args()
+    predicate_remap_config = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(args.predicateRemapYaml))
+    infores_remap_config = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(args.inforesRemapYaml))
+    curie_to_uri_expander = kg2_util.make_uri_curie_mappers(args.curiesToURIFile)['expand']
+    read_jsonlines_info = kg2_util.start_read_jsonlines(args.nodesFile)
+    nodes = {node['id'] for node in read_jsonlines_info[0]}
+    kg2_util.end_read_jsonlines(read_jsonlines_info)
+    remap_args = (infores_remap_config, predicate_remap_config, curie_to_uri_expander,
+                  DROP_SELF_EDGES_EXCEPT, nodes, True)
+
+    engines = (('uncompiled', remap_edges_uncompiled),
+               ('compiled', filter_kg_and_remap_predicates.remap_edges))
+
+    reference_results = None
+    for engine_name, engine in engines:
+        edges_output = EdgesCollector()
+        ret, _ = run_engine(engine, itertools.islice(read_edges(args.edgesFiles), args.num_check_edges),
+                            remap_args, edges_output)
+        results = (ret, edges_output.edges)
+        if reference_results is None:
+            reference_results = results
+        else:
+            assert results == reference_results, \
+                "the " + engine_name + " remapping gave different results"
+    print("checked " + str(args.num_check_edges) + " edges; edges kept: " + str(len(reference_results[1])),
+          file=sys.stderr)
+    reference_results = None
+
+    timings = dict()
+    for engine_name, engine in (('read only', no_remap_edges),) + engines:
+        edges_output = EdgesCounter()
+        _, timings[engine_name] = run_engine(engine, itertools.islice(read_edges(args.edgesFiles), args.num_edges),
+                                             remap_args, edges_output)
+        print(engine_name + ": " + "{0:.2f}".format(timings[engine_name]) + " s", file=sys.stderr)
+    remap_times = {engine_name: timings[engine_name] - timings['read only'] for engine_name, _ in engines}
+    for engine_name, remap_time in remap_times.items():
+        print(engine_name + " (excluding reading): " + "{0:.2f}".format(remap_time) + " s; " +
+              "{0:.3f}".format(1e6 * remap_time / args.num_edges) + " us per edge", file=sys.stderr)
+    print("speedup (excluding reading): " + "{0:.1f}".format(remap_times['uncompiled'] / remap_times['compiled']) + "x",
+          file=sys.stderr)
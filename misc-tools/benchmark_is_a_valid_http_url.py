@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+''' benchmark_is_a_valid_http_url.py: times the validators-based URL check
+        that kg2_util.is_a_valid_http_url used to make (with and without a
+        per-string cache) against the current prefix-based check, on the node
+        IDs, IRIs and edge predicates of KG2 JSON Lines files (e.g.,
+        kg2-ont-nodes.jsonl and kg2-ont-edges.jsonl), and checks that they agree
+
+    Usage: benchmark_is_a_valid_http_url.py [--numCalls <N>]
+                                            <kgFile1.jsonl> ... <kgFileN.jsonl>
+'''
+
+__author__ = ''
+__copyright__ = ''
+__credits__ = []
+__license__ = 'MIT'
+__version__ = '0.1.0'
+__maintainer__ = ''
+__email__ = ''
+__status__ = 'Prototype'
+
+import argparse
+import functools
+import inspect
+import itertools
+import os
+import sys
+import time
+import validators
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+import kg2_util
+
+ID_KEYS = ('id', 'iri', 'predicate', 'subject', 'object')
+
+
+def make_arg_parser():
+    arg_parser = argparse.ArgumentParser(description='benchmark_is_a_valid_http_url.py: times the KG2 URL checks')
+    arg_parser.add_argument('--numCalls', dest='num_calls', type=int, default=2000000)
+    arg_parser.add_argument('kgFiles', type=str, nargs='+')
+    return arg_parser
+
+
+def read_ids(kg_file_names: list, num_calls: int):
+    ids = []
+    for kg_file_name in kg_file_names:
+        read_jsonlines_info = kg2_util.start_read_jsonlines(kg_file_name)
+        for record in read_jsonlines_info[0]:
+            ids += [record[key] for key in ID_KEYS if isinstance(record.get(key, None), str)]
+            if len(ids) >= num_calls:
+                break
+        kg2_util.end_read_jsonlines(read_jsonlines_info)
+    # repeat the inputs as needed, to make up the requested number of calls
+    return list(itertools.islice(itertools.cycle(ids), num_calls))
+
+
+def is_a_valid_http_url_validators(id: str) -> bool:
+    # the check that kg2_util.is_a_valid_http_url made before it was
+    # reduced to a prefix check
+    valid = True
+    try:
+        validators.url(id)
+        valid = id.startswith('http://') or id.startswith('https://')
+    except validators.ValidationFailure:
+        valid = False
+    return valid
+
+
+def time_checker(checker: callable, inputs: list):
+    start = time.perf_counter()
+    results = [checker(input) for input in inputs]
+    return results, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    args = make_arg_parser().parse_args()
+    ids = read_ids(args.kgFiles, args.num_calls)
+    print("IDs: " + str(len(ids)) + " (" + str(len(set(ids))) + " distinct)", file=sys.stderr)
+
+    reference_results = None
+    for (engine_name, engine) in (('validators', is_a_valid_http_url_validators),
+                                  ('validators+cache', functools.lru_cache(maxsize=None)(is_a_valid_http_url_validators)),
+                                  ('prefix', kg2_util.is_a_valid_http_url)):
+        results, elapsed = time_checker(engine, ids)
+        print(engine_name + ": " + "{0:.2f}".format(elapsed) + " s; " +
+              "{0:.3f}".format(1e6 * elapsed / len(ids)) + " us per call", file=sys.stderr)
+        if reference_results is None:
+            reference_results = results
+        else:
+            assert results == reference_results, \
+                "the " + engine_name + " check gave different results"
+    print("URLs: " + str(sum(reference_results)) + " of " + str(len(reference_results)), file=sys.stderr)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+''' benchmark_jsonlines_backends.py: runs the Merge, Stats, Simplify, Slim,
+        and TSV steps of the KG2 build (as the Snakemake rules in
+        Snakefile-post-etl run them) on a set of KG2 nodes and edges files,
+        once with each kg2_util JSON Lines backend (and, optionally, with
+        compressed intermediate files), and prints a table of the run times
+        of the steps, in the format of JSONLines_Time_Comparison.md
+
+    Usage: benchmark_jsonlines_backends.py [--backends json,orjson] [--compression <none|gz|zst>]
+                                           [--workDir <dir>]
+                                           --kgNodesFiles <nodesFile1.jsonl> ... <nodesFileN.jsonl>
+                                           --kgEdgesFiles <edgesFile1.jsonl> ... <edgesFileN.jsonl>
+'''
+
+__author__ = ''
+__copyright__ = ''
+__credits__ = []
+__license__ = 'MIT'
+__version__ = '0.1.0'
+__maintainer__ = ''
+__email__ = ''
+__status__ = 'Prototype'
+
+import argparse
+import datetime
+import inspect
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+import kg2_util
+
+RULES = ('Merge', 'Stats', 'Simplify', 'Slim', 'TSV')
+
+
+def make_arg_parser():
+    arg_parser = argparse.ArgumentParser(description='benchmark_jsonlines_backends.py: times the KG2 post-ETL steps with each JSON Lines backend')
+    arg_parser.add_argument('--backends', dest='backends', type=str,
+                            default=kg2_util.JSONLINES_BACKEND_JSON + ',' + kg2_util.JSONLINES_BACKEND_ORJSON)
+    arg_parser.add_argument('--compression', dest='compression', type=str, default='none',
+                            choices=['none', 'gz', 'zst'])
+    arg_parser.add_argument('--workDir', dest='work_dir', type=str, default=None)
+    arg_parser.add_argument('--predicateRemapYaml', dest='predicate_remap_yaml', type=str,
+                            default=os.path.join(parentdir, 'predicate-remap.yaml'))
+    arg_parser.add_argument('--inforesRemapYaml', dest='infores_remap_yaml', type=str,
+                            default=os.path.join(parentdir, 'kg2-provided-by-curie-to-infores-curie.yaml'))
+    arg_parser.add_argument('--curiesToURIFile', dest='curies_to_uri_file', type=str,
+                            default=os.path.join(parentdir, 'curies-to-urls-map.yaml'))
+    arg_parser.add_argument('--kgNodesFiles', type=str, nargs='+', required=True)
+    arg_parser.add_argument('--kgEdgesFiles', type=str, nargs='+', required=True)
+    return arg_parser
+
+
+def make_rule_commands(args, run_dir: str):
+    # the commands of the rules, in an order in which each rule's inputs are
+    # made by the rules before it
+    suffix = '.jsonl' + ('' if args.compression == 'none' else '.' + args.compression)
+    python = [sys.executable, '-u']
+    merged_nodes = os.path.join(run_dir, 'kg2-merged-nodes' + suffix)
+    merged_edges = os.path.join(run_dir, 'kg2-merged-edges' + suffix)
+    simplified_nodes = os.path.join(run_dir, 'kg2-simplified-nodes' + suffix)
+    simplified_edges = os.path.join(run_dir, 'kg2-simplified-edges' + suffix)
+    version_file_name = os.path.join(run_dir, 'kg2-version.txt')
+    with open(version_file_name, 'w') as version_file:
+        version_file.write('0.0\n')
+    tsv_dir = os.path.join(run_dir, 'TSV')
+    os.makedirs(tsv_dir, exist_ok=True)
+    return {'Merge': python + [os.path.join(parentdir, 'merge_graphs.py'),
+                               '--kgFileOrphanEdges', os.path.join(run_dir, 'kg2-orphan-edges' + suffix),
+                               '--outputNodesFile', merged_nodes,
+                               '--outputEdgesFile', merged_edges,
+                               '--kgNodesFiles'] + args.kgNodesFiles + ['--kgEdgesFiles'] + args.kgEdgesFiles,
+            'Stats': python + [os.path.join(parentdir, 'report_stats_on_kg_jsonl.py'),
+                               merged_nodes, merged_edges, os.path.join(run_dir, 'kg2-report.json')],
+            'Simplify': python + [os.path.join(parentdir, 'filter_kg_and_remap_predicates.py'),
+                                  '--dropNegated',
+                                  '--dropSelfEdgesExcept', 'interacts_with,regulates,inhibits,increase',
+                                  args.predicate_remap_yaml, args.infores_remap_yaml, args.curies_to_uri_file,
+                                  merged_nodes, merged_edges, simplified_nodes, simplified_edges,
+                                  version_file_name],
+            'Slim': python + [os.path.join(parentdir, 'slim_kg2.py'),
+                              simplified_nodes, simplified_edges,
+                              os.path.join(run_dir, 'kg2-slim-nodes' + suffix),
+                              os.path.join(run_dir, 'kg2-slim-edges' + suffix)],
+            'TSV': python + [os.path.join(parentdir, 'kg_json_to_tsv.py'),
+                             simplified_nodes, simplified_edges, args.infores_remap_yaml, tsv_dir]}
+
+
+def format_run_time(seconds: float):
+    return str(datetime.timedelta(seconds=round(seconds))).zfill(8)
+
+
+if __name__ == '__main__':
+    args = make_arg_parser().parse_args()
+    backends = args.backends.split(',')
+    work_dir = tempfile.mkdtemp(prefix=kg2_util.TEMP_FILE_PREFIX + '-benchmark-', dir=args.work_dir)
+    run_times = {backend: dict() for backend in backends}
+    try:
+        for backend in backends:
+            run_dir = os.path.join(work_dir, backend)
+            os.makedirs(run_dir)
+            env = dict(os.environ, **{kg2_util.JSONLINES_BACKEND_ENV_VAR: backend})
+            rule_commands = make_rule_commands(args, run_dir)
+            for rule in RULES:
+                with open(os.path.join(run_dir, rule + '.log'), 'w') as log_file:
+                    start = time.perf_counter()
+                    subprocess.run(rule_commands[rule], env=env, cwd=run_dir,
+                                   stdout=log_file, stderr=subprocess.STDOUT, check=True)
+                    run_times[backend][rule] = time.perf_counter() - start
+                print(backend + " " + rule + ": " + "{0:.1f}".format(run_times[backend][rule]) + " s",
+                      file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print('Snakemake Rule|' + '|'.join(backend + ' Run Time' for backend in backends))
+    print('--|' + '|'.join('--' for backend in backends))
+    for rule in RULES:
+        print(('`' + rule + '`').ljust(12) + '|' +
+              '|'.join(format_run_time(run_times[backend][rule]) for backend in backends))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+''' benchmark_merge_two_dicts.py: times kg2_util.merge_two_dicts against
+        kg2_util.merge_two_dicts_in_place on a sample of KG2 nodes files
+        (e.g., the UMLS and ontology nodes files, which have many duplicate
+        nodes), and checks that the two engines give the same merged nodes
+
+    Usage: benchmark_merge_two_dicts.py [--maxNodesPerFile <N>]
+                                        <nodesFile1.jsonl> ... <nodesFileN.jsonl>
+'''
+
+__author__ = ''
+__copyright__ = ''
+__credits__ = []
+__license__ = 'MIT'
+__version__ = '0.1.0'
+__maintainer__ = ''
+__email__ = ''
+__status__ = 'Prototype'
+
+import argparse
+import copy
+import inspect
+import itertools
+import os
+import sys
+import time
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+import kg2_util
+
+
+def make_arg_parser():
+    arg_parser = argparse.ArgumentParser(description='benchmark_merge_two_dicts.py: times the KG2 node-merging engines')
+    arg_parser.add_argument('--maxNodesPerFile', dest='max_nodes_per_file', type=int, default=1000000)
+    arg_parser.add_argument('nodesFiles', type=str, nargs='+')
+    return arg_parser
+
+
+def read_nodes(nodes_file_names: list, max_nodes_per_file: int):
+    nodes = []
+    for nodes_file_name in nodes_file_names:
+        read_jsonlines_info = kg2_util.start_read_jsonlines(nodes_file_name)
+        nodes += itertools.islice(read_jsonlines_info[0], max_nodes_per_file)
+        kg2_util.end_read_jsonlines(read_jsonlines_info)
+    return nodes
+
+
+def merge_with_copy(nodes: list):
+    merged = dict()
+    for node in nodes:
+        node_id = node['id']
+        if node_id not in merged:
+            merged[node_id] = node
+        else:
+            merged[node_id] = kg2_util.merge_two_dicts(merged[node_id], node)
+    return merged
+
+
+def merge_in_place(nodes: list):
+    merged = dict()
+    for node in nodes:
+        node_id = node['id']
+        if node_id not in merged:
+            merged[node_id] = node
+        else:
+            kg2_util.merge_two_dicts_in_place(merged[node_id], node)
+    for node in merged.values():
+        kg2_util.finish_merged_dict(node)
+    return merged
+
+
+if __name__ == '__main__':
+    args = make_arg_parser().parse_args()
+    nodes = read_nodes(args.nodesFiles, args.max_nodes_per_file)
+    num_distinct = len({node['id'] for node in nodes})
+    print("nodes read: " + str(len(nodes)) + "; distinct node IDs: " + str(num_distinct) +
+          "; duplicates: " + str(len(nodes) - num_distinct), file=sys.stderr)
+
+    results = dict()
+    timings = dict()
+    for engine_name, engine in (('merge_two_dicts', merge_with_copy),
+                                ('merge_two_dicts_in_place', merge_in_place)):
+        nodes_copy = copy.deepcopy(nodes)
+        start = time.perf_counter()
+        results[engine_name] = engine(nodes_copy)
+        timings[engine_name] = time.perf_counter() - start
+        print(engine_name + ": " + "{0:.2f}".format(timings[engine_name]) + " s", file=sys.stderr)
+
+    assert results['merge_two_dicts'] == results['merge_two_dicts_in_place'], \
+        "the two merge engines gave different results"
+    print("speedup: " + "{0:.1f}".format(timings['merge_two_dicts'] / timings['merge_two_dicts_in_place']) + "x",
+          file=sys.stderr)
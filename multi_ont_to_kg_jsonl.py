@@ -16,10 +16,19 @@ __status__ = 'Prototype'
 
 
 import argparse
+import hashlib
+import itertools
+import json
 import kg2_util
+import math
+import multiprocessing
+import multiprocessing.pool
 import ontobio
+import os
 import os.path
+import queue
 import re
+import subprocess
 import sys
 import urllib.parse
 import urllib.request
@@ -36,6 +45,7 @@ REGEX_YEAR_MONTH = re.compile('[12][90][0-9]{2}_([0-9]{1,2})')
 REGEX_PUBLICATIONS = re.compile(r'((?:(?:PMID)|(?:ISBN)):\d+)')
 REGEX_XREF_END_DESCRIP = re.compile(r'.*\[([^\]]+)\]$')
 REGEX_OBSOLETE = re.compile("^obsolete|\(obsolete|obsolete$", re.IGNORECASE)
+REGEX_JVM_MEMORY = re.compile('^([0-9]+)([kKmMgG]?)$')
 
 IRI_OBO_XREF = kg2_util.IRI_OBO_FORMAT_XREF
 CURIE_OBO_XREF = kg2_util.CURIE_ID_OBO_FORMAT_XREF
@@ -44,6 +54,20 @@ OWL_NOTHING = kg2_util.CURIE_ID_OWL_NOTHING
 
 NOCODE = 'NOCODE'
 MYSTERIOUS_BASE_NODE_ID_TO_FILTER = '_:genid'
+CATEGORY_CACHE_IN_PROGRESS = [None, None]
+JVM_MEMORY_UNIT_TO_GB = {'': 1.0 / (1 << 30),
+                         'k': 1.0 / (1 << 20),
+                         'm': 1.0 / (1 << 10),
+                         'g': 1.0}
+# owltools JVM heap (in GiB) to budget per GiB of OWL/TTL input file, and the
+# minimum heap (in GiB) to budget for any one owltools conversion
+OWLTOOLS_MEMORY_GB_PER_GB_OF_INPUT = 10
+OWLTOOLS_MIN_MEMORY_GB = 2
+# an ontology's owl:imports are declared in its header, which is within this
+# many bytes of the start of the file
+OWL_IMPORTS_SCAN_BYTES = 1 << 20
+REGEX_OWL_IMPORTS = re.compile(rb'owl:imports|owl#imports')
+ONT_FRAGMENT_FORMAT_VERSION = 1
 ENSEMBL_LETTER_TO_CATEGORY = {'P': 'protein',
                               'G': 'gene',
                               'T': 'transcript'}
@@ -67,8 +91,11 @@ def delete_ontobio_cachier_caches():
 def load_ont_file_return_ontology_and_metadata(file_name: str,
                                                download_url: str = None,
                                                ontology_title: str = None,
-                                               save_pickle: bool = False):
-    ontology = kg2_util.make_ontology_from_local_file(file_name, save_pickle=save_pickle)
+                                               ont_cache_dir: str = None,
+                                               ont_cache_max_size_gb: float = kg2_util.ONTOLOGY_CACHE_MAX_SIZE_GB):
+    ontology = kg2_util.make_ontology_from_local_file(file_name,
+                                                      cache_dir=ont_cache_dir,
+                                                      cache_max_size_gb=ont_cache_max_size_gb)
     file_last_modified_timestamp = kg2_util.format_timestamp(kg2_util.get_file_last_modified_timestamp(file_name))
     print("file: " + file_name + "; last modified: " + file_last_modified_timestamp)
     ont_version = ontology.meta.get('version', None)
@@ -118,6 +145,108 @@ def load_ont_file_return_ontology_and_metadata(file_name: str,
     return [ontology, metadata_dict]
 
 
+def get_local_ont_file_name(ont_source_info_dict: dict):
+    if ont_source_info_dict['download']:
+        # get the OWL file onto the local file system and get a full path to it
+        print(ont_source_info_dict["url"])
+        local_file_name = kg2_util.download_file_if_not_exist_locally(ont_source_info_dict['url'],
+                                                                      ont_source_info_dict['file'])
+    else:
+        local_file_name = ont_source_info_dict['file']
+        assert os.path.exists(ont_source_info_dict['file']), local_file_name
+    return local_file_name
+
+
+def load_ont_file_with_owltools_memory(load_args: tuple,
+                                       owltools_memory_gb: int):
+    # runs in a worker process, so setting the environment variable only
+    # affects the owltools JVM that this worker launches
+    if owltools_memory_gb > 0:
+        os.environ['OWLTOOLS_MEMORY'] = str(owltools_memory_gb) + 'G'
+    return load_ont_file_return_ontology_and_metadata(*load_args)
+
+
+def load_ont_files_in_parallel(load_args_list: list,
+                               num_workers: int,
+                               owltools_memory_gb: int = None):
+    # Runs up to num_workers ontology loads at a time, but only starts a load
+    # if its (estimated) owltools JVM heap fits in what is left of the total
+    # owltools memory budget, so that several JVMs do not exhaust the memory
+    # that a single owltools run would otherwise be given. The largest
+    # ontologies are started first; the results are returned in the order of
+    # load_args_list. A load whose owltools run fails (e.g., with an
+    # OutOfMemoryError, if its heap was underestimated) is retried once with
+    # the full owltools memory budget.
+    if owltools_memory_gb is None:
+        owltools_memory_gb = get_owltools_memory_gb()
+    memory_gb_list = [estimate_owltools_memory_gb(load_args[0],
+                                                  load_args[3],
+                                                  owltools_memory_gb) for load_args in load_args_list]
+    waiting = sorted(range(len(load_args_list)), key=lambda i: memory_gb_list[i], reverse=True)
+    results = [None] * len(load_args_list)
+    done_queue = queue.Queue()
+    free_memory_gb = owltools_memory_gb
+    num_running = 0
+    # one task per worker process, so that memory from one ontology load is
+    # returned to the operating system before the next load starts
+    with multiprocessing.get_context('fork').Pool(num_workers, maxtasksperchild=1) as pool:
+        while len(waiting) > 0 or num_running > 0:
+            waiting_ctr = 0
+            while waiting_ctr < len(waiting) and num_running < num_workers:
+                load_index = waiting[waiting_ctr]
+                memory_gb = memory_gb_list[load_index]
+                if memory_gb > free_memory_gb:
+                    waiting_ctr += 1
+                    continue
+                del waiting[waiting_ctr]
+                free_memory_gb -= memory_gb
+                num_running += 1
+                kg2_util.log_message("Starting to load ontology file: " + load_args_list[load_index][0] +
+                                     "; owltools memory: " + str(memory_gb) + " GiB")
+                pool.apply_async(load_ont_file_with_owltools_memory,
+                                 (load_args_list[load_index], memory_gb),
+                                 callback=lambda result, load_index=load_index:
+                                 done_queue.put((load_index, result, None)),
+                                 error_callback=lambda exception, load_index=load_index:
+                                 done_queue.put((load_index, None, exception)))
+            load_index, result, exception = done_queue.get()
+            free_memory_gb += memory_gb_list[load_index]
+            num_running -= 1
+            if exception is not None:
+                if isinstance(exception, subprocess.CalledProcessError) and \
+                   memory_gb_list[load_index] < owltools_memory_gb:
+                    kg2_util.log_message("owltools failed on ontology file: " + load_args_list[load_index][0] +
+                                         "; retrying with owltools memory: " + str(owltools_memory_gb) + " GiB",
+                                         output_stream=sys.stderr)
+                    memory_gb_list[load_index] = owltools_memory_gb
+                    waiting.insert(0, load_index)
+                    continue
+                raise exception
+            results[load_index] = result
+            kg2_util.log_message("Finished loading ontology file: " + load_args_list[load_index][0])
+    return results
+
+
+def get_ont_fragment_file_name(ont_source_info_dict: dict,
+                               local_file_name: str,
+                               biolink_file_name: str,
+                               config_hash: str,
+                               ont_cache_dir: str):
+    # the key covers everything that an ontology's fragment depends on: the
+    # ontology file (its contents, and its modification time, which can be
+    # the update date of its nodes), its entry in the ontology load
+    # inventory, the biolink ontology (for categories), and the configuration
+    # files and code (config_hash)
+    key_str = '\t'.join([config_hash,
+                         kg2_util.get_ontology_cache_key(biolink_file_name),
+                         kg2_util.get_ontology_cache_key(local_file_name),
+                         kg2_util.format_timestamp(kg2_util.get_file_last_modified_timestamp(local_file_name)),
+                         json.dumps(ont_source_info_dict, sort_keys=True),
+                         str(ONT_FRAGMENT_FORMAT_VERSION)])
+    ont_fragment_key = hashlib.sha256(key_str.encode('utf-8')).hexdigest()
+    return os.path.join(ont_cache_dir, ont_fragment_key + kg2_util.ONTOLOGY_FRAGMENT_FILE_SUFFIX)
+
+
 def make_kg2(curies_to_categories: dict,
              uri_to_curie_shortener: callable,
              curie_to_uri_expander: callable,
@@ -126,54 +255,108 @@ def make_kg2(curies_to_categories: dict,
              edges_output,
              umls_cui_tsv_file: str,
              test_mode: bool = False,
-             save_pickle: bool = False):
-
-    ont_file_information_dict_list = []
-
-    # for each OWL file (or URL for an OWL file) described in the YAML config file...
-    for ont_source_info_dict in ont_urls_and_files:
-        if ont_source_info_dict['download']:
-            # get the OWL file onto the local file system and get a full path to it
-            print(ont_source_info_dict["url"])
-            local_file_name = kg2_util.download_file_if_not_exist_locally(ont_source_info_dict['url'],
-                                                                          ont_source_info_dict['file'])
-        else:
-            local_file_name = ont_source_info_dict['file']
-            assert os.path.exists(ont_source_info_dict['file']), local_file_name
-        # load the OWL file data into an ontobio.ontol.Ontology data structure and information dictionary
-        [ont, metadata_dict] = load_ont_file_return_ontology_and_metadata(local_file_name,
-                                                                          ont_source_info_dict['url'],
-                                                                          ont_source_info_dict['title'],
-                                                                          save_pickle)
-        metadata_dict['ontology'] = ont
-        ont_file_information_dict_list.append(metadata_dict)
+             ont_cache_dir: str = None,
+             ont_cache_max_size_gb: float = kg2_util.ONTOLOGY_CACHE_MAX_SIZE_GB,
+             num_workers: int = 1,
+             owltools_memory_gb: int = None,
+             config_hash: str = None,
+             exact_id_index: bool = False,
+             temp_dir: str = None):
+
+    # get the OWL files onto the local file system (downloads run concurrently)
+    if num_workers > 1:
+        with multiprocessing.pool.ThreadPool(num_workers) as thread_pool:
+            local_file_names = thread_pool.map(get_local_ont_file_name, ont_urls_and_files)
+    else:
+        local_file_names = [get_local_ont_file_name(ont_source_info_dict) for ont_source_info_dict in ont_urls_and_files]
+
+    # get the cached fragments for the ontologies that have not changed
+    num_onts = len(ont_urls_and_files)
+    ont_fragment_file_names = [None] * num_onts
+    ont_fragments_list = [None] * num_onts
+    if ont_cache_dir is not None and config_hash is not None:
+        for ont_index, (ont_source_info_dict, local_file_name) in enumerate(zip(ont_urls_and_files,
+                                                                                local_file_names)):
+            ont_fragment_file_name = get_ont_fragment_file_name(ont_source_info_dict,
+                                                                local_file_name,
+                                                                local_file_names[0],
+                                                                config_hash,
+                                                                ont_cache_dir)
+            ont_fragment_file_names[ont_index] = ont_fragment_file_name
+            if os.path.isfile(ont_fragment_file_name):
+                kg2_util.log_message("Reading ontology fragment file for " + local_file_name + ": " +
+                                     ont_fragment_file_name)
+                ont_fragments_list[ont_index] = kg2_util.load_from_ontology_cache(ont_fragment_file_name)
+
+    # load each OWL file that has no cached fragment into an
+    # ontobio.ontol.Ontology data structure and information dictionary; the
+    # biolink ontology (which is first) is always loaded, since it is needed
+    # for making the fragments and the inverse relationship edges
+    load_indices = [0] + [ont_index for ont_index in range(1, num_onts) if ont_fragments_list[ont_index] is None]
+    load_args_list = [(local_file_names[ont_index],
+                       ont_urls_and_files[ont_index]['url'],
+                       ont_urls_and_files[ont_index]['title'],
+                       ont_cache_dir,
+                       ont_cache_max_size_gb) for ont_index in load_indices]
+    if num_workers > 1:
+        ont_and_metadata_list = load_ont_files_in_parallel(load_args_list,
+                                                           num_workers,
+                                                           owltools_memory_gb)
+    else:
+        ont_and_metadata_list = [load_ont_file_return_ontology_and_metadata(*load_args) for load_args in load_args_list]
+
+    [biolink_ontology, biolink_metadata_dict] = ont_and_metadata_list[0]
+    biolink_category_info = get_biolink_category_info(biolink_ontology, curies_to_categories)
+
+    kg2_util.log_message('Calling make_ont_fragment')
+
+    for load_ctr, ont_index in enumerate(load_indices):
+        [ont, metadata_dict] = ont_and_metadata_list[load_ctr]
+        # free each ontology once its fragment is made
+        ont_and_metadata_list[load_ctr] = None
+        if ont_fragments_list[ont_index] is not None:
+            continue
+        ont_fragment = make_ont_fragment(ont,
+                                         metadata_dict,
+                                         biolink_category_info,
+                                         curies_to_categories,
+                                         uri_to_curie_shortener,
+                                         curie_to_uri_expander)
+        if ont_fragment_file_names[ont_index] is not None:
+            kg2_util.save_to_ontology_cache(ont_fragment, ont_fragment_file_names[ont_index])
+        ont_fragments_list[ont_index] = ont_fragment
+
+    if ont_cache_dir is not None and config_hash is not None:
+        kg2_util.evict_ontology_cache(ont_cache_dir, int(ont_cache_max_size_gb * (1 << 30)))
 
     kg2_util.log_message('Calling get_inverse_rels')
-    biolink_inverses = get_inverse_rels(ont_file_information_dict_list[0]['ontology'], ont_file_information_dict_list[0], uri_to_curie_shortener)
+    biolink_inverses = get_inverse_rels(biolink_ontology, biolink_metadata_dict, uri_to_curie_shortener)
 
-    kg2_util.log_message('Calling make_nodes_dict_from_ontologies_list')
+    kg2_util.log_message('Calling make_nodes_dict_from_ont_fragments')
 
-    nodes_dict = make_nodes_dict_from_ontologies_list(ont_file_information_dict_list,
-                                                      curies_to_categories,
-                                                      uri_to_curie_shortener,
-                                                      curie_to_uri_expander)
+    nodes_dict = make_nodes_dict_from_ont_fragments(ont_fragments_list,
+                                                    biolink_category_info[2])
 
     kg2_util.log_message('Calling make_map_of_node_ontology_ids_to_curie_ids')
 
     map_of_node_ontology_ids_to_curie_ids = make_map_of_node_ontology_ids_to_curie_ids(nodes_dict)
 
-    kg2_util.log_message('Calling get_rels_dict')
-
-    # get a dictionary of all relationships including xrefs as relationships
-    all_rels_dict = get_rels_dict(nodes_dict,
-                                  ont_file_information_dict_list,
-                                  uri_to_curie_shortener,
-                                  curie_to_uri_expander,
-                                  map_of_node_ontology_ids_to_curie_ids)
+    kg2_util.log_message('Calling get_rels')
+
+    # write each relationship (including xrefs as relationships) as soon as
+    # it is made, keeping only the hashed rel_keys in memory
+    rel_keys = kg2_util.HashedIDSet(exact=exact_id_index, temp_dir=temp_dir)
+    write_new_rels(get_rels(nodes_dict,
+                            ont_fragments_list,
+                            uri_to_curie_shortener,
+                            curie_to_uri_expander,
+                            map_of_node_ontology_ids_to_curie_ids),
+                   rel_keys,
+                   edges_output)
+    rel_keys.log_collisions("edge keys")
+    rel_keys.close()
 
     ## This is not necessarily the most efficient place to do #321, but it will have to work for now
-    for edge in all_rels_dict.values():
-        edges_output.write(edge)
     for edge in biolink_inverses:
         edges_output.write(edge)
 
@@ -188,21 +371,59 @@ def get_biolink_category_for_node(ontology_node_id: str,
                                   ontology: ontobio.ontol.Ontology,
                                   curies_to_categories: dict,
                                   uri_to_curie_shortener: callable,
-                                  ontology_node_ids_previously_seen: set,
+                                  category_cache: dict,
                                   get_node_id_of_node_with_category: bool,
                                   biolink_category_depths: dict):
+    # category_cache is a dict that is shared by all of the calls for the
+    # nodes of one ontology; it holds the category of every node that has
+    # been resolved so far, so that each ancestor is resolved only once (its
+    # ancestors having been resolved, and cached, before it). The results
+    # that cannot go in it (those of nodes in a subClassOf cycle) are kept in
+    # a dict for just this call, so that each node of a cycle is still
+    # resolved at most once per call instead of once per path through it
+    return infer_biolink_category_for_node(ontology_node_id,
+                                           node_curie_id,
+                                           ontology,
+                                           curies_to_categories,
+                                           uri_to_curie_shortener,
+                                           category_cache,
+                                           dict(),
+                                           get_node_id_of_node_with_category,
+                                           biolink_category_depths)[0:2]
+
+
+def infer_biolink_category_for_node(ontology_node_id: str,
+                                    node_curie_id: str,
+                                    ontology: ontobio.ontol.Ontology,
+                                    curies_to_categories: dict,
+                                    uri_to_curie_shortener: callable,
+                                    category_cache: dict,
+                                    call_results: dict,
+                                    get_node_id_of_node_with_category: bool,
+                                    biolink_category_depths: dict):
+    # returns [category, ontology node ID of node with category, cacheable];
+    # a result is not cacheable if it was computed while one of the node's
+    # ancestors was itself still being resolved (i.e., in a subClassOf cycle),
+    # since it would then depend on where the cycle was entered. call_results
+    # holds, for the current top-level call only, the nodes that are being
+    # resolved and the results that were not cacheable
 
     if node_curie_id is None:
         kg2_util.log_message("Ontology node " + ontology_node_id + " has node_curie_id of None",
                              ontology_name=ontology.id,
                              output_stream=sys.stderr)
-        return [None, None]
-
-    # if we have already looked for a category for this node, return None
-    if ontology_node_id in ontology_node_ids_previously_seen:
-        return [None, None]
-
-    ontology_node_ids_previously_seen.add(ontology_node_id)
+        return [None, None, True]
+
+    cache_key = (ontology_node_id, node_curie_id)
+    cached_result = category_cache.get(cache_key, None)
+    if cached_result is not None:
+        return cached_result + [True]
+    call_result = call_results.get(cache_key, None)
+    if call_result is not None:
+        if call_result is CATEGORY_CACHE_IN_PROGRESS:
+            # this node is one of its own ancestors
+            return [None, None, False]
+        return call_result + [False]
 
     curie_prefix = get_prefix_from_curie_id(node_curie_id)
 
@@ -211,13 +432,16 @@ def get_biolink_category_for_node(ontology_node_id: str,
                              ontology_name=ontology.id,
                              node_curie_id=node_curie_id,
                              output_stream=sys.stderr)
-        return [None, None]
+        return [None, None, True]
 
     # Inelegant hack to ensure that TUI: nodes get mapped to "semantic type" while still enabling us
     # to use get_biolink_category_for_node to determine the specific semantic type of a CUI based on its
     # TUI record. Need to think about a more elegant way to do this. [SAR]
     if curie_prefix == kg2_util.CURIE_PREFIX_UMLS_STY and node_curie_id.split(':')[1].startswith('T') and ontology.id == kg2_util.BASE_URL_UMLS_STY:
-        return [kg2_util.BIOLINK_CATEGORY_NAMED_THING, None]
+        return [kg2_util.BIOLINK_CATEGORY_NAMED_THING, None, True]
+
+    call_results[cache_key] = CATEGORY_CACHE_IN_PROGRESS
+    cacheable = True
 
     if get_node_id_of_node_with_category:
         ret_ontology_node_id_of_node_with_category = ontology_node_id
@@ -259,14 +483,17 @@ def get_biolink_category_for_node(ontology_node_id: str,
             parent_node_curie_id = parent_nodes_ont_to_curie[parent_ontology_node_id]
             try:
                 [candidate_category,
-                 ontology_node_id_of_node_with_category] = get_biolink_category_for_node(parent_ontology_node_id,
-                                                                                         parent_node_curie_id,
-                                                                                         ontology,
-                                                                                         curies_to_categories,
-                                                                                         uri_to_curie_shortener,
-                                                                                         ontology_node_ids_previously_seen,
-                                                                                         get_node_id_of_node_with_category,
-                                                                                         biolink_category_depths)
+                 ontology_node_id_of_node_with_category,
+                 parent_cacheable] = infer_biolink_category_for_node(parent_ontology_node_id,
+                                                                     parent_node_curie_id,
+                                                                     ontology,
+                                                                     curies_to_categories,
+                                                                     uri_to_curie_shortener,
+                                                                     category_cache,
+                                                                     call_results,
+                                                                     get_node_id_of_node_with_category,
+                                                                     biolink_category_depths)
+                cacheable = cacheable and parent_cacheable
                 if get_node_id_of_node_with_category and ontology_node_id_of_node_with_category is not None:
                     ret_ontology_node_id_of_node_with_category = ontology_node_id_of_node_with_category
             except RecursionError:
@@ -307,14 +534,57 @@ def get_biolink_category_for_node(ontology_node_id: str,
                     kg2_util.log_message(message="unrecognized Ensembl ID: " + curie_suffix,
                                          ontology_name=ontology.id,
                                          node_curie_id=node_curie_id,
-                                         output_stream=sys.stderr)
+                                         output_stream=sys.stderr,
+                                         template="unrecognized Ensembl ID")
 
-    return [ret_category, ret_ontology_node_id_of_node_with_category]
+    if cacheable:
+        category_cache[cache_key] = [ret_category, ret_ontology_node_id_of_node_with_category]
+        del call_results[cache_key]
+    else:
+        call_results[cache_key] = [ret_category, ret_ontology_node_id_of_node_with_category]
+    return [ret_category, ret_ontology_node_id_of_node_with_category, cacheable]
 
 
 # --------------- subroutines that have no side effects except logging printing ----------
 
 
+def parse_jvm_memory_gb(jvm_memory: str):
+    match = REGEX_JVM_MEMORY.match(jvm_memory.strip())
+    if match is None:
+        raise ValueError("unable to parse JVM memory setting: " + jvm_memory)
+    return int(int(match.group(1)) * JVM_MEMORY_UNIT_TO_GB[match.group(2).lower()])
+
+
+def get_owltools_memory_gb():
+    owltools_memory = os.environ.get('OWLTOOLS_MEMORY', None)
+    if owltools_memory is None:
+        raise ValueError("the OWLTOOLS_MEMORY environment variable is not set; use --owltoolsMemoryGB")
+    return parse_jvm_memory_gb(owltools_memory)
+
+
+def has_owl_imports(file_name: str):
+    with open(file_name, 'rb') as file:
+        return REGEX_OWL_IMPORTS.search(file.read(OWL_IMPORTS_SCAN_BYTES)) is not None
+
+
+def estimate_owltools_memory_gb(file_name: str,
+                                ont_cache_dir: str,
+                                total_memory_gb: int):
+    if file_name.endswith('.json') or \
+       os.path.isfile(os.path.splitext(file_name)[0] + '.pickle') or \
+       (ont_cache_dir is not None and
+        os.path.isfile(kg2_util.get_ontology_cache_file_name(file_name, ont_cache_dir))):
+        # the ontology will be loaded without running owltools
+        return 0
+    if has_owl_imports(file_name):
+        # owltools also loads the ontology's import closure, whose size
+        # cannot be told from the file, so budget the full heap
+        return total_memory_gb
+    size_gb = os.path.getsize(file_name) / (1 << 30)
+    return min(total_memory_gb, max(OWLTOOLS_MIN_MEMORY_GB,
+                                    int(math.ceil(OWLTOOLS_MEMORY_GB_PER_GB_OF_INPUT * size_gb))))
+
+
 def make_rel_key(subject_id: str,
                  predicate_name: str,
                  object_id: str,
@@ -348,7 +618,7 @@ def parse_umls_sver_date(umls_sver: str, sourcename: str):
 
 
 # ===========================================
-# These next functions (until make_nodes_dict_from_ontologies_list)
+# These next functions (until get_biolink_category_info)
 # are for addressing issue #762 regarding duplicate TUIs
 
 
@@ -482,419 +752,451 @@ def get_category_for_multiple_tui(biolink_category_tree: dict,
     return find_common_ancestor(tui_categories, biolink_category_tree)
 
 
-def make_nodes_dict_from_ontologies_list(ontology_info_list: list,
-                                         curies_to_categories: dict,
-                                         uri_to_curie_shortener: callable,
-                                         curie_to_uri_expander: callable) -> Dict[str, dict]:
-    ret_dict = dict()
-    omim_to_hgnc_symbol = dict()
-    ontologies_iris_to_curies = dict()
+def get_biolink_category_info(biolink_ontology: ontobio.ontol.Ontology,
+                              curies_to_categories: dict):
+    print(f"Ont: {biolink_ontology}\nBase URL: {kg2_util.BASE_URL_BIOLINK_ONTOLOGY} {biolink_ontology.id}")
 
-    tuis_not_in_mappings_but_in_kg2 = set()
+    assert biolink_ontology.id == kg2_util.BASE_URL_BIOLINK_ONTOLOGY, "biolink needs to be first in ont-load-inventory.yaml"
 
-    biolink_categories_ontology_depths = None
+    [biolink_category_tree, mappings_to_categories] = generate_biolink_category_tree(biolink_ontology, curies_to_categories)
 
-    first_ontology = ontology_info_list[0]['ontology']
+    biolink_categories_ontology_depths = kg2_util.get_biolink_categories_ontology_depths(biolink_ontology)
 
-    print(f"Ont: {first_ontology}\nBase URL: {kg2_util.BASE_URL_BIOLINK_ONTOLOGY} {first_ontology.id}")
+    return [biolink_category_tree, mappings_to_categories, biolink_categories_ontology_depths]
 
-    assert first_ontology.id == kg2_util.BASE_URL_BIOLINK_ONTOLOGY, "biolink needs to be first in ont-load-inventory.yaml"
 
-    [biolink_category_tree, mappings_to_categories] = generate_biolink_category_tree(first_ontology, curies_to_categories)
+# Makes the "fragment" of KG2 that comes from a single ontology: its source
+# node, its nodes (not yet merged with the nodes from other ontologies), and
+# its edges (as ontology node IDs and predicate strings, since they can only
+# be mapped to CURIE IDs once the nodes from all of the ontologies are known).
+# A fragment depends only on its own ontology, the biolink ontology, and the
+# configuration files, so it can be cached (see get_ont_fragment_file_name).
+def make_ont_fragment(ontology: ontobio.ontol.Ontology,
+                      ontology_info_dict: dict,
+                      biolink_category_info: list,
+                      curies_to_categories: dict,
+                      uri_to_curie_shortener: callable,
+                      curie_to_uri_expander: callable) -> dict:
+    [biolink_category_tree,
+     mappings_to_categories,
+     biolink_categories_ontology_depths] = biolink_category_info
 
-    biolink_categories_ontology_depths = kg2_util.get_biolink_categories_ontology_depths(first_ontology)
+    tuis_not_in_mappings_but_in_kg2 = set()
 
     convert_bpv_pred_to_curie_func = make_convert_bpv_predicate_to_curie(uri_to_curie_shortener,
                                                                          curie_to_uri_expander)
 
-    def biolink_depth_getter(category: str):
-        return biolink_categories_ontology_depths.get(category, None)
+    iri_of_ontology = ontology_info_dict['id']
+    assert iri_of_ontology is not None
 
-    for ontology_info_dict in ontology_info_list:
-        ontology = ontology_info_dict['ontology']
-        iri_of_ontology = ontology_info_dict['id']
-        assert iri_of_ontology is not None
-
-        ontology_curie_id = uri_to_curie_shortener(iri_of_ontology)
-
-        if ontology_curie_id is None or len(ontology_curie_id) == 0:
-            ontology_curie_id = iri_of_ontology
-
-        print(f"processing ontology: {ontology_curie_id} start {datetime.datetime.now()}", file=sys.stderr)
-
-        umls_sver = ontology_info_dict.get('umls-sver', None)
-        ont_version = ontology_info_dict.get('version', None)
-        ontology_name = ontology_info_dict['title']
-        if ont_version is not None:
-            ontology_name = ontology_name + " version " + ont_version
-        updated_date = None
-        if umls_sver is not None:
-            # if you can, parse sver string into a date string
-            updated_date = parse_umls_sver_date(umls_sver, ontology_curie_id.split(':')[1])
-
-        if updated_date is None:
-            updated_date = ontology_info_dict.get('source-file-date', None)
-
-        if updated_date is None:
-            umls_release = ontology_info_dict.get('umls-release', None)
-            if umls_release is not None:
-                updated_date = re.sub(r'\D', '', umls_release)
-
-        if updated_date is None:
-            updated_date = ontology_info_dict['file last modified timestamp']
-
-        ontology_node = kg2_util.make_node(ontology_curie_id,
-                                           iri_of_ontology,
-                                           ontology_name,
-                                           kg2_util.SOURCE_NODE_CATEGORY,
-                                           updated_date,
-                                           ontology_curie_id)
-        ontology_node['description'] = ontology_info_dict['description']
-        ontology_node['ontology node ids'] = [iri_of_ontology]
-        ontology_node['xrefs'] = []
-        ret_dict[ontology_curie_id] = ontology_node
+    ontology_curie_id = uri_to_curie_shortener(iri_of_ontology)
 
-        ontologies_iris_to_curies[iri_of_ontology] = ontology_curie_id
+    if ontology_curie_id is None or len(ontology_curie_id) == 0:
+        ontology_curie_id = iri_of_ontology
 
-        for ontology_node_id in ontology.nodes():
-            onto_node_dict = ontology.node(ontology_node_id)
-            assert onto_node_dict is not None
+    print(f"processing ontology: {ontology_curie_id} start {datetime.datetime.now()}", file=sys.stderr)
 
-            if ontology_node_id.startswith(MYSTERIOUS_BASE_NODE_ID_TO_FILTER):
-                continue
+    umls_sver = ontology_info_dict.get('umls-sver', None)
+    ont_version = ontology_info_dict.get('version', None)
+    ontology_name = ontology_info_dict['title']
+    if ont_version is not None:
+        ontology_name = ontology_name + " version " + ont_version
+    updated_date = None
+    if umls_sver is not None:
+        # if you can, parse sver string into a date string
+        updated_date = parse_umls_sver_date(umls_sver, ontology_curie_id.split(':')[1])
 
-            if ontology_node_id == OWL_NOTHING:
-                continue
+    if updated_date is None:
+        updated_date = ontology_info_dict.get('source-file-date', None)
 
-            if ontology_node_id.endswith(NOCODE):
-                continue
+    if updated_date is None:
+        umls_release = ontology_info_dict.get('umls-release', None)
+        if umls_release is not None:
+            updated_date = re.sub(r'\D', '', umls_release)
 
-            node_curie_id = get_node_curie_id_from_ontology_node_id(ontology_node_id,
-                                                                    ontology,
-                                                                    uri_to_curie_shortener,
-                                                                    curie_to_uri_expander)
-            if node_curie_id is None:
-                kg2_util.log_message(message="Unable to obtain a CURIE for ontology node ID: " + ontology_node_id,
-                                     ontology_name=iri_of_ontology,
-                                     output_stream=sys.stderr)
-                continue
+    if updated_date is None:
+        updated_date = ontology_info_dict['file last modified timestamp']
+
+    ontology_node = kg2_util.make_node(ontology_curie_id,
+                                       iri_of_ontology,
+                                       ontology_name,
+                                       kg2_util.SOURCE_NODE_CATEGORY,
+                                       updated_date,
+                                       ontology_curie_id)
+    ontology_node['description'] = ontology_info_dict['description']
+    ontology_node['ontology node ids'] = [iri_of_ontology]
+    ontology_node['xrefs'] = []
+    # the node that the nodes of this ontology get their default update
+    # date from (see issue 984 for why this is not always ontology_node)
+    source_ontology_node = ontology_node
+    node_dict_list = []
+
+    category_cache = dict()
+    for ontology_node_id in ontology.nodes():
+        onto_node_dict = ontology.node(ontology_node_id)
+        assert onto_node_dict is not None
+
+        if ontology_node_id.startswith(MYSTERIOUS_BASE_NODE_ID_TO_FILTER):
+            continue
+
+        if ontology_node_id == OWL_NOTHING:
+            continue
+
+        if ontology_node_id.endswith(NOCODE):
+            continue
+
+        node_curie_id = get_node_curie_id_from_ontology_node_id(ontology_node_id,
+                                                                ontology,
+                                                                uri_to_curie_shortener,
+                                                                curie_to_uri_expander)
+        if node_curie_id is None:
+            kg2_util.log_message(message="Unable to obtain a CURIE for ontology node ID: " + ontology_node_id,
+                                 ontology_name=iri_of_ontology,
+                                 output_stream=sys.stderr)
+            continue
 
-            iri = onto_node_dict.get('id', None)
-            if iri is None:
-                iri = ontology_node_id
+        iri = onto_node_dict.get('id', None)
+        if iri is None:
+            iri = ontology_node_id
 
-            if not kg2_util.is_a_valid_http_url(iri):
-                iri = curie_to_uri_expander(iri)
+        if not kg2_util.is_a_valid_http_url(iri):
+            iri = curie_to_uri_expander(iri)
 
-            iri = curie_to_uri_expander(node_curie_id)
-            if iri is None:
-                kg2_util.log_message(message="Cannot obtain IRI for CURIE",
-                                     ontology_name=iri_of_ontology,
-                                     node_curie_id=node_curie_id,
-                                     output_stream=sys.stderr)
-                continue
+        iri = curie_to_uri_expander(node_curie_id)
+        if iri is None:
+            kg2_util.log_message(message="Cannot obtain IRI for CURIE",
+                                 ontology_name=iri_of_ontology,
+                                 node_curie_id=node_curie_id,
+                                 output_stream=sys.stderr)
+            continue
 
-            assert kg2_util.is_a_valid_http_url(iri), iri
+        assert kg2_util.is_a_valid_http_url(iri), iri
 
-            node_name = onto_node_dict.get('label', None)
-            node_full_name = None
+        node_name = onto_node_dict.get('label', None)
+        node_full_name = None
 
-            assert node_curie_id is not None
+        assert node_curie_id is not None
 
-            if node_curie_id in ret_dict:
-                prev_provided_by = ret_dict[node_curie_id].get('provided_by')
-                if prev_provided_by is not None and node_curie_id == prev_provided_by:
-                    continue  # issue 984
+        curie_prefix = get_prefix_from_curie_id(node_curie_id)
+        if curie_prefix == kg2_util.CURIE_PREFIX_UMLS_STY and node_curie_id.split(':')[1].startswith('T') and ontology.id != kg2_util.BASE_URL_UMLS_STY:
+            # this is a UMLS semantic type TUI node from a non-STY UMLS source, ignore it
+            continue
+        # to address issue #1361
+        if curie_prefix == kg2_util.CURIE_PREFIX_ENSEMBL and REGEX_ENSEMBL.match(node_curie_id.replace(curie_prefix + ':', '')) is None:
+            node_curie_id = node_curie_id.replace(kg2_util.CURIE_PREFIX_ENSEMBL, kg2_util.CURIE_PREFIX_ENSEMBL_GENOMES)
+            iri = curie_to_uri_expander(node_curie_id)
+            kg2_util.log_message(message="Switching Ensembl: prefix to EnsemblGenomes:",
+                                 ontology_name=iri_of_ontology,
+                                 node_curie_id=node_curie_id,
+                                 output_stream=sys.stderr)
 
-            curie_prefix = get_prefix_from_curie_id(node_curie_id)
-            if curie_prefix == kg2_util.CURIE_PREFIX_UMLS_STY and node_curie_id.split(':')[1].startswith('T') and ontology.id != kg2_util.BASE_URL_UMLS_STY:
-                # this is a UMLS semantic type TUI node from a non-STY UMLS source, ignore it
-                continue
-            # to address issue #1361
-            if curie_prefix == kg2_util.CURIE_PREFIX_ENSEMBL and REGEX_ENSEMBL.match(node_curie_id.replace(curie_prefix + ':', '')) is None:
-                node_curie_id = node_curie_id.replace(kg2_util.CURIE_PREFIX_ENSEMBL, kg2_util.CURIE_PREFIX_ENSEMBL_GENOMES)
-                iri = curie_to_uri_expander(node_curie_id)
-                kg2_util.log_message(message="Switching Ensembl: prefix to EnsemblGenomes:",
+        [node_category_label, node_with_category] = get_biolink_category_for_node(ontology_node_id,
+                                                                                  node_curie_id,
+                                                                                  ontology,
+                                                                                  curies_to_categories,
+                                                                                  uri_to_curie_shortener,
+                                                                                  category_cache,
+                                                                                  True,
+                                                                                  biolink_categories_ontology_depths)
+
+        node_deprecated = False
+        node_description = None
+        node_creation_date = None
+        node_update_date = None
+        node_replaced_by_curie = None
+        node_full_name = None
+        node_publications = set()
+        node_synonyms = set()
+        node_xrefs = set()
+        node_tui = None
+        node_has_cui = False
+        node_tui_category_label = None
+        node_gene_symbol = None
+
+        node_meta = onto_node_dict.get('meta', None)
+        if node_meta is not None:
+            node_deprecated = node_meta.get('deprecated', False)
+            if node_meta.get('deprecated', False):
+                kg2_util.log_message(message="Node has obsolete meta; setting deprecated=True",
                                      ontology_name=iri_of_ontology,
                                      node_curie_id=node_curie_id,
                                      output_stream=sys.stderr)
 
-            [node_category_label, node_with_category] = get_biolink_category_for_node(ontology_node_id,
-                                                                                      node_curie_id,
-                                                                                      ontology,
-                                                                                      curies_to_categories,
-                                                                                      uri_to_curie_shortener,
-                                                                                      set(),
-                                                                                      True,
-                                                                                      biolink_categories_ontology_depths)
-
-            node_deprecated = False
-            node_description = None
-            node_creation_date = None
-            node_update_date = None
-            node_replaced_by_curie = None
-            node_full_name = None
-            node_publications = set()
-            node_synonyms = set()
-            node_xrefs = set()
-            node_tui = None
-            node_has_cui = False
-            node_tui_category_label = None
-            node_gene_symbol = None
-
-            node_meta = onto_node_dict.get('meta', None)
-            if node_meta is not None:
-                node_deprecated = node_meta.get('deprecated', False)
-                if node_meta.get('deprecated', False):
-                    kg2_util.log_message(message="Node has obsolete meta; setting deprecated=True",
-                                         ontology_name=iri_of_ontology,
-                                         node_curie_id=node_curie_id,
-                                         output_stream=sys.stderr)
-
-                node_definition = node_meta.get('definition', None)
-                if node_definition is not None:
-                    node_description = node_definition['val']
-
-                    node_definition_xrefs = node_definition.get('xrefs', None)
-                    if node_definition_xrefs is not None:
-                        assert type(node_definition_xrefs) == list
-                        for xref in node_definition_xrefs:
-                            xref_pub = xref_as_a_publication(xref)
-                            if xref_pub is not None:
-                                node_publications.add(xref_pub)
-
-                node_synonyms_list = node_meta.get('synonyms', None)
-                if node_synonyms_list is not None:
-                    for syn_dict in node_synonyms_list:
-                        syn_pred = syn_dict['pred']
-                        if syn_pred == 'hasExactSynonym':
-                            node_synonyms.add(syn_dict['val'])
-                            syn_xrefs = syn_dict['xrefs']
-                            if len(syn_xrefs) > 0:
-                                for syn_xref in syn_xrefs:
-                                    syn_xref_pub = xref_as_a_publication(syn_xref)
-                                    if syn_xref_pub is not None:
-                                        node_publications.add(syn_xref_pub)
-
-                node_xrefs_list = node_meta.get('xrefs', None)
-                if node_xrefs_list is not None:
-                    for xref_dict in node_xrefs_list:
-                        xref_curie = xref_dict['val']
-                        if xref_curie.startswith('UMLS:C'):
-                            xref_curie = kg2_util.CURIE_PREFIX_UMLS + ':' + xref_curie.split('UMLS:')[1]
-                        node_xrefs.add(xref_curie)
-                basic_property_values = node_meta.get('basicPropertyValues', None)
-                if basic_property_values is not None:
-                    node_tui_list = []
-                    for basic_property_value_dict in basic_property_values:
-                        bpv_pred = basic_property_value_dict['pred']
-                        bpv_pred_curie = convert_bpv_pred_to_curie_func(bpv_pred)
-                        if bpv_pred_curie is None:
-                            bpv_pred_curie = bpv_pred
-                        bpv_val = basic_property_value_dict['val']
-                        if bpv_pred_curie in {kg2_util.CURIE_ID_OIO_CREATION_DATE,
-                                              kg2_util.CURIE_ID_DCTERMS_ISSUED,
-                                              kg2_util.CURIE_ID_HGNC_DATE_CREATED}:
-                            node_creation_date = bpv_val
-                        elif bpv_pred_curie == kg2_util.CURIE_ID_HGNC_DATE_LAST_MODIFIED:
-                            node_update_date = bpv_val
-                        elif bpv_pred_curie == kg2_util.CURIE_ID_IAO_TERM_REPLACED_BY:
-                            if not node_deprecated:
-                                node_deprecated = True
-                                kg2_util.log_message(message="Node has IAO:0100001 attribute but not owl:deprecated; setting deprecated=True",
-                                                     ontology_name=iri_of_ontology,
-                                                     node_curie_id=node_curie_id,
-                                                     output_stream=sys.stderr)
-                            node_replaced_by_uri = bpv_val
-                            node_replaced_by_curie = uri_to_curie_shortener(node_replaced_by_uri)
-                        elif bpv_pred_curie == kg2_util.CURIE_ID_UMLS_HAS_TUI:  # STY_BASE_IRI:
-                            node_tui_list.append(bpv_val)
-                        elif bpv_pred_curie == kg2_util.CURIE_ID_SKOS_PREF_LABEL:
-                            if not node_curie_id.startswith(kg2_util.CURIE_PREFIX_HGNC + ':'):
-                                node_name = bpv_val
-                            else:
-                                node_full_name = bpv_val
-                                if node_name is None:
-                                    node_name = node_full_name
-                        elif bpv_pred_curie == kg2_util.CURIE_ID_SKOS_ALT_LABEL:
-                            if node_curie_id.startswith(kg2_util.CURIE_PREFIX_HGNC + ':') and bpv_val.endswith(' gene'):
-                                node_gene_symbol = bpv_val.replace(' gene', '')
-                            node_synonyms.add(bpv_val)
-                        elif bpv_pred_curie == kg2_util.CURIE_ID_SKOS_DEFINITION:
-                            node_description = kg2_util.strip_html(bpv_val)
-                        elif bpv_pred_curie == kg2_util.CURIE_ID_HGNC_GENE_SYMBOL:
-                            node_gene_symbol = bpv_val
-                            node_synonyms.add(node_gene_symbol)
-                    if len(node_tui_list) == 1:
-                        node_tui = node_tui_list[0]
-                        node_tui_curie = kg2_util.CURIE_PREFIX_UMLS_STY + ':' + node_tui
-                        node_tui_uri = curie_to_uri_expander(node_tui_curie)
-                        assert node_tui_curie is not None
-                        [node_tui_category_label,
-                         _] = get_biolink_category_for_node(node_tui_uri,
-                                                            node_tui_curie,
-                                                            ontology,
-                                                            curies_to_categories,
-                                                            uri_to_curie_shortener,
-                                                            set(),
-                                                            True,
-                                                            biolink_categories_ontology_depths)
-
-                node_comments = node_meta.get('comments', None)
-                if node_comments is not None:
-                    comments_str = 'COMMENTS: ' + (' // '.join(node_comments))
-                    if node_description is not None:
-                        node_description += ' // ' + comments_str
-                    else:
-                        node_description = comments_str
-
-            node_type = onto_node_dict.get('type', None)
-            if node_type is not None and node_type == 'PROPERTY':
-                node_category_label = kg2_util.BIOLINK_CATEGORY_INFORMATION_CONTENT_ENTITY
-
-            if node_category_label is None or node_category_label == 'named thing':
-                # This is a fix for #891. It was supposed to be addressed on line 756 ("if node_category_label is None:") 
-                # and 757 ("node_category_label = node_tui_category_label"), but due to the assignment of the label
-                # 'named thing', that condition was never triggered. Instead, that is now handled here.
-                if node_tui is not None:
-                    if node_tui in mappings_to_categories:
-                        node_category_label = mappings_to_categories[node_tui]
-                    else:
-                        kg2_util.log_message(message="Node with ontology_node_id " + ontology_node_id + " does not have a category and has tui " + node_tui,
-                                             output_stream=sys.stderr)
-                        tuis_not_in_mappings_but_in_kg2.add(node_tui)
-
-            if node_category_label is None:
-                node_category_label = 'named thing'
-
-            if node_has_cui:
-                assert node_tui is not None or len(node_tui_list) > 0
-                if node_tui_category_label is None:
-                    node_tui_category_label = 'named thing'
-                    if node_tui is not None:
-                        kg2_util.log_message(message='Node ' + ontology_node_id + ' has CUI whose TUI cannot be mapped to category: ' + node_tui,
-                                             ontology_name=iri_of_ontology,
-                                             output_stream=sys.stderr)
-                    else:
-                        try:
-                            # POSSIBLY SHOULD REMOVE "or node_category_label == 'named thing'"
-                            if node_category_label is None or node_category_label == 'named thing' or node_curie_id.split(":")[0] == kg2_util.CURIE_PREFIX_UMLS:
-                                node_tui_category_label = get_category_for_multiple_tui(biolink_category_tree, node_tui_list, mappings_to_categories)
-                                node_category_label = node_tui_category_label
-                        except KeyError:
-                            kg2_util.log_message(message='Node ' + node_curie_id + ' has CUI with multiple associated TUIs: ' + ', '.join(node_tui_list) +
-                                                 ' and could not be mapped',
+            node_definition = node_meta.get('definition', None)
+            if node_definition is not None:
+                node_description = node_definition['val']
+
+                node_definition_xrefs = node_definition.get('xrefs', None)
+                if node_definition_xrefs is not None:
+                    assert type(node_definition_xrefs) == list
+                    for xref in node_definition_xrefs:
+                        xref_pub = xref_as_a_publication(xref)
+                        if xref_pub is not None:
+                            node_publications.add(xref_pub)
+
+            node_synonyms_list = node_meta.get('synonyms', None)
+            if node_synonyms_list is not None:
+                for syn_dict in node_synonyms_list:
+                    syn_pred = syn_dict['pred']
+                    if syn_pred == 'hasExactSynonym':
+                        node_synonyms.add(syn_dict['val'])
+                        syn_xrefs = syn_dict['xrefs']
+                        if len(syn_xrefs) > 0:
+                            for syn_xref in syn_xrefs:
+                                syn_xref_pub = xref_as_a_publication(syn_xref)
+                                if syn_xref_pub is not None:
+                                    node_publications.add(syn_xref_pub)
+
+            node_xrefs_list = node_meta.get('xrefs', None)
+            if node_xrefs_list is not None:
+                for xref_dict in node_xrefs_list:
+                    xref_curie = xref_dict['val']
+                    if xref_curie.startswith('UMLS:C'):
+                        xref_curie = kg2_util.CURIE_PREFIX_UMLS + ':' + xref_curie.split('UMLS:')[1]
+                    node_xrefs.add(xref_curie)
+            basic_property_values = node_meta.get('basicPropertyValues', None)
+            if basic_property_values is not None:
+                node_tui_list = []
+                for basic_property_value_dict in basic_property_values:
+                    bpv_pred = basic_property_value_dict['pred']
+                    bpv_pred_curie = convert_bpv_pred_to_curie_func(bpv_pred)
+                    if bpv_pred_curie is None:
+                        bpv_pred_curie = bpv_pred
+                    bpv_val = basic_property_value_dict['val']
+                    if bpv_pred_curie in {kg2_util.CURIE_ID_OIO_CREATION_DATE,
+                                          kg2_util.CURIE_ID_DCTERMS_ISSUED,
+                                          kg2_util.CURIE_ID_HGNC_DATE_CREATED}:
+                        node_creation_date = bpv_val
+                    elif bpv_pred_curie == kg2_util.CURIE_ID_HGNC_DATE_LAST_MODIFIED:
+                        node_update_date = bpv_val
+                    elif bpv_pred_curie == kg2_util.CURIE_ID_IAO_TERM_REPLACED_BY:
+                        if not node_deprecated:
+                            node_deprecated = True
+                            kg2_util.log_message(message="Node has IAO:0100001 attribute but not owl:deprecated; setting deprecated=True",
                                                  ontology_name=iri_of_ontology,
+                                                 node_curie_id=node_curie_id,
                                                  output_stream=sys.stderr)
+                        node_replaced_by_uri = bpv_val
+                        node_replaced_by_curie = uri_to_curie_shortener(node_replaced_by_uri)
+                    elif bpv_pred_curie == kg2_util.CURIE_ID_UMLS_HAS_TUI:  # STY_BASE_IRI:
+                        node_tui_list.append(bpv_val)
+                    elif bpv_pred_curie == kg2_util.CURIE_ID_SKOS_PREF_LABEL:
+                        if not node_curie_id.startswith(kg2_util.CURIE_PREFIX_HGNC + ':'):
+                            node_name = bpv_val
+                        else:
+                            node_full_name = bpv_val
+                            if node_name is None:
+                                node_name = node_full_name
+                    elif bpv_pred_curie == kg2_util.CURIE_ID_SKOS_ALT_LABEL:
+                        if node_curie_id.startswith(kg2_util.CURIE_PREFIX_HGNC + ':') and bpv_val.endswith(' gene'):
+                            node_gene_symbol = bpv_val.replace(' gene', '')
+                        node_synonyms.add(bpv_val)
+                    elif bpv_pred_curie == kg2_util.CURIE_ID_SKOS_DEFINITION:
+                        node_description = kg2_util.strip_html(bpv_val)
+                    elif bpv_pred_curie == kg2_util.CURIE_ID_HGNC_GENE_SYMBOL:
+                        node_gene_symbol = bpv_val
+                        node_synonyms.add(node_gene_symbol)
+                if len(node_tui_list) == 1:
+                    node_tui = node_tui_list[0]
+                    node_tui_curie = kg2_util.CURIE_PREFIX_UMLS_STY + ':' + node_tui
+                    node_tui_uri = curie_to_uri_expander(node_tui_curie)
+                    assert node_tui_curie is not None
+                    [node_tui_category_label,
+                     _] = get_biolink_category_for_node(node_tui_uri,
+                                                        node_tui_curie,
+                                                        ontology,
+                                                        curies_to_categories,
+                                                        uri_to_curie_shortener,
+                                                        category_cache,
+                                                        True,
+                                                        biolink_categories_ontology_depths)
+
+            node_comments = node_meta.get('comments', None)
+            if node_comments is not None:
+                comments_str = 'COMMENTS: ' + (' // '.join(node_comments))
+                if node_description is not None:
+                    node_description += ' // ' + comments_str
+                else:
+                    node_description = comments_str
+
+        node_type = onto_node_dict.get('type', None)
+        if node_type is not None and node_type == 'PROPERTY':
+            node_category_label = kg2_util.BIOLINK_CATEGORY_INFORMATION_CONTENT_ENTITY
+
+        if node_category_label is None or node_category_label == 'named thing':
+            # This is a fix for #891. It was supposed to be addressed on line 756 ("if node_category_label is None:") 
+            # and 757 ("node_category_label = node_tui_category_label"), but due to the assignment of the label
+            # 'named thing', that condition was never triggered. Instead, that is now handled here.
+            if node_tui is not None:
+                if node_tui in mappings_to_categories:
+                    node_category_label = mappings_to_categories[node_tui]
                 else:
-                    if node_category_label is None:
-                        node_category_label = node_tui_category_label  # override the node category_label if we have a TUI
-                node_tui_category_curie = kg2_util.convert_biolink_category_to_curie(node_tui_category_label)
-            ontology_curie_id = ontologies_iris_to_curies[iri_of_ontology]
-            source_ontology_information = ret_dict.get(ontology_curie_id, None)
-            if source_ontology_information is None:
-                kg2_util.log_message(message="ontology IRI has no information dictionary available",
+                    kg2_util.log_message(message="Node with ontology_node_id " + ontology_node_id + " does not have a category and has tui " + node_tui,
+                                         output_stream=sys.stderr,
+                                         template="Node does not have a category and has tui " + node_tui)
+                    tuis_not_in_mappings_but_in_kg2.add(node_tui)
+
+        if node_category_label is None:
+            node_category_label = 'named thing'
+
+        if node_has_cui:
+            assert node_tui is not None or len(node_tui_list) > 0
+            if node_tui_category_label is None:
+                node_tui_category_label = 'named thing'
+                if node_tui is not None:
+                    kg2_util.log_message(message='Node ' + ontology_node_id + ' has CUI whose TUI cannot be mapped to category: ' + node_tui,
+                                         ontology_name=iri_of_ontology,
+                                         output_stream=sys.stderr,
+                                         template='Node has CUI whose TUI cannot be mapped to category: ' + node_tui)
+                else:
+                    try:
+                        # POSSIBLY SHOULD REMOVE "or node_category_label == 'named thing'"
+                        if node_category_label is None or node_category_label == 'named thing' or node_curie_id.split(":")[0] == kg2_util.CURIE_PREFIX_UMLS:
+                            node_tui_category_label = get_category_for_multiple_tui(biolink_category_tree, node_tui_list, mappings_to_categories)
+                            node_category_label = node_tui_category_label
+                    except KeyError:
+                        kg2_util.log_message(message='Node ' + node_curie_id + ' has CUI with multiple associated TUIs: ' + ', '.join(node_tui_list) +
+                                             ' and could not be mapped',
+                                             ontology_name=iri_of_ontology,
+                                             output_stream=sys.stderr,
+                                             template='Node has CUI with multiple associated TUIs and could not be mapped')
+            else:
+                if node_category_label is None:
+                    node_category_label = node_tui_category_label  # override the node category_label if we have a TUI
+            node_tui_category_curie = kg2_util.convert_biolink_category_to_curie(node_tui_category_label)
+        source_ontology_update_date = source_ontology_node['update_date']
+        if node_update_date is None:
+            node_update_date = source_ontology_update_date
+
+        if node_description is not None:
+            node_description_xrefs_match = REGEX_XREF_END_DESCRIP.match(node_description)
+            if node_description_xrefs_match is not None:
+                node_description_xrefs_str = node_description_xrefs_match[1]
+                node_description_xrefs_list = node_description_xrefs_str.split(',')
+                for node_description_xref_str in node_description_xrefs_list:
+                    node_description_xref_str = node_description_xref_str.strip()
+                    if ':' in node_description_xref_str:
+                        node_xrefs.add(node_description_xref_str)
+            node_description_pubs = REGEX_PUBLICATIONS.findall(node_description)
+            for pub_curie in node_description_pubs:
+                node_publications.add(pub_curie)
+
+        # deal with node names that are ALLCAPS
+        if node_name is not None and node_name.isupper():
+            node_name = kg2_util.allcaps_to_only_first_letter_capitalized(node_name)
+
+        if node_name is not None:
+            if node_name.lower().startswith('obsolete:') or \
+               (node_curie_id.startswith(kg2_util.CURIE_PREFIX_GO + ':') and node_name.lower().startswith('obsolete ')):
+                node_deprecated = True
+                kg2_util.log_message(message="Node has obsolete name but not owl:deprecated; setting deprecated=True",
                                      ontology_name=iri_of_ontology,
+                                     node_curie_id=node_curie_id,
                                      output_stream=sys.stderr)
-                assert False
-            source_ontology_update_date = source_ontology_information['update_date']
-            if node_update_date is None:
-                node_update_date = source_ontology_update_date
-
-            if node_description is not None:
-                node_description_xrefs_match = REGEX_XREF_END_DESCRIP.match(node_description)
-                if node_description_xrefs_match is not None:
-                    node_description_xrefs_str = node_description_xrefs_match[1]
-                    node_description_xrefs_list = node_description_xrefs_str.split(',')
-                    for node_description_xref_str in node_description_xrefs_list:
-                        node_description_xref_str = node_description_xref_str.strip()
-                        if ':' in node_description_xref_str:
-                            node_xrefs.add(node_description_xref_str)
-                node_description_pubs = REGEX_PUBLICATIONS.findall(node_description)
-                for pub_curie in node_description_pubs:
-                    node_publications.add(pub_curie)
-
-            # deal with node names that are ALLCAPS
-            if node_name is not None and node_name.isupper():
-                node_name = kg2_util.allcaps_to_only_first_letter_capitalized(node_name)
-
-            if node_name is not None:
-                if node_name.lower().startswith('obsolete:') or \
-                   (node_curie_id.startswith(kg2_util.CURIE_PREFIX_GO + ':') and node_name.lower().startswith('obsolete ')):
-                    node_deprecated = True
-                    kg2_util.log_message(message="Node has obsolete name but not owl:deprecated; setting deprecated=True",
-                                         ontology_name=iri_of_ontology,
-                                         node_curie_id=node_curie_id,
-                                         output_stream=sys.stderr)
-
-                if REGEX_OBSOLETE.match(node_name) is not None:
-                    node_deprecated = True
-                    kg2_util.log_message(message="Node has obsolete regex in name but not owl:deprecated; setting deprecated=True",
-                                         ontology_name=iri_of_ontology,
-                                         node_curie_id=node_curie_id,
-                                         output_stream=sys.stderr)
 
-            if node_description is not None:
-                if node_description.lower().startswith('obsolete:') or node_description.lower().startswith('obsolete.'):
-                    node_deprecated = True
-                    kg2_util.log_message(message="Node has obsolete description but not owl:deprecated; setting deprecated=True",
-                                         ontology_name=iri_of_ontology,
-                                         node_curie_id=node_curie_id,
-                                         output_stream=sys.stderr)
+            if REGEX_OBSOLETE.match(node_name) is not None:
+                node_deprecated = True
+                kg2_util.log_message(message="Node has obsolete regex in name but not owl:deprecated; setting deprecated=True",
+                                     ontology_name=iri_of_ontology,
+                                     node_curie_id=node_curie_id,
+                                     output_stream=sys.stderr)
 
-            provided_by = ontology_curie_id
+        if node_description is not None:
+            if node_description.lower().startswith('obsolete:') or node_description.lower().startswith('obsolete.'):
+                node_deprecated = True
+                kg2_util.log_message(message="Node has obsolete description but not owl:deprecated; setting deprecated=True",
+                                     ontology_name=iri_of_ontology,
+                                     node_curie_id=node_curie_id,
+                                     output_stream=sys.stderr)
 
-            if node_name is None:
-                if node_gene_symbol is not None:
-                    node_name = node_gene_symbol
+        provided_by = ontology_curie_id
 
-            node_dict = kg2_util.make_node(node_curie_id,
-                                           iri,
-                                           node_name,
-                                           node_category_label,
-                                           node_update_date,
-                                           provided_by)
+        if node_name is None:
             if node_gene_symbol is not None:
-                node_dict['name'] = node_gene_symbol
-            node_dict['full_name'] = node_full_name
-            node_dict['description'] = node_description
-            node_dict['creation_date'] = node_creation_date      # slot name is not biolink standard
-            node_dict['deprecated'] = node_deprecated            # slot name is not biolink standard
-            node_dict['replaced_by'] = node_replaced_by_curie    # slot name is not biolink standard
-            node_dict['ontology node ids'] = [ontology_node_id]  # slot name is not biolink standard
-            node_dict['xrefs'] = sorted(list(node_xrefs))        # slot name is not biolink standard
-            node_dict['synonym'] = sorted(list(node_synonyms))   # slot name is not biolink standard
-            node_dict['publications'] = sorted(list(node_publications))
+                node_name = node_gene_symbol
+
+        node_dict = kg2_util.make_node(node_curie_id,
+                                       iri,
+                                       node_name,
+                                       node_category_label,
+                                       node_update_date,
+                                       provided_by)
+        if node_gene_symbol is not None:
+            node_dict['name'] = node_gene_symbol
+        node_dict['full_name'] = node_full_name
+        node_dict['description'] = node_description
+        node_dict['creation_date'] = node_creation_date      # slot name is not biolink standard
+        node_dict['deprecated'] = node_deprecated            # slot name is not biolink standard
+        node_dict['replaced_by'] = node_replaced_by_curie    # slot name is not biolink standard
+        node_dict['ontology node ids'] = [ontology_node_id]  # slot name is not biolink standard
+        node_dict['xrefs'] = sorted(list(node_xrefs))        # slot name is not biolink standard
+        node_dict['synonym'] = sorted(list(node_synonyms))   # slot name is not biolink standard
+        node_dict['publications'] = sorted(list(node_publications))
+        if node_curie_id == ontology_curie_id:
+            source_ontology_node = node_dict  # issue 984
+        node_dict_list.append(node_dict)
+
+    edges_list = []
+    for (object_id, subject_id, predicate_dict) in ontology.get_graph().edges(data=True):
+        assert type(predicate_dict) == dict
+        edges_list.append((object_id, subject_id, predicate_dict['pred']))
+
+    return {'metadata': {key: value for key, value in ontology_info_dict.items() if key != 'ontology'},
+            'ontology node': ontology_node,
+            'nodes': node_dict_list,
+            'edges': edges_list}
+
+
+
+def make_nodes_dict_from_ont_fragments(ont_fragments_list: list,
+                                       biolink_categories_ontology_depths: dict) -> Dict[str, dict]:
+    ret_dict = dict()
+
+    def biolink_depth_getter(category: str):
+        return biolink_categories_ontology_depths.get(category, None)
+
+    for ont_fragment in ont_fragments_list:
+        ontology_node = ont_fragment['ontology node']
+        ontology_curie_id = ontology_node['id']
+        ret_dict[ontology_curie_id] = ontology_node
 
+        for node_dict in ont_fragment['nodes']:
+            node_curie_id = node_dict['id']
             if node_curie_id in ret_dict:
-                if node_curie_id != provided_by:
-                    node_dict = kg2_util.merge_two_dicts(ret_dict[node_curie_id],
-                                                         node_dict,
-                                                         biolink_depth_getter)
+                prev_provided_by = ret_dict[node_curie_id].get('provided_by')
+                if prev_provided_by is not None and node_curie_id == prev_provided_by:
+                    continue  # issue 984
+                if node_curie_id != ontology_curie_id:
+                    node_dict = kg2_util.merge_two_dicts_in_place(ret_dict[node_curie_id],
+                                                                  node_dict,
+                                                                  biolink_depth_getter)
                     ret_dict[node_curie_id] = node_dict
                 else:
                     ret_dict[node_curie_id] = node_dict  # issue 984
             else:
                 ret_dict[node_curie_id] = node_dict
 
-    return ret_dict
+    for node_dict in ret_dict.values():
+        kg2_util.finish_merged_dict(node_dict)
 
+    return ret_dict
 
-def get_rels_dict(nodes: dict,
-                  ont_file_information_dict_list: list,
-                  uri_to_curie_shortener: callable,
-                  curie_to_uri_expander: callable,
-                  map_of_node_ontology_ids_to_curie_ids: dict):
-    rels_dict = dict()
 
-    for ont_file_information_dict in ont_file_information_dict_list:
-        ontology = ont_file_information_dict['ontology']
-        ontology_id = ont_file_information_dict['id']
-        ont_graph = ontology.get_graph()
+# Generates (rel_key, edge) pairs for all relationships, including xrefs as
+# relationships; a rel_key can occur more than once, and only the first edge
+# for each rel_key is to be kept (see write_new_rels)
+def get_rels(nodes: dict,
+             ont_fragments_list: list,
+             uri_to_curie_shortener: callable,
+             curie_to_uri_expander: callable,
+             map_of_node_ontology_ids_to_curie_ids: dict):
+    for ont_index, ont_fragment in enumerate(ont_fragments_list):
+        ontology_id = ont_fragment['metadata']['id']
         ontology_curie_id = map_of_node_ontology_ids_to_curie_ids[ontology_id]
-        for (object_id, subject_id, predicate_dict) in ont_graph.edges(data=True):
-            assert type(predicate_dict) == dict
-
+        ont_fragment_edges = ont_fragment['edges']
+        # the raw edges are not needed once they have been mapped
+        ont_fragment['edges'] = None
+        for (object_id, subject_id, edge_pred_string) in ont_fragment_edges:
             ontology_node = nodes.get(ontology_curie_id, None)
             if ontology_node is not None:
                 ontology_update_date = ontology_node['update_date']
@@ -917,20 +1219,19 @@ def get_rels_dict(nodes: dict,
             subject_curie_id = map_of_node_ontology_ids_to_curie_ids.get(subject_id, None)
             if subject_curie_id is None:
                 kg2_util.log_message(message="subject node ontology ID has no curie ID in the map",
-                                     ontology_name=ontology.id,
+                                     ontology_name=ontology_id,
                                      node_curie_id=subject_id,
                                      output_stream=sys.stderr)
                 continue
             object_curie_id = map_of_node_ontology_ids_to_curie_ids.get(object_id, None)
             if object_curie_id is None:
                 kg2_util.log_message(message="object node ontology ID has no curie ID in the map",
-                                     ontology_name=ontology.id,
+                                     ontology_name=ontology_id,
                                      node_curie_id=object_id,
                                      output_stream=sys.stderr)
                 continue
 
             predicate_label = None
-            edge_pred_string = predicate_dict['pred']
 
             if subject_curie_id.startswith(kg2_util.CURIE_PREFIX_UMLS_STY) and \
                object_curie_id.startswith(kg2_util.CURIE_PREFIX_UMLS_STY) and edge_pred_string == 'subClassOf':
@@ -952,7 +1253,7 @@ def get_rels_dict(nodes: dict,
                     elif edge_pred_string in kg2_util.RDF_EDGE_NAMES_SET:
                         predicate_curie = kg2_util.CURIE_PREFIX_RDF + ':' + edge_pred_string
                     else:
-                        assert False, "Cannot map predicate name: " + edge_pred_string + " to a predicate CURIE, in ontology: " + ontology.id
+                        assert False, "Cannot map predicate name: " + edge_pred_string + " to a predicate CURIE, in ontology: " + ontology_id
                     predicate_label = kg2_util.convert_camel_case_to_snake_case(edge_pred_string)
                 else:
                     # edge_pred_string is a CURIE
@@ -981,8 +1282,9 @@ def get_rels_dict(nodes: dict,
 
             if predicate_curie is None:
                 kg2_util.log_message(message="predicate IRI has no CURIE: " + predicate_iri,
-                                     ontology_name=ontology.id,
-                                     output_stream=sys.stderr)
+                                     ontology_name=ontology_id,
+                                     output_stream=sys.stderr,
+                                     template="predicate IRI has no CURIE")
                 continue
 
             if subject_curie_id == object_curie_id and predicate_label == 'xref':
@@ -1022,31 +1324,52 @@ def get_rels_dict(nodes: dict,
             predicate_label = predicate_label.replace(' ', '_')
             # Only tested on Food and Efo ontologies
             predicate_label = kg2_util.convert_camel_case_to_snake_case(predicate_label)
-            if rels_dict.get(rel_key, None) is None:
-                edge = kg2_util.make_edge(subject_curie_id,
-                                          object_curie_id,
-                                          predicate_curie,
-                                          predicate_label,
-                                          ontology_curie_id,
-                                          ontology_update_date)
-                rels_dict[rel_key] = edge
-        for node_id, node_dict in nodes.items():
-            xrefs = node_dict['xrefs']
-            if xrefs is not None:
-                for xref_node_id in xrefs:
-                    if xref_node_id in nodes and node_id != xref_node_id:
-                        provided_by = nodes[node_id]['provided_by'][0]
-                        key = make_rel_key(node_id, CURIE_OBO_XREF, xref_node_id, provided_by)
-                        if rels_dict.get(key, None) is None:
-                            edge = kg2_util.make_edge(node_id,
-                                                      xref_node_id,
-                                                      CURIE_OBO_XREF,
-                                                      'xref',
-                                                      provided_by,
-                                                      ontology_update_date)
-                            rels_dict[key] = edge
-
-    return rels_dict
+            yield rel_key, kg2_util.make_edge(subject_curie_id,
+                                              object_curie_id,
+                                              predicate_curie,
+                                              predicate_label,
+                                              ontology_curie_id,
+                                              ontology_update_date)
+
+        if ont_index == 0:
+            # The xref edges do not depend on the ontology, so they are made
+            # in one pass over the nodes, dated with the first ontology's
+            # update date.  They come right after the first ontology's edges,
+            # where they were first made when they were remade for every
+            # ontology, so that for a rel_key that is also the rel_key of an
+            # ontology edge, the first one of the edges is still the same
+            yield from get_xref_rels(nodes, nodes[ontology_curie_id]['update_date'])
+
+
+def get_xref_rels(nodes: dict,
+                  update_date: str):
+    for node_id, node_dict in nodes.items():
+        xrefs = node_dict['xrefs']
+        if xrefs is not None:
+            provided_by = node_dict['provided_by'][0]
+            for xref_node_id in xrefs:
+                if xref_node_id in nodes and node_id != xref_node_id:
+                    key = make_rel_key(node_id, CURIE_OBO_XREF, xref_node_id, provided_by)
+                    yield key, kg2_util.make_edge(node_id,
+                                                  xref_node_id,
+                                                  CURIE_OBO_XREF,
+                                                  'xref',
+                                                  provided_by,
+                                                  update_date)
+
+
+def write_new_rels(rels, rel_keys: kg2_util.HashedIDSet, edges_output):
+    # writes the first edge for each rel_key, checking the rel_keys against
+    # the (compact, hashed) set of rel_keys already written in batches, so
+    # that the hash lookups are vectorized
+    while True:
+        rels_batch = list(itertools.islice(rels, kg2_util.HashedIDSet.BATCH_SIZE))
+        if len(rels_batch) == 0:
+            break
+        rels_new = rel_keys.add_many([rel_key for rel_key, _ in rels_batch])
+        for (_, edge), rel_new in zip(rels_batch, rels_new):
+            if rel_new:
+                edges_output.write(edge)
 
 
 def get_inverse_rels(biolink_ontology, metadata_dict, uri_to_curie_shortener):
@@ -1232,7 +1555,17 @@ def make_convert_bpv_predicate_to_curie(uri_shortener: callable,
 def make_arg_parser():
     arg_parser = argparse.ArgumentParser(description='multi_ont_to_json_kg.py: builds the KG2 knowledge graph for the RTX system')
     arg_parser.add_argument('--test', dest='test', action="store_true", default=False)
-    arg_parser.add_argument('--savePickle', dest='save_pickle', action="store_true", default=False)
+    arg_parser.add_argument('--ontCacheDir', dest='ont_cache_dir', type=str, default=None)
+    arg_parser.add_argument('--ontCacheMaxSizeGB', dest='ont_cache_max_size_gb', type=float,
+                            default=kg2_util.ONTOLOGY_CACHE_MAX_SIZE_GB)
+    arg_parser.add_argument('--tempDir', dest='temp_dir', type=str, default=None)
+    arg_parser.add_argument('--exactIDIndex', dest='exact_id_index', action='store_true', default=False,
+                            help='confirm hashed edge-key matches against the keys; without it, a hash collision '
+                                 'can silently drop a distinct edge (only the expected number of collisions is logged)')
+    arg_parser.add_argument('--numWorkers', dest='num_workers', type=int, default=1)
+    arg_parser.add_argument('--owltoolsMemoryGB', dest='owltools_memory_gb', type=int, default=None)
+    arg_parser.add_argument('--logSummaryInterval', dest='log_summary_interval', type=float, default=None)
+    arg_parser.add_argument('--logDetailFile', dest='log_detail_file', type=str, default=None)
     arg_parser.add_argument('categoriesFile', type=str)
     arg_parser.add_argument('curiesToURIFile', type=str)
     arg_parser.add_argument('ontLoadInventoryFile', type=str)
@@ -1247,12 +1580,15 @@ if __name__ == '__main__':
     print("Start time: ", date())
     delete_ontobio_cachier_caches()
     args = make_arg_parser().parse_args()
+    if args.log_summary_interval is not None or args.log_detail_file is not None:
+        kg2_util.start_log_sink(args.log_summary_interval if args.log_summary_interval is not None
+                                else kg2_util.LOG_SUMMARY_INTERVAL_SEC,
+                                args.log_detail_file)
     curies_to_categories_file_name = args.categoriesFile
     curies_to_uri_file_name = args.curiesToURIFile
     ont_load_inventory_file = args.ontLoadInventoryFile
     output_nodes_file_name = args.outputNodesFile
     output_edges_file_name = args.outputEdgesFile
-    save_pickle = args.save_pickle
     test_mode = args.test
     curies_to_categories = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(curies_to_categories_file_name))
     map_dict = kg2_util.make_uri_curie_mappers(curies_to_uri_file_name)
@@ -1260,6 +1596,13 @@ if __name__ == '__main__':
 
     ont_urls_and_files = tuple(kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(ont_load_inventory_file)))
 
+    # the ontology fragments depend on the configuration files and on this code
+    config_hash = hashlib.sha256('\t'.join([kg2_util.get_file_sha256(file_name) for file_name in
+                                            (curies_to_categories_file_name,
+                                             curies_to_uri_file_name,
+                                             __file__,
+                                             kg2_util.__file__)]).encode('utf-8')).hexdigest()
+
     nodes_info, edges_info = kg2_util.create_kg2_jsonlines(test_mode)
     nodes_output = nodes_info[0]
     edges_output = edges_info[0]
@@ -1270,8 +1613,15 @@ if __name__ == '__main__':
              ont_urls_and_files,
              nodes_output,
              edges_output,
-             test_mode,
-             save_pickle)
+             None,
+             test_mode=test_mode,
+             ont_cache_dir=args.ont_cache_dir,
+             ont_cache_max_size_gb=args.ont_cache_max_size_gb,
+             num_workers=args.num_workers,
+             owltools_memory_gb=args.owltools_memory_gb,
+             config_hash=config_hash,
+             exact_id_index=args.exact_id_index,
+             temp_dir=args.temp_dir)
 
     kg2_util.close_kg2_jsonlines(nodes_info, edges_info, output_nodes_file_name, output_edges_file_name)
 
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+'''Runs the post-ETL steps of the KG2 build (Stats, Simplify, Slim, Simplify_Stats
+   and TSV) in a single pass through the merged KG2 graph: each merged edge (and
+   then each merged node) goes through the stats report of the merged graph, the
+   predicate remapping, and then (if it is kept) the simplified graph output, the
+   stats report of the simplified graph, the slim graph output, and the Neo4j
+   TSV output. The outputs are the same as the outputs of
+   report_stats_on_kg_jsonl.py, filter_kg_and_remap_predicates.py, slim_kg2.py,
+   report_stats_on_kg_jsonl.py --useSimplifiedPredicates, and kg_json_to_tsv.py.
+
+   Usage: post_etl_pipeline.py [--test] [--dropNegated] [--dropSelfEdgesExcept <predicates>]
+                               --reportFile <kg2-report.json>
+                               --simplifiedReportFile <kg2-simplified-report.json>
+                               --slimNodesFile <kg2-slim-nodes.jsonl>
+                               --slimEdgesFile <kg2-slim-edges.jsonl>
+                               --tsvDir <TSV directory> [--tsvMaxShardBytes <N>]
+                               <predicate-remap.yaml> <kg2-provided-by-curie-to-infores-curie.yaml>
+                               <curies-to-urls-map.yaml>
+                               <kg2-merged-nodes.jsonl> <kg2-merged-edges.jsonl>
+                               <kg2-simplified-nodes.jsonl> <kg2-simplified-edges.jsonl>
+                               <kg2-version.txt>
+'''
+
+__author__ = ''
+__copyright__ = ''
+__credits__ = []
+__license__ = 'MIT'
+__version__ = '0.1.0'
+__maintainer__ = ''
+__email__ = ''
+__status__ = 'Prototype'
+
+import argparse
+import filter_kg_and_remap_predicates
+import kg2_util
+import kg_json_to_tsv
+import os
+import report_stats_on_kg_jsonl
+import slim_kg2
+
+
+def make_arg_parser():
+    arg_parser = argparse.ArgumentParser(description='post_etl_pipeline.py: runs the KG2 post-ETL steps in a single pass through the merged graph')
+    arg_parser.add_argument('predicateRemapYaml', type=str, help="The YAML file describing how predicates should be remapped to simpler predicates")
+    arg_parser.add_argument('inforesRemapYaml', type=str, help="The YAML file describing how knowledge_source fields should be remapped to Translator infores curies")
+    arg_parser.add_argument('curiesToURIFile', type=str, help="The file mapping CURIE prefixes to URI fragments")
+    arg_parser.add_argument('inputNodesFile', type=str, help="The merged KG2 nodes file, in JSON Lines format")
+    arg_parser.add_argument('inputEdgesFile', type=str, help="The merged KG2 edges file, in JSON Lines format")
+    arg_parser.add_argument('outputNodesFile', type=str, help="The simplified KG2 nodes file, in JSON Lines format")
+    arg_parser.add_argument('outputEdgesFile', type=str, help="The simplified KG2 edges file, in JSON Lines format")
+    arg_parser.add_argument('versionFile', type=str, help="The text file storing the KG2 version")
+    arg_parser.add_argument('--test', dest='test', action='store_true', default=False)
+    arg_parser.add_argument('--dropSelfEdgesExcept', required=False, dest='drop_self_edges_except', default=None)
+    arg_parser.add_argument('--dropNegated', dest='drop_negated', action='store_true', default=False)
+    arg_parser.add_argument('--reportFile', dest='report_file', type=str, required=True,
+                            help="The stats report of the merged KG2 graph, in JSON format")
+    arg_parser.add_argument('--simplifiedReportFile', dest='simplified_report_file', type=str, required=True,
+                            help="The stats report of the simplified KG2 graph, in JSON format")
+    arg_parser.add_argument('--slimNodesFile', dest='slim_nodes_file', type=str, required=True,
+                            help="The slim KG2 nodes file, in JSON Lines format")
+    arg_parser.add_argument('--slimEdgesFile', dest='slim_edges_file', type=str, required=True,
+                            help="The slim KG2 edges file, in JSON Lines format")
+    arg_parser.add_argument('--tsvDir', dest='tsv_dir', type=str, required=True,
+                            help="The directory for the Neo4j TSV files")
+    arg_parser.add_argument('--tsvMaxShardBytes', dest='tsv_max_shard_bytes', type=int, default=None,
+                            help="Write the Neo4j TSV files as gzip-compressed shards of at most this many bytes (uncompressed) each; 0 means no shards")
+    return arg_parser
+
+
+def add_to_stats(records, stats):
+    # passes the records through, adding each one to the stats before it is
+    # modified by the next step
+    for record in records:
+        stats.add(record)
+        yield record
+
+
+class SimplifiedEdgeStages:
+    # the steps that each simplified edge goes through; the TSV step is last,
+    # because it is the only step that may modify the edge
+    def __init__(self, simplified_edges_output, simplified_edge_stats, slim_edges_output, edges_tsv_output):
+        self.simplified_edges_output = simplified_edges_output
+        self.simplified_edge_stats = simplified_edge_stats
+        self.slim_edges_output = slim_edges_output
+        self.edges_tsv_output = edges_tsv_output
+
+    def write(self, edge_dict: dict):
+        self.simplified_edges_output.write(edge_dict)
+        self.simplified_edge_stats.add(edge_dict)
+        self.slim_edges_output.write(slim_kg2.slim_edge(edge_dict))
+        self.edges_tsv_output.write_row(*kg_json_to_tsv.make_edge_tsv_row(edge_dict))
+
+
+class SimplifiedNodeStages:
+    # the steps that each simplified node goes through; the TSV step is last,
+    # because it moves the node's knowledge_source to its provided_by
+    def __init__(self, simplified_nodes_output, simplified_node_stats, slim_nodes_output, nodes_tsv_output,
+                 map_ks_curie_to_infores_curie):
+        self.simplified_nodes_output = simplified_nodes_output
+        self.simplified_node_stats = simplified_node_stats
+        self.slim_nodes_output = slim_nodes_output
+        self.nodes_tsv_output = nodes_tsv_output
+        self.map_ks_curie_to_infores_curie = map_ks_curie_to_infores_curie
+
+    def write(self, node_dict: dict):
+        self.simplified_nodes_output.write(node_dict)
+        self.simplified_node_stats.add(node_dict)
+        self.slim_nodes_output.write(slim_kg2.slim_node(node_dict))
+        self.nodes_tsv_output.write_row(*kg_json_to_tsv.make_node_tsv_row(node_dict, self.map_ks_curie_to_infores_curie))
+
+
+if __name__ == '__main__':
+    args = make_arg_parser().parse_args()
+    test_mode = args.test
+    drop_negated = args.drop_negated
+    drop_self_edges_except = args.drop_self_edges_except
+
+    print(f"Start time: {kg2_util.date()}")
+
+    predicate_remap_config = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(args.predicateRemapYaml))
+    infores_remap_config = kg2_util.safe_load_yaml_from_string(kg2_util.read_file_to_string(args.inforesRemapYaml))
+    curie_to_uri_expander = kg2_util.make_uri_curie_mappers(args.curiesToURIFile)['expand']
+    map_ks_curie_to_infores_curie = kg_json_to_tsv.make_knowledge_source_to_infores_map(args.inforesRemapYaml)
+
+    if drop_self_edges_except is not None:
+        assert type(drop_self_edges_except) == str
+        drop_self_edges_except = set(drop_self_edges_except.split(','))
+
+    simplified_nodes_info, simplified_edges_info = kg2_util.create_kg2_jsonlines(test_mode)
+    slim_nodes_info, slim_edges_info = kg2_util.create_kg2_jsonlines(test_mode)
+    os.makedirs(args.tsv_dir, exist_ok=True)
+    nodes_tsv_output = kg_json_to_tsv.TSVOutput(args.tsv_dir, "nodes", kg_json_to_tsv.make_node_tsv_header,
+                                                args.tsv_max_shard_bytes)
+    edges_tsv_output = kg_json_to_tsv.TSVOutput(args.tsv_dir, "edges", kg_json_to_tsv.make_edge_tsv_header,
+                                                args.tsv_max_shard_bytes)
+
+    # The edges go first, since the stats of the nodes need the set of nodes on edges
+    merged_edge_stats = report_stats_on_kg_jsonl.EdgeStatsAccumulator()
+    simplified_edge_stats = report_stats_on_kg_jsonl.EdgeStatsAccumulator(use_simplified_predicates=True)
+    edge_stages = SimplifiedEdgeStages(simplified_edges_info[0], simplified_edge_stats,
+                                       slim_edges_info[0], edges_tsv_output)
+
+    edges_read_jsonlines_info = kg2_util.start_read_jsonlines(args.inputEdgesFile)
+    print(f"Starting edges {kg2_util.date()}")
+    # the nodes have not been read yet, so every source predicate CURIE is
+    # reported as not in the nodes; the ones that are found in the nodes are
+    # removed from that set below
+    remap_edges_results = filter_kg_and_remap_predicates.remap_edges(add_to_stats(edges_read_jsonlines_info[0], merged_edge_stats),
+                                                                     infores_remap_config,
+                                                                     predicate_remap_config,
+                                                                     curie_to_uri_expander,
+                                                                     edge_stages,
+                                                                     drop_self_edges_except,
+                                                                     set(),
+                                                                     drop_negated)
+    kg2_util.end_read_jsonlines(edges_read_jsonlines_info)
+    print(f"Finished edges {kg2_util.date()}")
+    source_predicate_curies_not_in_nodes = remap_edges_results[1]
+
+    merged_edges_report, merged_nodes_on_edges = merged_edge_stats.report()
+    simplified_edges_report, simplified_nodes_on_edges = simplified_edge_stats.report()
+
+    merged_node_stats = report_stats_on_kg_jsonl.NodeStatsAccumulator(merged_nodes_on_edges)
+    simplified_node_stats = report_stats_on_kg_jsonl.NodeStatsAccumulator(simplified_nodes_on_edges,
+                                                                          use_simplified_predicates=True)
+    node_stages = SimplifiedNodeStages(simplified_nodes_info[0], simplified_node_stats,
+                                       slim_nodes_info[0], nodes_tsv_output, map_ks_curie_to_infores_curie)
+
+    knowledge_source_curies_not_in_config_nodes = set()
+    nodes_read_jsonlines_info = kg2_util.start_read_jsonlines(args.inputNodesFile)
+    node_ctr = 0
+    for node_dict in nodes_read_jsonlines_info[0]:
+        node_ctr += 1
+        if node_ctr % 1000000 == 0:
+            print(f"Processing node {node_ctr}")
+        merged_node_stats.add(node_dict)
+        source_predicate_curies_not_in_nodes.discard(node_dict['id'])
+        filter_kg_and_remap_predicates.remap_node(node_dict, infores_remap_config, knowledge_source_curies_not_in_config_nodes)
+        node_stages.write(node_dict)
+    kg2_util.end_read_jsonlines(nodes_read_jsonlines_info)
+    print(f"Completed nodes {kg2_util.date()}")
+
+    # Issue warnings for problems that came up
+    filter_kg_and_remap_predicates.warning_knowledge_source_curies_not_in_config_nodes(knowledge_source_curies_not_in_config_nodes)
+    filter_kg_and_remap_predicates.warning_remap_edges_results(remap_edges_results)
+
+    node_stages.write(filter_kg_and_remap_predicates.make_build_node(args.versionFile, test_mode))
+
+    kg2_util.save_json(report_stats_on_kg_jsonl.make_stats_report(merged_edges_report, merged_node_stats.report()),
+                       args.report_file, True)
+    kg2_util.save_json(report_stats_on_kg_jsonl.make_stats_report(simplified_edges_report, simplified_node_stats.report()),
+                       args.simplified_report_file, True)
+
+    print(f"Closing output files {kg2_util.date()}")
+    kg2_util.close_kg2_jsonlines(simplified_nodes_info, simplified_edges_info, args.outputNodesFile, args.outputEdgesFile)
+    kg2_util.close_kg2_jsonlines(slim_nodes_info, slim_edges_info, args.slim_nodes_file, args.slim_edges_file)
+    nodes_tsv_output.close()
+    edges_tsv_output.close()
+    print(f"Finish time: {kg2_util.date()}")
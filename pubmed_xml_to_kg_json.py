@@ -2,8 +2,13 @@
 ''' pubmed_xml_to_kg_json.py: Extracts a KG2 JSON file from the
     PubMed XML files
 
-    Usage: pubmed_xml_to_kg_json.py [--test] <inputDirectory>
-    <kg2PMIDs.json> <outputFile.json>
+    Usage: pubmed_xml_to_kg_json.py [--test] [--numWorkers <N>] <inputDirectory>
+    <kg2PMIDs.json> <outputNodesFile.jsonl> <outputEdgesFile.jsonl>
+
+    Each PubMed XML file is converted by a worker process (one file per task),
+    which streams the file one <PubmedArticle> at a time and writes its nodes
+    and edges to its own JSON Lines files; the per-file outputs are then
+    concatenated in file-name order.
 '''
 
 import xmltodict
@@ -11,8 +16,11 @@ import datetime
 import kg2_util
 import json
 import gzip
+import multiprocessing
 import os
 import argparse
+import shutil
+import tempfile
 
 
 __author__ = 'Erica Wood'
@@ -30,6 +38,7 @@ PMID_KB_IRI = kg2_util.BASE_URL_PMID
 BIOLINK_CATEGORY_PUBLICATION = "publication"
 PMID_PROVIDED_BY_CURIE_ID = kg2_util.CURIE_PREFIX_IDENTIFIERS_ORG_REGISTRY \
                                 + ":pubmed"
+MESH_PREDICATE_LABEL = kg2_util.EDGE_LABEL_BIOLINK_RELATED_TO
 
 
 def get_args():
@@ -40,9 +49,15 @@ def get_args():
                             dest='test',
                             action="store_true",
                             default=False)
+    arg_parser.add_argument('--numWorkers',
+                            dest='num_workers',
+                            type=int,
+                            default=1,
+                            help='number of PubMed XML files to convert in parallel')
     arg_parser.add_argument('inputDirectory', type=str)
     arg_parser.add_argument('kg2PMIDs', type=str)
-    arg_parser.add_argument('outputFile', type=str)
+    arg_parser.add_argument('outputNodesFile', type=str)
+    arg_parser.add_argument('outputEdgesFile', type=str)
     return arg_parser.parse_args()
 
 
@@ -159,6 +174,38 @@ def make_node_and_edges(article: dict,
     return [{"nodes": nodes, "edges": edges}, update_date]
 
 
+def convert_pubmed_file(convert_args: tuple):
+    (input_file_name, output_nodes_file_name, output_edges_file_name, test_mode) = convert_args
+    nodes_info, edges_info = kg2_util.create_kg2_jsonlines(test_mode)
+    nodes_output = nodes_info[0]
+    edges_output = edges_info[0]
+    latest_date = 0
+    article_count = 0
+
+    def process_article(path: list, article: dict):
+        nonlocal latest_date, article_count
+        # the update files also contain <DeleteCitation> elements
+        if path[-1][0] != 'PubmedArticle':
+            return True
+        article_count += 1
+        [data, update_date] = make_node_and_edges(article,
+                                                  MESH_PREDICATE_LABEL)
+        for node in data["nodes"]:
+            nodes_output.write(node)
+        for edge in data["edges"]:
+            edges_output.write(edge)
+        if date_to_num(update_date) > latest_date:
+            latest_date = date_to_num(update_date)
+        return True
+
+    xml_file = gzip.open(input_file_name)
+    xmltodict.parse(xml_file, item_depth=2, item_callback=process_article)
+    xml_file.close()
+    kg2_util.close_kg2_jsonlines(nodes_info, edges_info,
+                                 output_nodes_file_name, output_edges_file_name)
+    return [latest_date, article_count]
+
+
 if __name__ == '__main__':
     print("Starting Script:", date())
     args = get_args()
@@ -166,28 +213,33 @@ if __name__ == '__main__':
     pmids = set(json.load(open(args.kg2PMIDs)))
     print("Finishing PubMedID Load:", date(), ",", len(pmids), "PMIDs in KG2")
     pubmed_dir = args.inputDirectory
-    nodes = []
-    edges = []
+    file_names = sorted(filename for filename in os.listdir(pubmed_dir)
+                        if ".gz" in filename)
+    shard_dir = tempfile.mkdtemp(prefix=kg2_util.TEMP_FILE_PREFIX + '-pubmed-')
+    shard_nodes_file_names = [os.path.join(shard_dir, 'nodes-' + str(i) + '.jsonl')
+                              for i in range(len(file_names))]
+    shard_edges_file_names = [os.path.join(shard_dir, 'edges-' + str(i) + '.jsonl')
+                              for i in range(len(file_names))]
+    convert_args = [(os.path.join(pubmed_dir, file_names[i]),
+                     shard_nodes_file_names[i],
+                     shard_edges_file_names[i],
+                     args.test) for i in range(len(file_names))]
     latest_date = 0
-    mesh_predicate_label = kg2_util.EDGE_LABEL_BIOLINK_RELATED_TO
-
-    for filename in os.listdir(pubmed_dir):
-        if ".gz" in filename:
-            print("Starting Load of", filename, ":", date())
-            xml_file = gzip.open(pubmed_dir + filename)
-            data = xmltodict.parse(xml_file.read())
-            print("Finished Load of", filename, ":", date())
-            articles = data["PubmedArticleSet"]["PubmedArticle"]
-
-            for article in articles:
-                [data, update_date] = make_node_and_edges(article,
-                                                          mesh_predicate_label)
-                for node in data["nodes"]:
-                    nodes.append(node)
-                for edge in data["edges"]:
-                    edges.append(edge)
-                if date_to_num(update_date) > latest_date:
-                    latest_date = date_to_num(update_date)
+
+    # the workers are forked, so that they share the set of KG2 PMIDs
+    pool = None
+    if args.num_workers > 1:
+        pool = multiprocessing.get_context('fork').Pool(args.num_workers)
+        results = pool.imap(convert_pubmed_file, convert_args)
+    else:
+        results = map(convert_pubmed_file, convert_args)
+    for filename, [file_latest_date, article_count] in zip(file_names, results):
+        print("Finished", filename, "(" + str(article_count), "articles):", date())
+        if file_latest_date > latest_date:
+            latest_date = file_latest_date
+    if pool is not None:
+        pool.close()
+        pool.join()
 
     latest_date = {"Year": str(latest_date)[0:4],
                    "Month": str(latest_date)[4:6],
@@ -198,13 +250,15 @@ if __name__ == '__main__':
                                       kg2_util.SOURCE_NODE_CATEGORY,
                                       extract_date(latest_date),
                                       PMID_PROVIDED_BY_CURIE_ID)
-    nodes.append(pmid_kp_node)
-    print("Saving JSON:", date())
-    kg2_util.save_json({"nodes": nodes,
-                        "edges": edges},
-                       args.outputFile,
-                       args.test)
-    print("Finished saving JSON:", date())
-    del nodes
-    del edges
+    kp_node_file_name = os.path.join(shard_dir, 'kp-node.jsonl')
+    kp_node_info = kg2_util.create_single_jsonlines(args.test)
+    kp_node_info[0].write(pmid_kp_node)
+    kg2_util.close_single_jsonlines(kp_node_info, kp_node_file_name)
+    print("Writing JSON Lines:", date())
+    kg2_util.concatenate_files(shard_nodes_file_names + [kp_node_file_name],
+                               args.outputNodesFile)
+    kg2_util.concatenate_files(shard_edges_file_names,
+                               args.outputEdgesFile)
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    print("Finished writing JSON Lines:", date())
     print("Script Finished:", date())
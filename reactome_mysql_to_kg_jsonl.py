@@ -11,6 +11,7 @@ import json
 import kg2_util
 import argparse
 import datetime
+import sys
 
 
 __author__ = 'Erica Wood'
@@ -73,6 +74,26 @@ def run_sql(sql: str, connection):
     return results
 
 
+def stream_sql(sql: str, connection):
+    # like run_sql, but the rows are streamed from the server as they are
+    # consumed, rather than all being loaded into memory first; no other
+    # query can be run on the connection until the rows have been consumed.
+    # Like run_sql, a query that fails with an InternalError gives no rows;
+    # but if it fails after some rows have been streamed, those rows have
+    # already been consumed (where run_sql would have given no rows), so a
+    # warning is logged that the rest of the rows are missing
+    num_rows = 0
+    try:
+        for row in kg2_util.stream_sql_results(connection, sql):
+            num_rows += 1
+            yield row
+    except pymysql.err.InternalError as e:
+        if num_rows > 0:
+            kg2_util.log_message("query failed after " + str(num_rows) + " rows were streamed; " +
+                                 "the rest of its rows are missing: " + str(e) + "; query: " + sql,
+                                 output_stream=sys.stderr)
+
+
 def format_edge(subject_id: str, object_id: str, predicate_label: str):
     relation_curie = kg2_util.predicate_label_to_curie(predicate_label,
                                                        REACTOME_RELATION_CURIE_PREFIX)
@@ -320,7 +341,7 @@ def get_nodes(connection, nodes_output, test):
                  GROUP BY si.identifier"
     if test:
         nodes_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    for result in run_sql(nodes_sql, connection):
+    for result in stream_sql(nodes_sql, connection):
         (reactome_id,
          name,
          update_date,
@@ -394,7 +415,7 @@ def get_reaction_inputs_and_outputs(connection, edges_output, test):
               ON si_obj.DB_ID=dbobj_obj.stableIdentifier"
     if test:
         in_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    in_results = run_sql(in_sql, connection)
+    in_results = stream_sql(in_sql, connection)
     for input in in_results:
         subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + input[0])
         object_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + input[1])
@@ -420,7 +441,7 @@ def get_reaction_inputs_and_outputs(connection, edges_output, test):
                ON si_obj.DB_ID=dbobj_obj.stableIdentifier"
     if test:
         out_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    out_results = run_sql(out_sql, connection)
+    out_results = stream_sql(out_sql, connection)
     for out in out_results:
         subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + out[0])
         object_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + out[1])
@@ -449,7 +470,7 @@ def get_pathway_events(connection, edges_output, test):
                  ON si_obj.DB_ID=dbobj_obj.stableIdentifier"
     if test:
         event_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    for has_event in run_sql(event_sql, connection):
+    for has_event in stream_sql(event_sql, connection):
         subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + has_event[0])
         object_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + has_event[1])
         if subject_id is None or object_id is None:
@@ -497,7 +518,7 @@ def get_event_characteristics(connection, edges_output, test):
                             ON eo.DB_ID=ev_dis.disease"
     if test:
         event_to_disease_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    for ev_dis in run_sql(event_to_disease_sql, connection):
+    for ev_dis in stream_sql(event_to_disease_sql, connection):
         subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + ev_dis[0])
         if subject_id is None:
             continue
@@ -584,6 +605,8 @@ def get_event_characteristics(connection, edges_output, test):
                       GROUP BY si_sub.identifier, si_obj.identifier, si_reg.identifier"
     if test:
         regulation_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
+    # not streamed, because get_author_of_PMID queries the same connection
+    # from inside the loop
     for result in run_sql(regulation_sql, connection):
         subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + result[0])
         object_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + result[3])
@@ -660,7 +683,7 @@ def get_physical_entity_characteristics(connection, edges_output, test):
                              ON eo.DB_ID=pe_dis.disease"
     if test:
         entity_to_disease_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    for pe_dis in run_sql(entity_to_disease_sql, connection):
+    for pe_dis in stream_sql(entity_to_disease_sql, connection):
         subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + pe_dis[0])
         if subject_id is None:
             continue
@@ -715,7 +738,7 @@ def get_equivalencies(connection, edges_output, test):
                  ON go.DB_ID=event.goBiologicalProcess"
     if test:
         go_eq_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    for go_eq in run_sql(go_eq_sql, connection):
+    for go_eq in stream_sql(go_eq_sql, connection):
         go_id = "GO:" + go_eq[0]
         react_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + go_eq[1])
         if react_id is None:
@@ -744,7 +767,7 @@ def get_equivalencies(connection, edges_output, test):
                   ON rd_n.DB_ID=rd.DB_ID"
     if test:
         ex_ont_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    ex_ont_results = run_sql(ex_ont_sql, connection)
+    ex_ont_results = stream_sql(ex_ont_sql, connection)
     for ex_ont in ex_ont_results:
         try:
             ex_ont_prefix = match_name_to_prefix(ex_ont[0])
@@ -784,7 +807,7 @@ def get_equivalencies(connection, edges_output, test):
                                  ON dbobj_obj.DB_ID=re.referenceDatabase"
         if test:
             reference_entity_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-        for result in run_sql(reference_entity_sql, connection):
+        for result in stream_sql(reference_entity_sql, connection):
             subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + result[0])
             if subject_id is None:
                 continue
@@ -819,7 +842,7 @@ def get_elements_of_complex(connection, edges_output, test):
                             ON si2.DB_ID=dbobj2.stableIdentifier"
     if test:
         complex_elements_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    for com_elm in run_sql(complex_elements_sql, connection):
+    for com_elm in stream_sql(complex_elements_sql, connection):
         complex_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + com_elm[0])
         element_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + com_elm[1])
         if complex_id is None or element_id is None:
@@ -847,7 +870,7 @@ def get_members_of_set(connection, edges_output, test):
                            ON si_obj.DB_ID=dbobj_obj.stableIdentifier"
     if test:
         complex_members_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-    for result in run_sql(complex_members_sql, connection):
+    for result in stream_sql(complex_members_sql, connection):
         subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + result[0])
         object_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + result[1])
         if subject_id is None or object_id is None:
@@ -880,7 +903,7 @@ def get_species(connection, edges_output, test):
                         ON si_sub.DB_ID=dbobj_sub.stableIdentifier"
         if test:
             species_sql += " LIMIT " + str(ROW_LIMIT_TEST_MODE)
-        for species in run_sql(species_sql, connection):
+        for species in stream_sql(species_sql, connection):
             subject_id = only_include_certain_species(kg2_util.CURIE_PREFIX_REACTOME + ':' + species[0])
             if subject_id is None:
                 continue
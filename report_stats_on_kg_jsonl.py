@@ -2,7 +2,8 @@
 
 '''Provides a JSON overview report of a JSON knowledge graph in Biolink format.
 
-   Usage: report_stats_on_json_kg.py [--useSimplifiedPredicates] <inputNodesFile.jsonl> <inputEdgesFile.jsonl> <outputFile.json>
+   Usage: report_stats_on_json_kg.py [--useSimplifiedPredicates] [--numWorkers <N>]
+                                     <inputNodesFile.jsonl> <inputEdgesFile.jsonl> <outputFile.json>
 '''
 
 __author__ = 'Stephen Ramsey'
@@ -19,11 +20,22 @@ import argparse
 import collections
 import datetime
 import gzip
+import itertools
 import json
 import kg2_util
+import multiprocessing
+import numpy
 import sys
 import jsonlines
 
+# each input file is split into this many byte ranges per worker process, so
+# that a slow byte range does not hold up the other workers
+BYTE_RANGES_PER_WORKER = 4
+
+# the set of nodes on edges, which is shared with the worker processes that
+# get the node stats by forking, rather than by pickling it
+SHARED_NODES_ON_EDGES = None
+
 
 def make_arg_parser():
     arg_parser = argparse.ArgumentParser(description='build-kg2: builds the KG2 knowledge graph for the RTX system')
@@ -31,6 +43,8 @@ def make_arg_parser():
     arg_parser.add_argument('inputEdgesFile', type=str)
     arg_parser.add_argument('outputFile', type=str)
     arg_parser.add_argument('--useSimplifiedPredicates', dest='use_simplified_predicates', action='store_true', default=False)
+    arg_parser.add_argument('--numWorkers', dest='num_workers', type=int, default=1,
+                            help="number of worker processes that get the stats in parallel")
     return arg_parser
 
 
@@ -43,255 +57,435 @@ def get_prefix_from_curie_id(curie_id: str):
     return curie_id.split(':')[0]
 
 
-def get_edge_stats(edges_file_name: list):
+def add_counts(counts: dict, partial_counts: dict):
     """
-    :param edges_file_name: This parameter refers to the edges file name that we can get all of the edges from
+    :param counts: This parameter is a dictionary of counts that the partial counts are added to
+    :param partial_counts: This parameter is a dictionary of counts (or of dictionaries of counts)
     """
-    # Initialize edges reader
-    edges_read_jsonlines_info = kg2_util.start_read_jsonlines(edges_file_name)
-    edges = edges_read_jsonlines_info[0]
+    for key, count in partial_counts.items():
+        if isinstance(count, dict):
+            add_counts(counts.setdefault(key, dict()), count)
+        else:
+            counts[key] = counts.get(key, 0) + count
 
-    # Pick which edge keys we want to access now, especially with questions of simiplified predicates
-    source_key = 'primary_knowledge_source'
-    excluded_key = 'domain_range_exclusion'
-    relation_label_key = 'relation_label'
-    subject_key = 'subject'
-    object_key = 'object'
-    predicate_curie_key = 'source_predicate' if not args.use_simplified_predicates else 'predicate'
-    label_key = 'relation_label' if not args.use_simplified_predicates else 'predicate_label'
-
-    # Initialize our output data
-    edge_count = 0
-    edge_sources = dict()
-    edges_by_predicate_curie = dict()
-    edges_by_predicate_type = dict()
-    edges_by_predicate_curie_prefix = dict()
-    unique_relation_curies = set()
-    prefix_pairs_dict_for_xrefs = dict()
-    prefix_pairs_dict_for_equivs = dict()
-    excluded_edges = dict()
-    nodes_on_edges = set()
 
-    # We only have one pass through all of the edges, so we have to get all of the data we want in that one pass
-    for edge in edges:
+class EdgeStatsAccumulator:
+    """
+    Gathers the edge statistics of a KG2 graph, one edge at a time
+    """
+    def __init__(self, use_simplified_predicates: bool = False):
+        """
+        :param use_simplified_predicates: This parameter specifies whether the edges have simplified predicates
+        """
+        # Pick which edge keys we want to access now, especially with questions of simiplified predicates
+        self.predicate_curie_key = 'source_predicate' if not use_simplified_predicates else 'predicate'
+        self.label_key = 'relation_label' if not use_simplified_predicates else 'predicate_label'
+
+        # Initialize our output data
+        self.edge_count = 0
+        self.edge_sources = dict()
+        self.edges_by_predicate_curie = dict()
+        self.edges_by_predicate_type = dict()
+        self.edges_by_predicate_curie_prefix = dict()
+        self.unique_relation_curies = set()
+        self.prefix_pairs_dict_for_xrefs = dict()
+        self.prefix_pairs_dict_for_equivs = dict()
+        self.excluded_edges = dict()
+        self.nodes_on_edges = set()
+
+    def add(self, edge: dict):
+        """
+        :param edge: This parameter is the edge to gather the data from
+        """
         # Formerly under _number_of_edges
-        edge_count += 1
+        self.edge_count += 1
 
         # Gather all of the data we need from each edge at the start so it can be easily applied to multiple metrics
-        source = edge[source_key]
-        excluded = edge[excluded_key]
-        relation_label = edge[relation_label_key]
-        subject_curie = edge[subject_key]
+        source = edge['primary_knowledge_source']
+        excluded = edge['domain_range_exclusion']
+        relation_label = edge['relation_label']
+        subject_curie = edge['subject']
         subject_prefix = get_prefix_from_curie_id(subject_curie)
-        object_curie = edge[object_key]
+        object_curie = edge['object']
         object_prefix = get_prefix_from_curie_id(object_curie)
-        predicate_curie = edge[predicate_curie_key]
+        predicate_curie = edge[self.predicate_curie_key]
         predicate_curie_prefix = get_prefix_from_curie_id(predicate_curie)
-        label = edge[label_key]
+        label = edge[self.label_key]
 
         # Formerly count_edges_by_source()
-        if source not in edge_sources:
-            edge_sources[source] = 0
-        edge_sources[source] += 1
+        if source not in self.edge_sources:
+            self.edge_sources[source] = 0
+        self.edge_sources[source] += 1
 
         # Formerly count_edges_by_predicate_curie()
-        if predicate_curie not in edges_by_predicate_curie:
-            edges_by_predicate_curie[predicate_curie] = 0
-        edges_by_predicate_curie[predicate_curie] += 1
+        if predicate_curie not in self.edges_by_predicate_curie:
+            self.edges_by_predicate_curie[predicate_curie] = 0
+        self.edges_by_predicate_curie[predicate_curie] += 1
 
         # Formerly count_edges_by_predicate_type()
-        if label not in edges_by_predicate_type:
-            edges_by_predicate_type[label] = 0
-        edges_by_predicate_type[label] += 1
+        if label not in self.edges_by_predicate_type:
+            self.edges_by_predicate_type[label] = 0
+        self.edges_by_predicate_type[label] += 1
 
         # Formerly count_edges_by_predicate_curie_prefix()
-        if predicate_curie_prefix not in edges_by_predicate_curie_prefix:
-            edges_by_predicate_curie_prefix[predicate_curie_prefix] = 0
-        edges_by_predicate_curie_prefix[predicate_curie_prefix] += 1
+        if predicate_curie_prefix not in self.edges_by_predicate_curie_prefix:
+            self.edges_by_predicate_curie_prefix[predicate_curie_prefix] = 0
+        self.edges_by_predicate_curie_prefix[predicate_curie_prefix] += 1
 
         # Formerly part of count_predicates_by_predicate_curie_prefix()
         # The rest must be done after all edges have been processed
-        unique_relation_curies.add(predicate_curie)
+        self.unique_relation_curies.add(predicate_curie)
 
         # Formerly count_types_of_pairs_of_curies_for_xrefs()
-        if edge['relation_label'] == 'xref' or edge['relation_label'] == 'close_match':
+        if relation_label == 'xref' or relation_label == 'close_match':
             key = subject_prefix + '---' + object_prefix
-            if key not in prefix_pairs_dict_for_xrefs:
-                prefix_pairs_dict_for_xrefs[key] = 0
-            prefix_pairs_dict_for_xrefs[key] += 1
+            if key not in self.prefix_pairs_dict_for_xrefs:
+                self.prefix_pairs_dict_for_xrefs[key] = 0
+            self.prefix_pairs_dict_for_xrefs[key] += 1
 
         # Formerly count_types_of_pairs_of_curies_for_equivs()
         if relation_label == kg2_util.EDGE_LABEL_OWL_SAME_AS:
             key = subject_prefix + '---' + object_prefix
-            if key not in prefix_pairs_dict_for_equivs:
-                prefix_pairs_dict_for_equivs[key] = 0
-            prefix_pairs_dict_for_equivs[key] += 1
+            if key not in self.prefix_pairs_dict_for_equivs:
+                self.prefix_pairs_dict_for_equivs[key] = 0
+            self.prefix_pairs_dict_for_equivs[key] += 1
 
         # Formerly get_excluded_edges()
         if excluded:
-            if source not in excluded_edges:
-                excluded_edges[source] = 0
-            excluded_edges[source] += 1
+            if source not in self.excluded_edges:
+                self.excluded_edges[source] = 0
+            self.excluded_edges[source] += 1
 
         # Formerly part of count_orphan_nodes(); needs to process nodes for second part
-        nodes_on_edges.add(edge.get('subject', ""))
-        nodes_on_edges.add(edge.get('object', ""))
-
-    # Close our reader since we have finished
-    kg2_util.end_read_jsonlines(edges_read_jsonlines_info)
-
-    # Formerly part of count_predicates_by_predicate_curie_prefix()
-    predicate_by_predicate_curie_prefix = dict(collections.Counter([get_prefix_from_curie_id(curie) for curie in unique_relation_curies]))
+        self.nodes_on_edges.add(subject_curie)
+        self.nodes_on_edges.add(object_curie)
+
+    def merge(self, other):
+        """
+        :param other: This parameter is an EdgeStatsAccumulator for the edges that come after this one's
+        """
+        self.edge_count += other.edge_count
+        add_counts(self.edge_sources, other.edge_sources)
+        add_counts(self.edges_by_predicate_curie, other.edges_by_predicate_curie)
+        add_counts(self.edges_by_predicate_type, other.edges_by_predicate_type)
+        add_counts(self.edges_by_predicate_curie_prefix, other.edges_by_predicate_curie_prefix)
+        self.unique_relation_curies |= other.unique_relation_curies
+        add_counts(self.prefix_pairs_dict_for_xrefs, other.prefix_pairs_dict_for_xrefs)
+        add_counts(self.prefix_pairs_dict_for_equivs, other.prefix_pairs_dict_for_equivs)
+        add_counts(self.excluded_edges, other.excluded_edges)
+        self.nodes_on_edges |= other.nodes_on_edges
+
+    def report(self):
+        # Formerly part of count_predicates_by_predicate_curie_prefix()
+        predicate_by_predicate_curie_prefix = dict(collections.Counter([get_prefix_from_curie_id(curie) for curie in self.unique_relation_curies]))
 
-    # Save the data in dictionary form
-    edges_report = {'_number_of_edges': edge_count,
-                    'number_of_edges_by_predicate_curie': edges_by_predicate_curie,
-                    'number_of_edges_by_predicate_type': edges_by_predicate_type,
-                    'number_of_edges_by_predicate_curie_prefixes': edges_by_predicate_curie_prefix,
-                    'number_of_predicates_by_predicate_curie_prefixes': predicate_by_predicate_curie_prefix,
-                    'number_of_edges_by_source': edge_sources,
-                    'types_of_pairs_of_curies_for_xrefs': prefix_pairs_dict_for_xrefs,
-                    'types_of_pairs_of_curies_for_equivs': prefix_pairs_dict_for_equivs,
-                    'number_of_excluded_edges': excluded_edges}
+        # Save the data in dictionary form
+        edges_report = {'_number_of_edges': self.edge_count,
+                        'number_of_edges_by_predicate_curie': self.edges_by_predicate_curie,
+                        'number_of_edges_by_predicate_type': self.edges_by_predicate_type,
+                        'number_of_edges_by_predicate_curie_prefixes': self.edges_by_predicate_curie_prefix,
+                        'number_of_predicates_by_predicate_curie_prefixes': predicate_by_predicate_curie_prefix,
+                        'number_of_edges_by_source': self.edge_sources,
+                        'types_of_pairs_of_curies_for_xrefs': self.prefix_pairs_dict_for_xrefs,
+                        'types_of_pairs_of_curies_for_equivs': self.prefix_pairs_dict_for_equivs,
+                        'number_of_excluded_edges': self.excluded_edges}
 
-    # Return the dictionary report and the set of all nodes on edges
-    return edges_report, nodes_on_edges
+        # Return the dictionary report and the set of all nodes on edges
+        return edges_report, self.nodes_on_edges
 
 
-def get_node_stats(nodes_file_name: list, nodes_on_edges: set):
+class NodeStatsAccumulator:
     """
-    :param nodes_file_name: This parameter refers to the nodes file name that we can get all of the nodes from
-    :param nodes_on_edges: This parameter provides a set containing all of the node ids that are on edges
+    Gathers the node statistics of a KG2 graph, one node at a time
     """
-    # Initialize nodes reader
-    nodes_read_jsonlines_info = kg2_util.start_read_jsonlines(nodes_file_name)
-    nodes = nodes_read_jsonlines_info[0]
-
-    # Pick which node keys we want to access now
-    category_label_key = 'category_label'
-    id_key = 'id'
-    source_key = 'provided_by'
-    name_key = 'name'
-    category_key = 'category'
-    deprecated_key = 'deprecated'
-
-    source_node_category = kg2_util.convert_biolink_category_to_curie(kg2_util.SOURCE_NODE_CATEGORY)
-
-    # Initialize our output data
-    node_count = 0
-    build_info = dict()
-    nodes_by_curie_prefix = dict()
-    nodes_by_curie_prefix_given_no_category = dict()
-    nodes_by_category = dict()
-    nodes_by_source = dict()
-    nodes_by_source_and_category = dict()
-    sources = list()
-    deprecated_nodes = dict()
-    orphan_nodes = dict()
-
-    # We only have one pass through all of the nodes, so we have to get all of the data we want in that one pass
-    for node in nodes:
+    def __init__(self, nodes_on_edges: set, use_simplified_predicates: bool = False):
+        """
+        :param nodes_on_edges: This parameter provides a set containing all of the node ids that are on edges
+        :param use_simplified_predicates: This parameter specifies whether the graph has been simplified
+        """
+        self.nodes_on_edges = nodes_on_edges
+        self.use_simplified_predicates = use_simplified_predicates
+
+        self.source_node_category = kg2_util.convert_biolink_category_to_curie(kg2_util.SOURCE_NODE_CATEGORY)
+
+        # Initialize our output data
+        self.node_count = 0
+        self.build_info = dict()
+        self.nodes_by_curie_prefix = dict()
+        self.nodes_by_curie_prefix_given_no_category = dict()
+        self.nodes_by_category = dict()
+        self.nodes_by_source = dict()
+        self.nodes_by_source_and_category = dict()
+        self.sources = list()
+        self.deprecated_nodes = dict()
+        self.orphan_nodes = dict()
+
+    def add(self, node: dict, on_edge: bool = None):
+        """
+        :param node: This parameter is the node to gather the data from
+        :param on_edge: This parameter specifies whether the node is on an edge (if None, it is looked up in nodes_on_edges)
+        """
         # Formerly under _number_of_nodes
-        node_count += 1
+        self.node_count += 1
 
         # Gather all of the data we need from each node at the start so it can be easily applied to multiple metrics
-        category_label = node[category_label_key]
-        node_id = node[id_key]
+        category_label = node['category_label']
+        node_id = node['id']
         curie_prefix = get_prefix_from_curie_id(node_id)
-        source = node[source_key][0]
-        name = node[name_key]
-        category = node[category_key]
-        deprecated = node[deprecated_key]
+        source = node['provided_by'][0]
+        name = node['name']
+        category = node['category']
+        deprecated = node['deprecated']
 
         # Formerly _build_version and _build_time
         if node_id == kg2_util.CURIE_PREFIX_RTX + ':' + 'KG2':
-            build_info = node
-            continue
+            self.build_info = node
+            return
 
         # Formerly count_nodes_by_curie_prefix()
-        if curie_prefix not in nodes_by_curie_prefix:
-            nodes_by_curie_prefix[curie_prefix] = 0
-        nodes_by_curie_prefix[curie_prefix] += 1
+        if curie_prefix not in self.nodes_by_curie_prefix:
+            self.nodes_by_curie_prefix[curie_prefix] = 0
+        self.nodes_by_curie_prefix[curie_prefix] += 1
 
         # Formerly count_nodes_by_curie_prefix_given_no_category()
         if category_label is None or category_label == 'unknown category':
-            if curie_prefix not in nodes_by_curie_prefix_given_no_category:
-                nodes_by_curie_prefix_given_no_category[curie_prefix] = 0
-            nodes_by_curie_prefix_given_no_category[curie_prefix] += 1
+            if curie_prefix not in self.nodes_by_curie_prefix_given_no_category:
+                self.nodes_by_curie_prefix_given_no_category[curie_prefix] = 0
+            self.nodes_by_curie_prefix_given_no_category[curie_prefix] += 1
 
         # Formerly count_nodes_by_category()
-        if category_label not in nodes_by_category:
-            nodes_by_category[category_label] = 0
-        nodes_by_category[category_label] += 1
+        if category_label not in self.nodes_by_category:
+            self.nodes_by_category[category_label] = 0
+        self.nodes_by_category[category_label] += 1
 
         # Formerly count_nodes_by_source()
-        for multi_source in node[source_key]:
-            if multi_source not in nodes_by_source:
-                nodes_by_source[multi_source] = 0
-            nodes_by_source[multi_source] += 1
+        for multi_source in node['provided_by']:
+            if multi_source not in self.nodes_by_source:
+                self.nodes_by_source[multi_source] = 0
+            self.nodes_by_source[multi_source] += 1
 
-            if not args.use_simplified_predicates:
+            if not self.use_simplified_predicates:
                 break
 
         # Formerly count_number_of_nodes_by_source_and_category()
-        if source not in nodes_by_source_and_category:
-            nodes_by_source_and_category[source] = dict()
-        if category_label not in nodes_by_source_and_category[source]:
-            nodes_by_source_and_category[source][category_label] = 0
-        nodes_by_source_and_category[source][category_label] += 1
+        if source not in self.nodes_by_source_and_category:
+            self.nodes_by_source_and_category[source] = dict()
+        if category_label not in self.nodes_by_source_and_category[source]:
+            self.nodes_by_source_and_category[source][category_label] = 0
+        self.nodes_by_source_and_category[source][category_label] += 1
 
         # Formerly get_sources()
-        if category == source_node_category:
-            sources.append(name)
+        if category == self.source_node_category:
+            self.sources.append(name)
 
         # Formerly get_deprecated_nodes()
         if deprecated:
-            if source not in deprecated_nodes:
-                deprecated_nodes[source] = 0
-            deprecated_nodes[source] += 1
+            if source not in self.deprecated_nodes:
+                self.deprecated_nodes[source] = 0
+            self.deprecated_nodes[source] += 1
 
         # Formerly part of count_orphan_nodes()
-        if node_id not in nodes_on_edges:
-            if source not in orphan_nodes:
-                orphan_nodes[source] = 0
-            orphan_nodes[source] += 1
+        if on_edge is None:
+            on_edge = node_id in self.nodes_on_edges
+        if not on_edge:
+            if source not in self.orphan_nodes:
+                self.orphan_nodes[source] = 0
+            self.orphan_nodes[source] += 1
+
+    def merge(self, other):
+        """
+        :param other: This parameter is a NodeStatsAccumulator for the nodes that come after this one's
+        """
+        self.node_count += other.node_count
+        if len(other.build_info) > 0:
+            self.build_info = other.build_info
+        add_counts(self.nodes_by_curie_prefix, other.nodes_by_curie_prefix)
+        add_counts(self.nodes_by_curie_prefix_given_no_category, other.nodes_by_curie_prefix_given_no_category)
+        add_counts(self.nodes_by_category, other.nodes_by_category)
+        add_counts(self.nodes_by_source, other.nodes_by_source)
+        add_counts(self.nodes_by_source_and_category, other.nodes_by_source_and_category)
+        self.sources += other.sources
+        add_counts(self.deprecated_nodes, other.deprecated_nodes)
+        add_counts(self.orphan_nodes, other.orphan_nodes)
+
+    def report(self):
+        if len(self.build_info) == 0:
+            print("WARNING: 'build' property is missing from the input JSON.", file=sys.stderr)
+
+        # Save the data in dictionary form
+        nodes_report = {'_number_of_nodes': self.node_count,
+                        '_build_version': self.build_info.get('name', ""),
+                        '_build_time': self.build_info.get('update_date', ""),
+                        'number_of_nodes_by_curie_prefix': self.nodes_by_curie_prefix,
+                        'number_of_nodes_without_category_by_curie_prefix': self.nodes_by_curie_prefix_given_no_category,
+                        'number_of_nodes_by_category_label': self.nodes_by_category,
+                        'number_of_nodes_by_source': self.nodes_by_source,
+                        'number_of_nodes_by_source_and_category': self.nodes_by_source_and_category,
+                        'sources': self.sources,
+                        'number_of_deprecated_nodes': self.deprecated_nodes,
+                        'number_of_orphan_nodes': self.orphan_nodes}
+
+        # Return the dictionary report
+        return nodes_report
+
+
+def get_edge_stats(edges_file_name: str, use_simplified_predicates: bool = False):
+    """
+    :param edges_file_name: This parameter refers to the edges file name that we can get all of the edges from
+    :param use_simplified_predicates: This parameter specifies whether the edges have simplified predicates
+    """
+    # Initialize edges reader
+    edges_read_jsonlines_info = kg2_util.start_read_jsonlines(edges_file_name)
+    edges = edges_read_jsonlines_info[0]
+
+    # We only have one pass through all of the edges, so we have to get all of the data we want in that one pass
+    edge_stats = EdgeStatsAccumulator(use_simplified_predicates)
+    for edge in edges:
+        edge_stats.add(edge)
+
+    # Close our reader since we have finished
+    kg2_util.end_read_jsonlines(edges_read_jsonlines_info)
+
+    # Return the dictionary report and the set of all nodes on edges
+    return edge_stats.report()
+
+
+def get_node_stats(nodes_file_name: str, nodes_on_edges: set, use_simplified_predicates: bool = False):
+    """
+    :param nodes_file_name: This parameter refers to the nodes file name that we can get all of the nodes from
+    :param nodes_on_edges: This parameter provides a set containing all of the node ids that are on edges
+    :param use_simplified_predicates: This parameter specifies whether the graph has been simplified
+    """
+    # Initialize nodes reader
+    nodes_read_jsonlines_info = kg2_util.start_read_jsonlines(nodes_file_name)
+    nodes = nodes_read_jsonlines_info[0]
+
+    # We only have one pass through all of the nodes, so we have to get all of the data we want in that one pass
+    node_stats = NodeStatsAccumulator(nodes_on_edges, use_simplified_predicates)
+    for node in nodes:
+        node_stats.add(node)
 
     # Close our reader since we have finished
     kg2_util.end_read_jsonlines(nodes_read_jsonlines_info)
 
-    if len(build_info) == 0:
-        print("WARNING: 'build' property is missing from the input JSON.", file=sys.stderr)
-
-    # Save the data in dictionary form
-    nodes_report = {'_number_of_nodes': node_count,
-                    '_build_version': build_info.get('name', ""),
-                    '_build_time': build_info.get('update_date', ""),
-                    'number_of_nodes_by_curie_prefix': nodes_by_curie_prefix,
-                    'number_of_nodes_without_category_by_curie_prefix': nodes_by_curie_prefix_given_no_category,
-                    'number_of_nodes_by_category_label': nodes_by_category,
-                    'number_of_nodes_by_source': nodes_by_source,
-                    'number_of_nodes_by_source_and_category': nodes_by_source_and_category,
-                    'sources': sources,
-                    'number_of_deprecated_nodes': deprecated_nodes,
-                    'number_of_orphan_nodes': orphan_nodes}
+    # Return the dictionary report
+    return node_stats.report()
+
+
+def get_edge_stats_for_byte_range(byte_range_args: tuple):
+    (edges_file_name, start, end, use_simplified_predicates) = byte_range_args
+    edge_stats = EdgeStatsAccumulator(use_simplified_predicates)
+    for edge in kg2_util.read_jsonlines_byte_range(edges_file_name, start, end):
+        edge_stats.add(edge)
+    # The node ids on the edges are sent back as their hashes, which are the
+    # same in the parent process, since the workers are forked from it
+    nodes_on_edges_hashes = numpy.fromiter(map(hash, edge_stats.nodes_on_edges), dtype=numpy.int64,
+                                           count=len(edge_stats.nodes_on_edges))
+    edge_stats.nodes_on_edges = set()
+    return edge_stats, nodes_on_edges_hashes
+
+
+def get_edge_stats_in_parallel(edges_file_name: str, use_simplified_predicates: bool, num_workers: int):
+    """
+    :param edges_file_name: This parameter refers to the edges file name that we can get all of the edges from
+    :param use_simplified_predicates: This parameter specifies whether the edges have simplified predicates
+    :param num_workers: This parameter is the number of worker processes
+    """
+    # Each worker gets the stats of a byte range of the edges file, and the partial stats are added up in file order
+    byte_ranges = kg2_util.get_jsonlines_byte_ranges(edges_file_name, num_workers * BYTE_RANGES_PER_WORKER)
+    with multiprocessing.get_context('fork').Pool(num_workers) as pool:
+        results = pool.map(get_edge_stats_for_byte_range,
+                           [(edges_file_name, start, end, use_simplified_predicates) for start, end in byte_ranges],
+                           chunksize=1)
+
+    edge_stats = EdgeStatsAccumulator(use_simplified_predicates)
+    for partial_edge_stats, _ in results:
+        edge_stats.merge(partial_edge_stats)
+    edges_report, _ = edge_stats.report()
+
+    # The set of all nodes on edges is kept as a compact set of hashed node ids
+    nodes_on_edges = kg2_util.HashedIDSet()
+    nodes_on_edges.update_hashes(numpy.concatenate([numpy.empty(0, dtype=numpy.int64)] +
+                                                   [nodes_on_edges_hashes for _, nodes_on_edges_hashes in results]))
+
+    # Return the dictionary report and the set of all nodes on edges
+    return edges_report, nodes_on_edges
+
+
+def get_node_stats_for_byte_range(byte_range_args: tuple):
+    (nodes_file_name, start, end, use_simplified_predicates) = byte_range_args
+    node_stats = NodeStatsAccumulator(None, use_simplified_predicates)
+    nodes = kg2_util.read_jsonlines_byte_range(nodes_file_name, start, end)
+    while True:
+        # Look up the nodes in the set of nodes on edges in batches, which is faster
+        batch = list(itertools.islice(nodes, kg2_util.HashedIDSet.BATCH_SIZE))
+        if len(batch) == 0:
+            break
+        on_edges = SHARED_NODES_ON_EDGES.contains_many([node['id'] for node in batch])
+        for node, on_edge in zip(batch, on_edges):
+            node_stats.add(node, on_edge)
+    return node_stats
+
+
+def get_node_stats_in_parallel(nodes_file_name: str, nodes_on_edges, use_simplified_predicates: bool, num_workers: int):
+    """
+    :param nodes_file_name: This parameter refers to the nodes file name that we can get all of the nodes from
+    :param nodes_on_edges: This parameter provides a kg2_util.HashedIDSet containing all of the node ids that are on edges
+    :param use_simplified_predicates: This parameter specifies whether the graph has been simplified
+    :param num_workers: This parameter is the number of worker processes
+    """
+    global SHARED_NODES_ON_EDGES
+    # The workers are forked after this point, so they share the set of nodes on edges
+    SHARED_NODES_ON_EDGES = nodes_on_edges
+    byte_ranges = kg2_util.get_jsonlines_byte_ranges(nodes_file_name, num_workers * BYTE_RANGES_PER_WORKER)
+    with multiprocessing.get_context('fork').Pool(num_workers) as pool:
+        results = pool.map(get_node_stats_for_byte_range,
+                           [(nodes_file_name, start, end, use_simplified_predicates) for start, end in byte_ranges],
+                           chunksize=1)
+    SHARED_NODES_ON_EDGES = None
+
+    node_stats = NodeStatsAccumulator(nodes_on_edges, use_simplified_predicates)
+    for partial_node_stats in results:
+        node_stats.merge(partial_node_stats)
 
     # Return the dictionary report
-    return nodes_report
+    return node_stats.report()
+
+
+def make_stats_report(edges_report: dict, nodes_report: dict):
+    """
+    :param edges_report: This parameter is the edges report from EdgeStatsAccumulator.report()
+    :param nodes_report: This parameter is the nodes report from NodeStatsAccumulator.report()
+    """
+    stats = {'_report_datetime': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+
+    # Add the edges report and the nodes report to the return dictionary
+    stats.update(edges_report)
+    stats.update(nodes_report)
+    return stats
+
 
 if __name__ == '__main__':
     args = make_arg_parser().parse_args()
     input_nodes_file_name = args.inputNodesFile
     input_edges_file_name = args.inputEdgesFile
+    use_simplified_predicates = args.use_simplified_predicates
+    num_workers = args.num_workers
 
-    stats = {'_report_datetime': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    if num_workers > 1 and (input_nodes_file_name.endswith(kg2_util.COMPRESSED_FILE_SUFFIXES) or
+                            input_edges_file_name.endswith(kg2_util.COMPRESSED_FILE_SUFFIXES)):
+        # a compressed file cannot be split into byte ranges
+        print("an input file is compressed, so the stats will be gathered by a single process", file=sys.stderr)
+        num_workers = 1
 
     # Get stats from the edges first (since we need the set of nodes on edges), then nodes
-    edges_report, nodes_on_edges = get_edge_stats(input_edges_file_name)
-    nodes_report = get_node_stats(input_nodes_file_name, nodes_on_edges)
-
-    # Add the output of get_edge_stats() and get_node_stats() to the return dictionary
-    stats.update(edges_report)
-    stats.update(nodes_report)
+    if num_workers > 1:
+        edges_report, nodes_on_edges = get_edge_stats_in_parallel(input_edges_file_name, use_simplified_predicates, num_workers)
+        nodes_report = get_node_stats_in_parallel(input_nodes_file_name, nodes_on_edges, use_simplified_predicates, num_workers)
+        nodes_on_edges.close()
+    else:
+        edges_report, nodes_on_edges = get_edge_stats(input_edges_file_name, use_simplified_predicates)
+        nodes_report = get_node_stats(input_nodes_file_name, nodes_on_edges, use_simplified_predicates)
 
     # Save our output dictionary to the output file
-    kg2_util.save_json(stats, args.outputFile, True)
+    kg2_util.save_json(make_stats_report(edges_report, nodes_report), args.outputFile, True)
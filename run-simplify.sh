@@ -54,11 +54,28 @@ else
     echo "*** TEST MODE -- NO INCREMENT ***"
 fi
 
+## number of worker processes that remap the edges in parallel
+num_workers=${SIMPLIFY_NUM_WORKERS:-1}
+
+## if set, the output options of post_etl_pipeline.py, which then also makes
+## the Stats, Slim, Simplify_Stats, and TSV outputs in the same pass
+post_etl_pipeline_args=${POST_ETL_PIPELINE_ARGS:-""}
+
 # TODO: Inhibits and increase are not in biolink model anymore - Find out what that should be now
-${VENV_DIR}/bin/python3 -u ${CODE_DIR}/filter_kg_and_remap_predicates.py ${test_flag} --dropNegated \
-                        --dropSelfEdgesExcept interacts_with,regulates,inhibits,increase \
-                        ${predicate_mapping_file} ${infores_mapping_file} ${curies_to_urls_file} ${input_nodes_json} ${input_edges_json} \
-                        ${output_nodes_json} ${output_edges_json} ${local_version_filename}
+if [[ "${post_etl_pipeline_args}" != "" ]]
+then
+    ${VENV_DIR}/bin/python3 -u ${CODE_DIR}/post_etl_pipeline.py ${test_flag} --dropNegated \
+                            --dropSelfEdgesExcept interacts_with,regulates,inhibits,increase \
+                            ${post_etl_pipeline_args} \
+                            ${predicate_mapping_file} ${infores_mapping_file} ${curies_to_urls_file} ${input_nodes_json} ${input_edges_json} \
+                            ${output_nodes_json} ${output_edges_json} ${local_version_filename}
+else
+    ${VENV_DIR}/bin/python3 -u ${CODE_DIR}/filter_kg_and_remap_predicates.py ${test_flag} --dropNegated \
+                            --numWorkers ${num_workers} \
+                            --dropSelfEdgesExcept interacts_with,regulates,inhibits,increase \
+                            ${predicate_mapping_file} ${infores_mapping_file} ${curies_to_urls_file} ${input_nodes_json} ${input_edges_json} \
+                            ${output_nodes_json} ${output_edges_json} ${local_version_filename}
+fi
 ${s3_cp_cmd} ${local_version_filename} s3://${s3_bucket_public}/${s3_version_filename}
 
 if [[ -f ${trigger_file_is_major_release} ]]
@@ -21,11 +21,17 @@ import re
 
 
 NEG_REGEX = re.compile('^NEG_', re.M)
+# each grouped row concatenates all of the sentences for a triple, so they
+# can be very large; fetch fewer of them at a time than the default
+SEMMEDDB_FETCH_BATCH_SIZE = 1000
 
 
 def make_arg_parser():
     arg_parser = argparse.ArgumentParser(description='semmeddb_mysql_to_tuple_list_json.py: extracts all the predicate triples from SemMedDB, ' +
                                          'as a list of tuples')
+    arg_parser.add_argument('--fetchBatchSize', dest='fetch_batch_size', type=int,
+                            default=SEMMEDDB_FETCH_BATCH_SIZE,
+                            help='number of (grouped) rows to fetch from the MySQL server at a time')
     arg_parser.add_argument('mysqlConfigFile', type=str)
     arg_parser.add_argument('mysqlDBName', type=str)
     arg_parser.add_argument('outputFile', type=str)
@@ -57,10 +63,10 @@ if __name__ == '__main__':
         cursor.execute(max_len_sql_statement)
         cursor.fetchall()
 
-        # Execute statement we care about after clearing any "results"
-        cursor.execute(sql_statement)
-        for result in cursor.fetchall():
-            output.write(result)
+    # Execute statement we care about after clearing any "results"; the
+    # grouped rows are streamed, rather than all being held in memory
+    for result in kg2_util.stream_sql_results(connection, sql_statement, args.fetch_batch_size):
+        output.write(result)
     connection.close()
 
     kg2_util.close_single_jsonlines(output_info, output_file_name)
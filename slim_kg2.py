@@ -29,6 +29,14 @@ def make_arg_parser():
     return arg_parser
 
 
+def slim_node(node: dict):
+    return {key: val for key, val in node.items() if key in NODE_PROPERTIES}
+
+
+def slim_edge(edge: dict):
+    return {key: val for key, val in edge.items() if key in EDGE_PROPERTIES}
+
+
 if __name__ == "__main__":
     start = datetime.datetime.now()
 
@@ -53,11 +61,7 @@ if __name__ == "__main__":
         node_ctr += 1
         if node_ctr % 1000000 == 0:
             print(node_ctr, "nodes finished.")
-        temp_node = dict()
-        for key, val in node.items():
-            if key in NODE_PROPERTIES:
-                temp_node[key] = val
-        nodes_output.write(temp_node)
+        nodes_output.write(slim_node(node))
 
     print("Nodes completed.")
     kg2_util.end_read_jsonlines(input_nodes_jsonlines_info)
@@ -70,11 +74,7 @@ if __name__ == "__main__":
         edge_ctr += 1
         if edge_ctr % 1000000 == 0:
             print(edge_ctr, "edges finished.")
-        temp_edge = dict()
-        for key, val in edge.items():
-            if key in EDGE_PROPERTIES:
-                temp_edge[key] = val
-        edges_output.write(temp_edge)
+        edges_output.write(slim_edge(edge))
 
     print("Edges completed.")
     kg2_util.end_read_jsonlines(input_edges_jsonlines_info)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+''' test_infer_biolink_category.py: tests the biolink category inference of
+        multi_ont_to_kg_jsonl.py on small subClassOf hierarchies, including
+        ones with cycles, which must be resolved in time linear in the number
+        of nodes for each top-level call
+
+    Usage: pytest tests/test_infer_biolink_category.py
+'''
+
+__author__ = ''
+__copyright__ = ''
+__credits__ = []
+__license__ = 'MIT'
+__version__ = '0.1.0'
+__maintainer__ = ''
+__email__ = ''
+__status__ = 'Prototype'
+
+import inspect
+import os
+import sys
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import multi_ont_to_kg_jsonl
+
+BASE_IRI = 'http://example.org/test/'
+ROOT_CATEGORY = 'named thing'
+CURIES_TO_CATEGORIES = {'term-mappings': {'TEST:root': ROOT_CATEGORY},
+                        'prefix-mappings': {}}
+
+
+class Ontology:
+    # the part of the ontobio.ontol.Ontology interface that the category
+    # inference uses
+    def __init__(self, parents: dict):
+        self.id = BASE_IRI + 'test.owl'
+        self.parents_dict = {BASE_IRI + node: [BASE_IRI + parent for parent in parents]
+                             for node, parents in parents.items()}
+
+    def parents(self, node_id: str, relations: list):
+        assert relations == ['subClassOf']
+        return self.parents_dict.get(node_id, [])
+
+
+def shorten_uri(iri: str):
+    return 'TEST:' + iri.replace(BASE_IRI, '')
+
+
+def make_ring(num_nodes: int):
+    # each node's parents are the next two nodes of the ring, and the first
+    # node is also a subclass of the root, which has the category
+    parents = {'n' + str(i): ['n' + str((i + 1) % num_nodes), 'n' + str((i + 2) % num_nodes)]
+               for i in range(num_nodes)}
+    parents['n0'].append('root')
+    return Ontology(parents)
+
+
+def get_categories(ontology: Ontology, monkeypatch):
+    # returns the category of each node, and the number of calls of
+    # infer_biolink_category_for_node made for each top-level call
+    multi_ont_to_kg_jsonl.curie_to_uri_expander = None
+    infer_biolink_category_for_node = multi_ont_to_kg_jsonl.infer_biolink_category_for_node
+    num_calls = [0]
+
+    def count_calls(*args):
+        num_calls[0] += 1
+        return infer_biolink_category_for_node(*args)
+
+    monkeypatch.setattr(multi_ont_to_kg_jsonl, 'infer_biolink_category_for_node', count_calls)
+    category_cache = dict()
+    categories = dict()
+    nums_calls = []
+    for node_id in ontology.parents_dict:
+        num_calls[0] = 0
+        [category, _] = multi_ont_to_kg_jsonl.get_biolink_category_for_node(node_id,
+                                                                            shorten_uri(node_id),
+                                                                            ontology,
+                                                                            CURIES_TO_CATEGORIES,
+                                                                            shorten_uri,
+                                                                            category_cache,
+                                                                            False,
+                                                                            dict())
+        categories[shorten_uri(node_id)] = category
+        nums_calls.append(num_calls[0])
+    return categories, nums_calls, category_cache
+
+
+def test_acyclic_hierarchy_is_cached(monkeypatch):
+    ontology = Ontology({'a': ['b', 'c'],
+                         'b': ['d'],
+                         'c': ['d'],
+                         'd': ['root'],
+                         'e': []})
+    categories, nums_calls, category_cache = get_categories(ontology, monkeypatch)
+    assert categories == {'TEST:a': ROOT_CATEGORY,
+                          'TEST:b': ROOT_CATEGORY,
+                          'TEST:c': ROOT_CATEGORY,
+                          'TEST:d': ROOT_CATEGORY,
+                          'TEST:e': None}
+    # every node is resolved only once, by the first call that reaches it (d
+    # is reached twice by the call for a, the second time from the cache)
+    assert nums_calls == [6, 1, 1, 1, 1]
+    assert len(category_cache) == 6
+
+
+def test_cycle_gets_category_from_outside_it(monkeypatch):
+    categories, _, category_cache = get_categories(make_ring(5), monkeypatch)
+    assert categories == {'TEST:n' + str(i): ROOT_CATEGORY for i in range(5)}
+    # the nodes of the cycle depend on where it was entered, so they are not cached
+    assert [node_curie_id for (_, node_curie_id) in category_cache] == ['TEST:root']
+
+
+def test_cycle_is_resolved_in_linear_time(monkeypatch):
+    for num_nodes in (8, 10, 12, 14, 100):
+        _, nums_calls, _ = get_categories(make_ring(num_nodes), monkeypatch)
+        # each of the nodes (and the root) is resolved at most once per
+        # top-level call, and so is called at most once for each of its
+        # subclasses in the ring, plus once for the top-level call
+        assert max(nums_calls) <= 2 * num_nodes + 2
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+''' test_stream_sql_results.py: tests kg2_util.stream_sql_results, and the
+        stream_sql function of reactome_mysql_to_kg_jsonl.py that is built on
+        it, against a pymysql-style connection to an SQLite database: the
+        streamed rows must be the rows that fetchall gives, and an
+        InternalError must be handled as run_sql handles it
+
+    Usage: pytest tests/test_stream_sql_results.py
+'''
+
+__author__ = ''
+__copyright__ = ''
+__credits__ = []
+__license__ = 'MIT'
+__version__ = '0.1.0'
+__maintainer__ = ''
+__email__ = ''
+__status__ = 'Prototype'
+
+import inspect
+import os
+import sqlite3
+import sys
+import types
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+try:
+    import pymysql
+    import pymysql.cursors
+    import pymysql.err
+except ImportError:
+    # the parts of pymysql that kg2_util.stream_sql_results and
+    # reactome_mysql_to_kg_jsonl.py use, for when pymysql is not installed
+    pymysql = types.ModuleType('pymysql')
+    pymysql.cursors = types.ModuleType('pymysql.cursors')
+    pymysql.err = types.ModuleType('pymysql.err')
+    pymysql.cursors.SSCursor = type('SSCursor', (), {})
+    pymysql.err.InternalError = type('InternalError', (Exception,), {})
+    sys.modules.update({'pymysql': pymysql,
+                        'pymysql.cursors': pymysql.cursors,
+                        'pymysql.err': pymysql.err})
+
+import kg2_util
+import reactome_mysql_to_kg_jsonl
+
+NUM_ROWS = 25000
+SQL = "SELECT id, name FROM entity ORDER BY id"
+
+
+class SQLiteCursor:
+    # a pymysql-style cursor on an SQLite connection; SQLite errors are
+    # raised as pymysql InternalErrors, and so is the failure (e.g., a lost
+    # connection) that is injected on the fail_on_fetch'th fetch
+    def __init__(self, connection, fail_on_fetch: int = None):
+        self.cursor = connection.cursor()
+        self.fail_on_fetch = fail_on_fetch
+        self.num_fetches = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cursor.close()
+
+    def execute(self, sql: str):
+        try:
+            self.cursor.execute(sql)
+        except sqlite3.Error as e:
+            raise pymysql.err.InternalError(str(e))
+
+    def fetch(self, fetcher: callable):
+        self.num_fetches += 1
+        if self.num_fetches == self.fail_on_fetch:
+            raise pymysql.err.InternalError("Lost connection to MySQL server during query")
+        return tuple(fetcher())
+
+    def fetchmany(self, size: int):
+        return self.fetch(lambda: self.cursor.fetchmany(size))
+
+    def fetchall(self):
+        return self.fetch(self.cursor.fetchall)
+
+
+class SQLiteConnection:
+    def __init__(self, fail_on_fetch: int = None):
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute("CREATE TABLE entity (id INTEGER PRIMARY KEY, name TEXT)")
+        self.connection.executemany("INSERT INTO entity VALUES (?, ?)",
+                                    [(id, 'entity ' + str(id) if id % 10 else None) for id in range(NUM_ROWS)])
+        self.fail_on_fetch = fail_on_fetch
+        self.cursor_classes = []
+
+    def cursor(self, cursor_class=None):
+        self.cursor_classes.append(cursor_class)
+        return SQLiteCursor(self.connection, self.fail_on_fetch)
+
+
+def fetchall(connection, sql: str):
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+
+def test_streamed_rows_equal_fetchall_rows():
+    connection = SQLiteConnection()
+    expected_rows = fetchall(connection, SQL)
+    assert len(expected_rows) == NUM_ROWS
+    for batch_size in (1, 7, NUM_ROWS, 2 * NUM_ROWS):
+        assert tuple(kg2_util.stream_sql_results(connection, SQL, batch_size)) == expected_rows
+    assert tuple(kg2_util.stream_sql_results(connection, SQL + " LIMIT 0")) == ()
+
+
+def test_stream_uses_unbuffered_cursor():
+    connection = SQLiteConnection()
+    list(kg2_util.stream_sql_results(connection, SQL))
+    assert connection.cursor_classes == [pymysql.cursors.SSCursor]
+
+
+def test_error_mid_stream_is_raised_after_the_rows_before_it():
+    connection = SQLiteConnection(fail_on_fetch=3)
+    rows = []
+    try:
+        for row in kg2_util.stream_sql_results(connection, SQL, 1000):
+            rows.append(row)
+    except pymysql.err.InternalError:
+        pass
+    else:
+        assert False, "the InternalError was not raised"
+    assert tuple(rows) == fetchall(SQLiteConnection(), SQL)[:2000]
+
+
+def test_reactome_stream_sql_equals_run_sql():
+    connection = SQLiteConnection()
+    assert tuple(reactome_mysql_to_kg_jsonl.stream_sql(SQL, connection)) == \
+        reactome_mysql_to_kg_jsonl.run_sql(SQL, connection)
+
+
+def test_reactome_stream_sql_error_before_rows_equals_run_sql():
+    # an error on execute (here, a missing table), or on the first fetch,
+    # gives no rows, as it does for run_sql
+    bad_sql = "SELECT id FROM no_such_table"
+    assert tuple(reactome_mysql_to_kg_jsonl.stream_sql(bad_sql, SQLiteConnection())) == ()
+    assert reactome_mysql_to_kg_jsonl.run_sql(bad_sql, SQLiteConnection()) == ()
+    assert tuple(reactome_mysql_to_kg_jsonl.stream_sql(SQL, SQLiteConnection(fail_on_fetch=1))) == ()
+    assert reactome_mysql_to_kg_jsonl.run_sql(SQL, SQLiteConnection(fail_on_fetch=1)) == ()
+
+
+def test_reactome_stream_sql_error_mid_stream(capsys):
+    # run_sql gives no rows, but stream_sql has already given the rows of
+    # the batches before the error, and logs that the rest are missing
+    assert reactome_mysql_to_kg_jsonl.run_sql(SQL, SQLiteConnection(fail_on_fetch=1)) == ()
+    rows = tuple(reactome_mysql_to_kg_jsonl.stream_sql(SQL, SQLiteConnection(fail_on_fetch=2)))
+    assert rows == fetchall(SQLiteConnection(), SQL)[:kg2_util.SQL_FETCH_BATCH_SIZE]
+    assert "query failed after " + str(kg2_util.SQL_FETCH_BATCH_SIZE) + " rows" in capsys.readouterr().err
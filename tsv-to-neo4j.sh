@@ -31,7 +31,8 @@ else
     test_arg=""
 fi
 
-tsv_tarball=${tsv_dir}/kg2-tsv-for-neo4j${test_arg}.tar.gz
+tsv_bundle=kg2-tsv-for-neo4j${test_arg}
+tsv_tarball=${tsv_dir}/${tsv_bundle}.tar.gz
 
 echo "copying RTX Configuration JSON file from S3"
 
@@ -53,14 +54,28 @@ rm -f ${tsv_tarball}
 rm -r -f ${tsv_dir}
 mkdir -p ${tsv_dir}
 
-# download the latest TSV files from the S3 Bucket
-${s3_cp_cmd} s3://${s3_bucket}/kg2-tsv-for-neo4j${test_arg}.tar.gz ${tsv_tarball}
+# download the latest TSV files from the S3 Bucket: either the gzip-compressed
+# nodes and edges shards listed in the bundle's manifest, or the TSV tarball
+if ${s3_cp_cmd} s3://${s3_bucket}/${tsv_bundle}/manifest.txt ${tsv_dir}/manifest.txt
+then
+    ${s3_cp_cmd} --recursive s3://${s3_bucket}/${tsv_bundle}/ ${tsv_dir}/ --exclude "*" \
+        `sed 's/^/--include /' ${tsv_dir}/manifest.txt`
 
-# unpack the TSV tarball
-tar -xvzf ${tsv_tarball} -C ${tsv_dir}
+    # neo4j-admin import reads a comma-separated list of files as one file
+    nodes_files=`grep '^nodes_[0-9]' ${tsv_dir}/manifest.txt | sed "s|^|${tsv_dir}/|" | paste -s -d, -`
+    edges_files=`grep '^edges_[0-9]' ${tsv_dir}/manifest.txt | sed "s|^|${tsv_dir}/|" | paste -s -d, -`
+else
+    ${s3_cp_cmd} s3://${s3_bucket}/${tsv_bundle}.tar.gz ${tsv_tarball}
 
-# delete the TSV tarball since we successfully unpacked it
-rm -f ${tsv_tarball}
+    # unpack the TSV tarball
+    tar -xvzf ${tsv_tarball} -C ${tsv_dir}
+
+    # delete the TSV tarball since we successfully unpacked it
+    rm -f ${tsv_tarball}
+
+    nodes_files=${tsv_dir}/nodes.tsv
+    edges_files=${tsv_dir}/edges.tsv
+fi
 
 # delete the old log file and create a new one
 rm -rf ${tsv_dir}/import.report
@@ -74,8 +89,8 @@ sudo rm -rf ${database_path}/databases/${database}
 mem_gb=`${CODE_DIR}/get-system-memory-gb.sh`
 
 # import TSV files into Neo4j as Neo4j
-sudo -u neo4j neo4j-admin import --nodes "${tsv_dir}/nodes_header.tsv,${tsv_dir}/nodes.tsv" \
-    --relationships "${tsv_dir}/edges_header.tsv,${tsv_dir}/edges.tsv" \
+sudo -u neo4j neo4j-admin import --nodes "${tsv_dir}/nodes_header.tsv,${nodes_files}" \
+    --relationships "${tsv_dir}/edges_header.tsv,${edges_files}" \
     --max-memory=${mem_gb}G --multiline-fields=true --delimiter "\009" \
     --array-delimiter=";" --report-file="${tsv_dir}/import.report" \
     --database=${database} --ignore-missing-nodes=true
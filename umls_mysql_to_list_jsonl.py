@@ -21,20 +21,22 @@ import pymysql
 
 def get_args():
     arg_parser = argparse.ArgumentParser(description='umls_mysql_to_list_jsonl.py: extracts all of the information from UMLS and stores it in a JSON Lines output')
+    arg_parser.add_argument('--fetchBatchSize', dest='fetch_batch_size', type=int,
+                            default=kg2_util.SQL_FETCH_BATCH_SIZE,
+                            help='number of rows to fetch from the MySQL server at a time')
     arg_parser.add_argument('mysqlConfigFile', type=str)
     arg_parser.add_argument('mysqlDBName', type=str)
     arg_parser.add_argument('outputFile', type=str)
     return arg_parser.parse_args()
 
 
-def get_english_sources(cursor, output):
+def get_english_sources(connection, output, fetch_batch_size: int):
     sources_sql_statement = "SELECT RSAB, LAT, SSN, IMETA, SVER FROM MRSAB"
     sources = []
 
     source_data = dict()
 
-    cursor.execute(sources_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, sources_sql_statement, fetch_batch_size):
         (source, language, source_name, version, update_date) = result
         if language == 'ENG':
             sources.append(source)
@@ -58,7 +60,7 @@ def get_english_sources(cursor, output):
     return sources
 
 
-def code_sources(cursor, output):
+def code_sources(connection, output, fetch_batch_size: int):
     code_source_info = dict()
     tui_key = 'tuis'
     cui_key = 'cuis'
@@ -74,8 +76,7 @@ def code_sources(cursor, output):
     tuis_sql_statement = "SELECT con.CODE, con.SAB, GROUP_CONCAT(DISTINCT sty.TUI) FROM MRCONSO con LEFT JOIN MRSTY sty ON con.CUI = sty.CUI GROUP BY con.SAB, con.CODE"
     definitions_sql_statement = "SELECT con.CODE, con.SAB, GROUP_CONCAT(DISTINCT def.DEF SEPARATOR ';') FROM MRCONSO con INNER JOIN MRDEF def on con.CUI=def.CUI WHERE con.SAB=def.SAB GROUP BY con.SAB, con.CODE"
 
-    cursor.execute(names_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, names_sql_statement, fetch_batch_size):
         (node_id, node_source, cui, names) = result
         key = (node_source, node_id)
         code_source_info[key] = dict()
@@ -93,8 +94,7 @@ def code_sources(cursor, output):
 
     print("Finished names_sql_statement at", kg2_util.date())
 
-    cursor.execute(extra_info_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, extra_info_sql_statement, fetch_batch_size):
         (node_id, node_source, info) = result
         key = (node_source, node_id)
         if key not in code_source_info:
@@ -113,8 +113,7 @@ def code_sources(cursor, output):
 
     print("Finished extra_info_sql_statement at", kg2_util.date())
 
-    cursor.execute(tuis_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, tuis_sql_statement, fetch_batch_size):
         (node_id, node_source, tuis) = result
         key = (node_source, node_id)
         if key not in code_source_info:
@@ -124,8 +123,7 @@ def code_sources(cursor, output):
 
     print("Finished tuis_sql_statement at", kg2_util.date())
 
-    cursor.execute(definitions_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, definitions_sql_statement, fetch_batch_size):
         (node_id, node_source, definition) = result
         key = (node_source, node_id)
         if key not in code_source_info:
@@ -143,7 +141,7 @@ def code_sources(cursor, output):
     print("Finished adding", record_num, "records in code_sources() at", kg2_util.date())
 
 
-def cui_sources(cursor, output, sources):
+def cui_sources(connection, output, sources, fetch_batch_size: int):
     cui_source_info = dict()
     tui_key = 'tuis'
     name_key = 'names'
@@ -160,8 +158,7 @@ def cui_sources(cursor, output, sources):
     relations_sql_statement = "SELECT DISTINCT CUI1, REL, RELA, DIR, CUI2, SAB FROM MRREL WHERE SAB IN " + sources_where
     definitions_sql_statement = "SELECT CUI, GROUP_CONCAT(DISTINCT CONCAT(SAB, '|', REPLACE(DEF, '\t', ' ')) SEPARATOR '\t') FROM MRDEF WHERE SAB IN " + sources_where + " GROUP BY CUI"
 
-    cursor.execute(names_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, names_sql_statement, fetch_batch_size):
         (node_id, names) = result
         key = (umls_source_name, node_id)
         cui_source_info[key] = dict()
@@ -183,8 +180,7 @@ def cui_sources(cursor, output, sources):
 
     print("Finished names_sql_statement at", kg2_util.date())
 
-    cursor.execute(tuis_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, tuis_sql_statement, fetch_batch_size):
         (node_id, tuis) = result
         key = (umls_source_name, node_id)
         if key not in cui_source_info:
@@ -194,8 +190,7 @@ def cui_sources(cursor, output, sources):
 
     print("Finished tuis_sql_statement at", kg2_util.date())
 
-    cursor.execute(relations_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, relations_sql_statement, fetch_batch_size):
         (cui_object, rel, rela, direction, cui_subject, source) = result
         key = (umls_source_name, cui_object)
         if key not in cui_source_info:
@@ -213,8 +208,7 @@ def cui_sources(cursor, output, sources):
 
     print("Finished relations_sql_statement at", kg2_util.date())
 
-    cursor.execute(definitions_sql_statement)
-    for result in cursor.fetchall():
+    for result in kg2_util.stream_sql_results(connection, definitions_sql_statement, fetch_batch_size):
         (node_id, definition) = result
         key = (umls_source_name, node_id)
         if key not in cui_source_info:
@@ -243,6 +237,7 @@ if __name__ == '__main__':
     mysql_config_file = args.mysqlConfigFile
     mysql_db_name = args.mysqlDBName
     output_file_name = args.outputFile
+    fetch_batch_size = args.fetch_batch_size
     connection = pymysql.connect(read_default_file=mysql_config_file, db=mysql_db_name)
     preds_dict = dict()
 
@@ -256,11 +251,11 @@ if __name__ == '__main__':
         cursor.execute(max_len_sql_statement)
         cursor.fetchall()
 
-        # This ensure we don't have UMLS sources that overwrite each other's names
-        sources = get_english_sources(cursor, output)
+    # This ensure we don't have UMLS sources that overwrite each other's names
+    sources = get_english_sources(connection, output, fetch_batch_size)
 
-        code_sources(cursor, output)
-        cui_sources(cursor, output, sources)
+    code_sources(connection, output, fetch_batch_size)
+    cui_sources(connection, output, sources, fetch_batch_size)
 
     connection.close()
 